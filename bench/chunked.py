@@ -0,0 +1,38 @@
+#
+# Decoding time of large CER (1000-octet chunked) OCTET STRING and
+# BIT STRING values as a function of their size.
+#
+# Throughput is expected to stay flat as the payload grows.
+#
+import sys, time
+from pyasn1.type import univ
+from pyasn1.codec.cer import encoder, decoder
+
+def build(asn1Spec, size):
+    if asn1Spec.getTagSet() == univ.BitString.tagSet:
+        value = asn1Spec.clone(univ.BitStringValue(bytes(bytearray(size)), 0))
+    else:
+        value = asn1Spec.clone(bytes(bytearray(size)))
+    return encoder.encode(value)
+
+def measure(substrate, asn1Spec, repeat=3):
+    best = None
+    while repeat:
+        repeat = repeat - 1
+        started = time.time()
+        decoder.decode(substrate, asn1Spec=asn1Spec)
+        elapsed = time.time() - started
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def main(sizes):
+    print('%10s %12s %10s %10s' % ('MB', 'type', 'seconds', 'MB/s'))
+    for asn1Spec in univ.OctetString(), univ.BitString():
+        for size in sizes:
+            substrate = build(asn1Spec, size * 1024 * 1024)
+            elapsed = measure(substrate, asn1Spec)
+            print('%10d %12s %10.3f %10.1f' % (size, asn1Spec.__class__.__name__, elapsed, size/elapsed))
+
+if __name__ == '__main__':
+    main([ int(x) for x in sys.argv[1:] ] or [1, 10, 50])
@@ -0,0 +1,65 @@
+#
+# Generic versus spec-compiled coding of fixed-schema records.
+#
+import sys, time
+from pyasn1.type import univ, namedtype, tag
+from pyasn1.codec.ber import encoder, decoder
+
+class Record(univ.Sequence):
+    componentType = namedtype.NamedTypes(
+        namedtype.NamedType('id', univ.Integer()),
+        namedtype.OptionalNamedType('active', univ.Boolean()),
+        namedtype.DefaultedNamedType('version', univ.Integer(1)),
+        namedtype.NamedType('name', univ.OctetString()),
+        namedtype.NamedType('attrs', univ.SequenceOf(
+            componentType=univ.ObjectIdentifier()
+            ).subtype(
+                explicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 0)
+            ))
+        )
+
+class Records(univ.SequenceOf):
+    componentType = Record()
+
+def build(count):
+    s = Records()
+    for idx in range(count):
+        r = Record()
+        r.setComponentByName('id', idx)
+        if idx % 2:
+            r.setComponentByName('active', 1)
+        r.setComponentByName('name', 'record #%d' % idx)
+        r.setComponentByName('attrs')
+        r.getComponentByName('attrs').setComponentByPosition(0, (1, 3, 6, 1))
+        r.getComponentByName('attrs').setComponentByPosition(1, (2, 5, 4, 3))
+        s.setComponentByPosition(idx, r)
+    return s
+
+def measure(codecFun, argument, repeat=3):
+    best = None
+    while repeat:
+        repeat = repeat - 1
+        started = time.time()
+        codecFun(argument)
+        elapsed = time.time() - started
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def main(counts):
+    asn1Spec = Records()
+    compiledDecoder = decoder.decode.compile(asn1Spec)
+    compiledEncoder = encoder.encode.compile(asn1Spec)
+    print('%10s %8s %10s %10s %8s' % ('records', 'codec', 'generic', 'compiled', 'speedup'))
+    for count in counts:
+        value = build(count)
+        generic = measure(encoder.encode, value)
+        specialized = measure(compiledEncoder, value)
+        print('%10d %8s %10.3f %10.3f %8.2f' % (count, 'encoder', generic, specialized, generic/specialized))
+        substrate = encoder.encode(value)
+        generic = measure(lambda x: decoder.decode(x, asn1Spec=asn1Spec), substrate)
+        specialized = measure(compiledDecoder, substrate)
+        print('%10d %8s %10.3f %10.3f %8.2f' % (count, 'decoder', generic, specialized, generic/specialized))
+
+if __name__ == '__main__':
+    main([ int(x) for x in sys.argv[1:] ] or [1000, 5000, 20000])
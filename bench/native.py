@@ -0,0 +1,24 @@
+#
+# Coding of fixed-schema records from and into plain Python values
+# versus building and decoding into pyasn1 objects.
+#
+import sys, time
+from pyasn1.codec.ber import encoder, decoder
+from compiled import Records, build, measure
+
+def main(counts):
+    asn1Spec = Records()
+    compiledEncoder = encoder.encode.compile(asn1Spec)
+    print('%10s %8s %10s %10s %8s' % ('records', 'codec', 'objects', 'native', 'speedup'))
+    for count in counts:
+        value = decoder.nativeValue(build(count))
+        generic = measure(lambda x: compiledEncoder(build(count)), value)
+        native = measure(lambda x: encoder.encodeNative(x, asn1Spec), value)
+        print('%10d %8s %10.3f %10.3f %8.2f' % (count, 'encoder', generic, native, generic/native))
+        substrate = encoder.encodeNative(value, asn1Spec)
+        generic = measure(lambda x: decoder.decode(x, asn1Spec=asn1Spec), substrate)
+        native = measure(lambda x: decoder.decode(x, asn1Spec=asn1Spec, native=True), substrate)
+        print('%10d %8s %10.3f %10.3f %8.2f' % (count, 'decoder', generic, native, generic/native))
+
+if __name__ == '__main__':
+    main([ int(x) for x in sys.argv[1:] ] or [1000, 5000, 20000])
@@ -0,0 +1,35 @@
+#
+# Decoding time of SEQUENCE OF values as a function of their size.
+#
+# Per-item time is expected to stay flat as the number of items grows.
+#
+import sys, time
+from pyasn1.type import univ
+from pyasn1.codec.ber import encoder, decoder
+
+def build(count):
+    s = univ.SequenceOf(componentType=univ.Integer())
+    for idx in range(count):
+        s.setComponentByPosition(idx, idx)
+    return encoder.encode(s)
+
+def measure(substrate, asn1Spec, repeat=3):
+    best = None
+    while repeat:
+        repeat = repeat - 1
+        started = time.time()
+        decoder.decode(substrate, asn1Spec=asn1Spec)
+        elapsed = time.time() - started
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def main(counts):
+    asn1Spec = univ.SequenceOf(componentType=univ.Integer())
+    print('%10s %10s %12s' % ('items', 'seconds', 'usec/item'))
+    for count in counts:
+        elapsed = measure(build(count), asn1Spec)
+        print('%10d %10.3f %12.2f' % (count, elapsed, elapsed*1000000/count))
+
+if __name__ == '__main__':
+    main([ int(x) for x in sys.argv[1:] ] or [10000, 20000, 40000, 80000])
@@ -0,0 +1,23 @@
+#
+# Coding of fixed-schema records with and without per-component
+# constraints and type checks (trusted mode).
+#
+import sys, time
+from pyasn1.codec.ber import encoder, decoder
+from compiled import Records, build, measure
+
+def main(counts):
+    asn1Spec = Records()
+    print('%10s %8s %10s %10s %8s' % ('records', 'codec', 'checked', 'trusted', 'speedup'))
+    for count in counts:
+        value = build(count)
+        checked = measure(encoder.encode, value)
+        trusted = measure(lambda x: encoder.encode(x, trusted=True), value)
+        print('%10d %8s %10.3f %10.3f %8.2f' % (count, 'encoder', checked, trusted, checked/trusted))
+        substrate = encoder.encode(value)
+        checked = measure(lambda x: decoder.decode(x, asn1Spec=asn1Spec), substrate)
+        trusted = measure(lambda x: decoder.decode(x, asn1Spec=asn1Spec, trusted=True), substrate)
+        print('%10d %8s %10.3f %10.3f %8.2f' % (count, 'decoder', checked, trusted, checked/trusted))
+
+if __name__ == '__main__':
+    main([ int(x) for x in sys.argv[1:] ] or [1000, 5000, 20000])
@@ -0,0 +1,50 @@
+# asyncio streams support for BER/CER/DER codecs (Python 3.7+)
+from pyasn1.codec.ber import decoder, encoder
+from pyasn1.compat.octets import null
+from pyasn1 import debug
+
+async def readRecord(reader, chunks):
+    """Read one complete TLV into chunks, return false on end of stream"""
+    framer = decoder.RecordFramer()
+    while 1:
+        octets = await reader.read(framer.wanted())
+        if not octets:
+            if framer.atRecordStart():
+                return
+            framer.checkComplete()
+        chunks.append(octets)
+        if framer.frame(octets, 0, len(octets))[1]:
+            return 1
+
+class StreamDecoder:
+    """Asynchronous iterator of values decoded off asyncio.StreamReader"""
+    def __init__(self, reader, asn1Spec=None, decodeFun=decoder.decode):
+        self.__reader = reader
+        self.__asn1Spec = asn1Spec
+        self.__decodeFun = decodeFun
+
+    def __aiter__(self): return self
+
+    async def __anext__(self):
+        chunks = []
+        if not await readRecord(self.__reader, chunks):
+            raise StopAsyncIteration
+        debug.logger and debug.logger & debug.flagDecoder and debug.logger('read %d-octet record off stream' % sum([ len(x) for x in chunks ]))
+        return self.__decodeFun(null.join(chunks), self.__asn1Spec)[0]
+
+class StreamEncoder:
+    """Writes encoded values into asyncio.StreamWriter obeying its flow
+       control"""
+    def __init__(self, writer, encodeFun=encoder.encode):
+        self.__writer = writer
+        self.__encodeFun = encodeFun
+
+    async def write(self, *values):
+        for value in values:
+            self.__writer.write(self.__encodeFun(value))
+            # let transport buffer drain below its high-water mark
+            await self.__writer.drain()
+
+    async def close(self):
+        self.__writer.close()
+        await self.__writer.wait_closed()
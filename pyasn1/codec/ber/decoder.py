@@ -1,72 +1,185 @@
 # BER decoder
-from pyasn1.type import tag, univ, char, useful, tagmap
+from pyasn1.type import base, tag, univ, char, useful, tagmap
 from pyasn1.codec.ber import eoo
-from pyasn1.compat.octets import oct2int, isOctetsType
+from pyasn1.compat.octets import int2oct, oct2int, isOctetsType, null, \
+     octsView, isOctsView, view2octs, intsView
+from pyasn1.compat import integer
 from pyasn1 import debug, error
+import sys, weakref
+
+# end-of-octets marker closing indefinite length values
+eooOctets = null.join([int2oct(0), int2oct(0)])
+
+def peekTagSet(headerCache, substrate, tagMap):
+    """Return TagSet of the value substrate starts with, explicit tags
+       unwrapped until tagMap knows it, without decoding the value"""
+    tagSet, substrate = headerCache.decodeTag(substrate)
+    while tagSet not in tagMap and \
+              tagSet[0][1] == tag.tagFormatConstructed and \
+              tagSet[0][0] != tag.tagClassUniversal and substrate:
+        firstOctet = oct2int(substrate[0])
+        if firstOctet > 128:
+            substrate = substrate[(firstOctet & 0x7F) + 1:]
+        else:
+            substrate = substrate[1:]
+        if not substrate:
+            break
+        tagSet, substrate = headerCache.decodeTag(substrate, tagSet)
+    return tagSet
+
+def nativeValue(value):
+    """Return Python value standing for ASN.1 one in native decoding mode"""
+    if isinstance(value, univ.Choice):
+        return value.getName(), nativeValue(value.getComponent())
+    if isinstance(value, univ.SequenceAndSetBase):
+        componentType = value.getComponentType()
+        if componentType is None:
+            return [ nativeValue(value.getComponentByPosition(idx))
+                     for idx in range(len(value)) ]
+        r = {}
+        for idx in range(len(componentType)):
+            component = value.getComponentByPosition(idx)
+            if component is not None:
+                r[componentType.getNameByPosition(idx)] = nativeValue(component)
+        return r
+    if isinstance(value, univ.SetOf):
+        return [ nativeValue(x) for x in value ]
+    if isinstance(value, univ.Boolean):
+        return bool(value)
+    if isinstance(value, univ.Integer):
+        return int(value)
+    if isinstance(value, univ.Real):
+        return float(value)
+    if isinstance(value, univ.BitString):
+        return univ.BitStringValue(value.asOctets(), -len(value) & 7)
+    if isinstance(value, univ.Null):
+        return None
+    if isinstance(value, univ.OctetString):
+        return value.asOctets()
+    if isinstance(value, univ.ObjectIdentifier):
+        return value.asTuple()
+    raise error.PyAsn1Error('No native value for %r' % (value,))
 
 class AbstractDecoder:
     protoComponent = None
+    supportLazyMode = 0
     def valueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                     length, state, decodeFun, substrateFun):
+                     length, state, decodeFun, substrateFun, **options):
         raise error.PyAsn1Error('Decoder not implemented for %s' % (tagSet,))
 
     def indefLenValueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                             length, state, decodeFun, substrateFun):
+                             length, state, decodeFun, substrateFun, **options):
         raise error.PyAsn1Error('Indefinite length mode decoder not implemented for %s' % (tagSet,))
 
-class AbstractSimpleDecoder(AbstractDecoder):
-    tagFormats = (tag.tagFormatSimple,)
-    def _createComponent(self, asn1Spec, tagSet, value=None):
+    def _verifyTagFormat(self, tagSet):
         if tagSet[0][1] not in self.tagFormats:
             raise error.PyAsn1Error('Invalid tag format %s for %s' % (tagSet[0], self.protoComponent.prettyPrintType()))
+
+class AbstractSimpleDecoder(AbstractDecoder):
+    tagFormats = (tag.tagFormatSimple,)
+    # values come out in their univ objects internal form
+    supportTrustedMode = 1
+    def _createComponent(self, asn1Spec, tagSet, value=None, **options):
+        self._verifyTagFormat(tagSet)
+        if options.get('native'):
+            return self._nativeValue(asn1Spec, value)
+        if options.get('trusted') and value is not None and \
+               self.supportTrustedMode:
+            # no conversion or constraints check
+            if asn1Spec is None:
+                return self.protoComponent.cloneTrusted(value, tagSet)
+            return asn1Spec.cloneTrusted(value)
         if asn1Spec is None:
             return self.protoComponent.clone(value, tagSet)
         elif value is None:
             return asn1Spec
         else:
             return asn1Spec.clone(value)
+
+    def _nativeValue(self, asn1Spec, value):
+        """Python value standing for the decoded one in native mode"""
+        return value
+
+    def _getChunkOptions(self, options):
+        if options.get('native'):
+            options = options.copy()
+            del options['native']  # chunks are joined as univ objects
+        return options
         
 class AbstractConstructedDecoder(AbstractDecoder):
     tagFormats = (tag.tagFormatConstructed,)
     def _createComponent(self, asn1Spec, tagSet, value=None):
-        if tagSet[0][1] not in self.tagFormats:
-            raise error.PyAsn1Error('Invalid tag format %s for %s' % (tagSet[0], self.protoComponent.prettyPrintType()))
+        self._verifyTagFormat(tagSet)
         if asn1Spec is None:
             return self.protoComponent.clone(tagSet)
         else:
             return asn1Spec.clone()
+
+    def _getComponentOptions(self, options):
+        if options.get('lazy'):
+            # constructed components get deferred till first access
+            return dict(options, deferred=True)
+        return options
+
+    def _peekComponent(self, decodeFun, substrate, tagMap, tagSet=None):
+        """Return spec of the component substrate starts with (or of the
+           given TagSet) and TagSet to find component position by"""
+        if tagMap is None:
+            raise error.PyAsn1Error('Excessive component in substrate')
+        if tagSet is None:
+            peekCache = decodeFun.getPeekCache()
+            key = id(tagMap), substrate[0]
+            if key in peekCache:
+                tagMapRef, componentSpec, tagSet = peekCache[key]
+                if tagMapRef() is tagMap:
+                    return componentSpec, tagSet
+            tagSet = peekTagSet(decodeFun.getHeaderCache(), substrate, tagMap)
+        else:
+            key = None
+        if tagSet not in tagMap:
+            raise error.PyAsn1Error(
+                '%s not in asn1Spec: %s' % (tagSet, tagMap)
+                )
+        componentSpec = tagMap[tagSet]
+        if componentSpec is tagMap.getDef():
+            tagSet = componentSpec.getTagSet()  # open type
+        if key is not None and len(tagSet) == 1 and \
+               oct2int(substrate[0])&0x1F != 0x1F:
+            # single identifier octet resolves the same way every time
+            peekCache.put(key, tagMap, componentSpec, tagSet)
+        return componentSpec, tagSet
                                 
 class EndOfOctetsDecoder(AbstractSimpleDecoder):
     def valueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                     length, state, decodeFun, substrateFun):
-        return eoo.endOfOctets, substrate[length:]
+                     length, state, decodeFun, substrateFun, **options):
+        if length:
+            raise error.PyAsn1Error('Non-empty end-of-octets marker')
+        return eoo.endOfOctets, substrate
 
 class ExplicitTagDecoder(AbstractSimpleDecoder):
     protoComponent = univ.Any('')
     tagFormats = (tag.tagFormatConstructed,)
     def valueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                     length, state, decodeFun, substrateFun):
+                     length, state, decodeFun, substrateFun, **options):
         if substrateFun:
             return substrateFun(
                        self._createComponent(asn1Spec, tagSet, ''),
                        substrate, length
                    )
         head, tail = substrate[:length], substrate[length:]
-        value, _ = decodeFun(head, asn1Spec, tagSet, length)
+        value, _ = decodeFun(head, asn1Spec, tagSet, length, **options)
         return value, tail
 
     def indefLenValueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                             length, state, decodeFun, substrateFun):
+                             length, state, decodeFun, substrateFun, **options):
         if substrateFun:
             return substrateFun(
                        self._createComponent(asn1Spec, tagSet, ''),
                        substrate, length
                    )
-        value, substrate = decodeFun(substrate, asn1Spec, tagSet, length)
-        terminator, substrate = decodeFun(substrate)
-        if eoo.endOfOctets.isSameTypeWith(terminator) and \
-                terminator == eoo.endOfOctets:
-            return value, substrate
+        value, substrate = decodeFun(substrate, asn1Spec, tagSet, length, **options)
+        if substrate[:2] == eooOctets:
+            return value, substrate[2:]
         else:
             raise error.PyAsn1Error('Missing end-of-octets terminator')
 
@@ -74,51 +187,35 @@ explicitTagDecoder = ExplicitTagDecoder()
 
 class IntegerDecoder(AbstractSimpleDecoder):
     protoComponent = univ.Integer(0)
-    precomputedValues = {
-        '\x00':  0,
-        '\x01':  1,
-        '\x02':  2,
-        '\x03':  3,
-        '\x04':  4,
-        '\x05':  5,
-        '\x06':  6,
-        '\x07':  7,
-        '\x08':  8,
-        '\x09':  9,
-        '\xff': -1,
-        '\xfe': -2,
-        '\xfd': -3,
-        '\xfc': -4,
-        '\xfb': -5
-        }
-    
+    # single octet contents, keyed by octets on either Python line
+    precomputedValues = dict(
+        [ (int2oct(x), x) for x in range(128) ] +
+        [ (int2oct(x), x - 256) for x in range(128, 256) ]
+        )
+
     def valueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet, length,
-                     state, decodeFun, substrateFun):
-        head, tail = substrate[:length], substrate[length:]
+                     state, decodeFun, substrateFun, **options):
+        head, tail = view2octs(substrate[:length]), substrate[length:]
         if not head:
-            return self._createComponent(asn1Spec, tagSet, 0), tail
+            return self._createComponent(asn1Spec, tagSet, 0, **options), tail
         if head in self.precomputedValues:
             value = self.precomputedValues[head]
         else:
-            firstOctet = oct2int(head[0])
-            if firstOctet & 0x80:
-                value = -1
-            else:
-                value = 0
-            for octet in head:
-                value = value << 8 | oct2int(octet)
-        return self._createComponent(asn1Spec, tagSet, value), tail
+            value = integer.from_bytes(head, signed=True)
+        return self._createComponent(asn1Spec, tagSet, value, **options), tail
 
 class BooleanDecoder(IntegerDecoder):
     protoComponent = univ.Boolean(0)
-    def _createComponent(self, asn1Spec, tagSet, value=None):
-        return IntegerDecoder._createComponent(self, asn1Spec, tagSet, value and 1 or 0)
+    def _createComponent(self, asn1Spec, tagSet, value=None, **options):
+        return IntegerDecoder._createComponent(self, asn1Spec, tagSet, value and 1 or 0, **options)
+
+    def _nativeValue(self, asn1Spec, value): return bool(value)
 
 class BitStringDecoder(AbstractSimpleDecoder):
     protoComponent = univ.BitString(())
     tagFormats = (tag.tagFormatSimple, tag.tagFormatConstructed)
     def valueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet, length,
-                     state, decodeFun, substrateFun):
+                     state, decodeFun, substrateFun, **options):
         head, tail = substrate[:length], substrate[length:]
         if tagSet[0][1] == tag.tagFormatSimple:    # XXX what tag to check?
             if not head:
@@ -128,82 +225,127 @@ class BitStringDecoder(AbstractSimpleDecoder):
                 raise error.PyAsn1Error(
                     'Trailing bits overflow %s' % trailingBits
                     )
-            head = head[1:]
-            lsb = p = 0; l = len(head)-1; b = ()
-            while p <= l:
-                if p == l:
-                    lsb = trailingBits
-                j = 7                    
-                o = oct2int(head[p])
-                while j >= lsb:
-                    b = b + ((o>>j)&0x01,)
-                    j = j - 1
-                p = p + 1
-            return self._createComponent(asn1Spec, tagSet, b), tail
-        r = self._createComponent(asn1Spec, tagSet, ())
+            return self._createComponent(
+                asn1Spec, tagSet,
+                univ.BitStringValue(view2octs(head[1:]), trailingBits),
+                **options
+                ), tail
         if substrateFun:
-            return substrateFun(r, substrate, length)
+            return substrateFun(self._createComponent(asn1Spec, tagSet, ()),
+                                substrate, length)
+        chunkOptions = self._getChunkOptions(options)
+        chunks = []
         while head:
-            component, head = decodeFun(head)
-            r = r + component
-        return r, tail
+            component, head = decodeFun(head, **chunkOptions)
+            if not isinstance(component, univ.BitString):
+                raise error.PyAsn1Error(
+                    'Unexpected %s chunk' % component.__class__.__name__
+                    )
+            chunks.append(component)
+        return self._createComponent(
+            asn1Spec, tagSet, self._joinChunks(chunks), **options
+            ), tail
 
     def indefLenValueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                             length, state, decodeFun, substrateFun):
-        r = self._createComponent(asn1Spec, tagSet, '')
+                             length, state, decodeFun, substrateFun, **options):
         if substrateFun:
-            return substrateFun(r, substrate, length)
+            return substrateFun(self._createComponent(asn1Spec, tagSet, ()),
+                                substrate, length)
+        chunkOptions = self._getChunkOptions(options)
+        chunks = []
         while substrate:
-            component, substrate = decodeFun(substrate)
-            if eoo.endOfOctets.isSameTypeWith(component) and \
-                    component == eoo.endOfOctets:
+            if substrate[:2] == eooOctets:
+                substrate = substrate[2:]
                 break
-            r = r + component
+            component, substrate = decodeFun(substrate, **chunkOptions)
+            if not isinstance(component, univ.BitString):
+                raise error.PyAsn1Error(
+                    'Unexpected %s chunk' % component.__class__.__name__
+                    )
+            chunks.append(component)
         else:
             raise error.SubstrateUnderrunError(
                 'No EOO seen before substrate ends'
                 )
-        return r, substrate
+        return self._createComponent(
+            asn1Spec, tagSet, self._joinChunks(chunks), **options
+            ), substrate
+
+    def _joinChunks(self, chunks):
+        for chunk in chunks[:-1]:
+            if len(chunk) & 7:
+                # not octet-aligned, shift bits in
+                value = univ.BitStringValue()
+                for chunk in chunks:
+                    value = value + univ.BitStringValue(
+                        chunk.asOctets(), -len(chunk) & 7
+                        )
+                return value
+        if chunks:
+            return univ.BitStringValue(
+                null.join([ x.asOctets() for x in chunks ]),
+                -len(chunks[-1]) & 7
+                )
+        return univ.BitStringValue()
 
 class OctetStringDecoder(AbstractSimpleDecoder):
     protoComponent = univ.OctetString('')
     tagFormats = (tag.tagFormatSimple, tag.tagFormatConstructed)
     def valueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet, length,
-                     state, decodeFun, substrateFun):
+                     state, decodeFun, substrateFun, **options):
         head, tail = substrate[:length], substrate[length:]
         if tagSet[0][1] == tag.tagFormatSimple:    # XXX what tag to check?
-            return self._createComponent(asn1Spec, tagSet, head), tail
-        r = self._createComponent(asn1Spec, tagSet, '')
+            return self._createComponent(
+                asn1Spec, tagSet, view2octs(head), **options
+                ), tail
         if substrateFun:
-            return substrateFun(r, substrate, length)
+            return substrateFun(self._createComponent(asn1Spec, tagSet, ''),
+                                substrate, length)
+        # chunks are joined once, not value by value
+        chunkOptions = self._getChunkOptions(options)
+        chunks = []
         while head:
-            component, head = decodeFun(head)
-            r = r + component
-        return r, tail
+            component, head = decodeFun(head, **chunkOptions)
+            if not isinstance(component, univ.OctetString):
+                raise error.PyAsn1Error(
+                    'Unexpected %s chunk' % component.__class__.__name__
+                    )
+            chunks.append(component.asOctets())
+        return self._createComponent(
+            asn1Spec, tagSet, null.join(chunks), **options
+            ), tail
 
     def indefLenValueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                             length, state, decodeFun, substrateFun):
-        r = self._createComponent(asn1Spec, tagSet, '')
+                             length, state, decodeFun, substrateFun, **options):
         if substrateFun:
-            return substrateFun(r, substrate, length)
+            return substrateFun(self._createComponent(asn1Spec, tagSet, ''),
+                                substrate, length)
+        chunkOptions = self._getChunkOptions(options)
+        chunks = []
         while substrate:
-            component, substrate = decodeFun(substrate)
-            if eoo.endOfOctets.isSameTypeWith(component) and \
-                    component == eoo.endOfOctets:
+            if substrate[:2] == eooOctets:
+                substrate = substrate[2:]
                 break
-            r = r + component
+            component, substrate = decodeFun(substrate, **chunkOptions)
+            if not isinstance(component, univ.OctetString):
+                raise error.PyAsn1Error(
+                    'Unexpected %s chunk' % component.__class__.__name__
+                    )
+            chunks.append(component.asOctets())
         else:
             raise error.SubstrateUnderrunError(
                 'No EOO seen before substrate ends'
                 )
-        return r, substrate
+        return self._createComponent(
+            asn1Spec, tagSet, null.join(chunks), **options
+            ), substrate
 
 class NullDecoder(AbstractSimpleDecoder):
     protoComponent = univ.Null('')
     def valueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                     length, state, decodeFun, substrateFun):
+                     length, state, decodeFun, substrateFun, **options):
         head, tail = substrate[:length], substrate[length:]
-        r = self._createComponent(asn1Spec, tagSet)
+        r = self._createComponent(asn1Spec, tagSet, **options)
         if head:
             raise error.PyAsn1Error('Unexpected %d-octet substrate for Null' % length)
         return r, tail
@@ -211,7 +353,7 @@ class NullDecoder(AbstractSimpleDecoder):
 class ObjectIdentifierDecoder(AbstractSimpleDecoder):
     protoComponent = univ.ObjectIdentifier(())
     def valueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet, length,
-                     state, decodeFun, substrateFun):
+                     state, decodeFun, substrateFun, **options):
         head, tail = substrate[:length], substrate[length:]
         if not head:
             raise error.PyAsn1Error('Empty substrate')
@@ -254,15 +396,16 @@ class ObjectIdentifierDecoder(AbstractSimpleDecoder):
         else:
             raise error.PyAsn1Error('Malformed first OID octet: %s' % head[0])
 
-        return self._createComponent(asn1Spec, tagSet, oid), tail
+        return self._createComponent(asn1Spec, tagSet, oid, **options), tail
 
 class RealDecoder(AbstractSimpleDecoder):
     protoComponent = univ.Real()
+    supportTrustedMode = 0  # values are normalized by Real
     def valueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                     length, state, decodeFun, substrateFun):
-        head, tail = substrate[:length], substrate[length:]
+                     length, state, decodeFun, substrateFun, **options):
+        head, tail = view2octs(substrate[:length]), substrate[length:]
         if not head:
-            return self._createComponent(asn1Spec, tagSet, 0.0), tail
+            return self._createComponent(asn1Spec, tagSet, 0.0, **options), tail
         fo = oct2int(head[0]); head = head[1:]
         if fo & 0x80:  # binary enoding
             n = (fo & 0x03) + 1
@@ -272,11 +415,7 @@ class RealDecoder(AbstractSimpleDecoder):
             eo, head = head[:n], head[n:]
             if not eo or not head:
                 raise error.PyAsn1Error('Real exponent screwed')
-            e = oct2int(eo[0]) & 0x80 and -1 or 0
-            while eo:         # exponent
-                e <<= 8
-                e |= oct2int(eo[0])
-                eo = eo[1:]
+            e = integer.from_bytes(eo, signed=True)  # exponent
             b = fo >> 4 & 0x03 # base bits
             if b > 2:
                 raise error.PyAsn1Error('Illegal Real base')
@@ -284,11 +423,7 @@ class RealDecoder(AbstractSimpleDecoder):
                 e *= 3
             elif b == 2: # encbase = 16
                 e *= 4
-            p = 0
-            while head:  # value
-                p <<= 8
-                p |= oct2int(head[0])
-                head = head[1:]
+            p = integer.from_bytes(head)  # value
             if fo & 0x40:    # sign bit
                 p = -p
             sf = fo >> 2 & 0x03  # scale bits
@@ -316,10 +451,17 @@ class RealDecoder(AbstractSimpleDecoder):
             raise error.SubstrateUnderrunError(
                 'Unknown encoding (tag %s)' % fo
                 )
-        return self._createComponent(asn1Spec, tagSet, value), tail
+        return self._createComponent(asn1Spec, tagSet, value, **options), tail
+
+    def _nativeValue(self, asn1Spec, value):
+        if isinstance(value, tuple):
+            m, b, e = value
+            return float(m * pow(b, e))
+        return float(value)
         
 class SequenceDecoder(AbstractConstructedDecoder):
     protoComponent = univ.Sequence()
+    supportLazyMode = 1
     def _getComponentTagMap(self, r, idx):
         try:
             return r.getComponentTagMapNearPosition(idx)
@@ -328,87 +470,207 @@ class SequenceDecoder(AbstractConstructedDecoder):
 
     def _getComponentPositionByType(self, r, t, idx):
         return r.getComponentPositionNearType(t, idx)
+
+    def _getComponentTypes(self, r, asn1Spec):
+        # a fresh value carries its own copy of spec's component types,
+        # the spec keeps their tag maps built once
+        if asn1Spec is None:
+            return r
+        return asn1Spec
     
+    def _setNativeDefaults(self, componentTypes, r):
+        if len(r) == len(componentTypes):
+            return
+        for namedType in componentTypes:
+            name = namedType.getName()
+            if name in r:
+                continue
+            if namedType.isDefaulted:
+                r[name] = nativeValue(namedType.getType())
+            elif not namedType.isOptional:
+                raise error.PyAsn1Error(
+                    'Uninitialized component %s' % (name,)
+                    )
+
+    def _decodeNative(self, substrate, asn1Spec, decodeFun, options,
+                      indefMode):
+        # plain dict of components by name, or list of them when schema-less
+        if asn1Spec is None or asn1Spec.getComponentType() is None:
+            r = []
+        else:
+            r = {}
+        idx = 0
+        while substrate:
+            if indefMode and substrate[:2] == eooOctets:
+                substrate = substrate[2:]
+                break
+            if r.__class__ is list:
+                component, substrate = decodeFun(substrate, **options)
+                r.append(component)
+                continue
+            componentSpec, componentTagSet = self._peekComponent(
+                decodeFun, substrate, self._getComponentTagMap(asn1Spec, idx)
+                )
+            idx = self._getComponentPositionByType(
+                asn1Spec, componentTagSet, idx
+                )
+            component, substrate = decodeFun(
+                substrate, componentSpec, **options
+                )
+            r[asn1Spec.getNameByPosition(idx)] = component
+            idx = idx + 1
+        else:
+            if indefMode:
+                raise error.SubstrateUnderrunError(
+                    'No EOO seen before substrate ends'
+                    )
+        if r.__class__ is dict:
+            self._setNativeDefaults(asn1Spec.getComponentType(), r)
+        return r, substrate
+
     def valueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                     length, state, decodeFun, substrateFun):
+                     length, state, decodeFun, substrateFun, **options):
         head, tail = substrate[:length], substrate[length:]
+        if options.get('native') and not substrateFun:
+            self._verifyTagFormat(tagSet)
+            r, _ = self._decodeNative(head, asn1Spec, decodeFun, options, 0)
+            return r, tail
         r = self._createComponent(asn1Spec, tagSet)
         idx = 0
         if substrateFun:
             return substrateFun(r, substrate, length)
+        options = self._getComponentOptions(options)
+        trusted = options.get('trusted')
+        componentTypes = self._getComponentTypes(r, asn1Spec)
         while head:
-            asn1Spec = self._getComponentTagMap(r, idx)
-            component, head = decodeFun(head, asn1Spec)
+            asn1Spec = self._getComponentTagMap(componentTypes, idx)
+            component, head = decodeFun(head, asn1Spec, **options)
             idx = self._getComponentPositionByType(
-                r, component.getEffectiveTagSet(), idx
+                componentTypes, component.getEffectiveTagSet(), idx
+                )
+            r.setComponentByPosition(
+                idx, component, asn1Spec is None and not trusted
                 )
-            r.setComponentByPosition(idx, component, asn1Spec is None)
             idx = idx + 1
         r.setDefaultComponents()
-        r.verifySizeSpec()
+        if not trusted:
+            r.verifySizeSpec()
         return r, tail
 
     def indefLenValueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                             length, state, decodeFun, substrateFun):
+                             length, state, decodeFun, substrateFun, **options):
+        if options.get('native') and not substrateFun:
+            self._verifyTagFormat(tagSet)
+            return self._decodeNative(
+                substrate, asn1Spec, decodeFun, options, 1
+                )
         r = self._createComponent(asn1Spec, tagSet)
         if substrateFun:
             return substrateFun(r, substrate, length)
+        options = self._getComponentOptions(options)
+        trusted = options.get('trusted')
+        componentTypes = self._getComponentTypes(r, asn1Spec)
         idx = 0
         while substrate:
-            asn1Spec = self._getComponentTagMap(r, idx)
-            component, substrate = decodeFun(substrate, asn1Spec)
-            if eoo.endOfOctets.isSameTypeWith(component) and \
-                    component == eoo.endOfOctets:
+            if substrate[:2] == eooOctets:
+                substrate = substrate[2:]
                 break
+            asn1Spec = self._getComponentTagMap(componentTypes, idx)
+            component, substrate = decodeFun(substrate, asn1Spec, **options)
             idx = self._getComponentPositionByType(
-                r, component.getEffectiveTagSet(), idx
+                componentTypes, component.getEffectiveTagSet(), idx
                 )            
-            r.setComponentByPosition(idx, component, asn1Spec is None)
+            r.setComponentByPosition(
+                idx, component, asn1Spec is None and not trusted
+                )
             idx = idx + 1                
         else:
             raise error.SubstrateUnderrunError(
                 'No EOO seen before substrate ends'
                 )
         r.setDefaultComponents()
-        r.verifySizeSpec()
+        if not trusted:
+            r.verifySizeSpec()
         return r, substrate
 
 class SequenceOfDecoder(AbstractConstructedDecoder):
     protoComponent = univ.SequenceOf()    
+    supportLazyMode = 1
+    def _decodeNative(self, substrate, asn1Spec, decodeFun, options,
+                      indefMode):
+        if asn1Spec is None:
+            componentSpec = None
+        else:
+            componentSpec = asn1Spec.getComponentType()
+        r = []
+        while substrate:
+            if indefMode and substrate[:2] == eooOctets:
+                substrate = substrate[2:]
+                break
+            component, substrate = decodeFun(
+                substrate, componentSpec, **options
+                )
+            r.append(component)
+        else:
+            if indefMode:
+                raise error.SubstrateUnderrunError(
+                    'No EOO seen before substrate ends'
+                    )
+        return r, substrate
+
     def valueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                     length, state, decodeFun, substrateFun):
+                     length, state, decodeFun, substrateFun, **options):
         head, tail = substrate[:length], substrate[length:]
+        if options.get('native') and not substrateFun:
+            self._verifyTagFormat(tagSet)
+            r, _ = self._decodeNative(head, asn1Spec, decodeFun, options, 0)
+            return r, tail
         r = self._createComponent(asn1Spec, tagSet)
         if substrateFun:
             return substrateFun(r, substrate, length)
         asn1Spec = r.getComponentType()
+        options = self._getComponentOptions(options)
+        trusted = options.get('trusted')
         idx = 0
         while head:
-            component, head = decodeFun(head, asn1Spec)
-            r.setComponentByPosition(idx, component, asn1Spec is None)
+            component, head = decodeFun(head, asn1Spec, **options)
+            r.setComponentByPosition(
+                idx, component, asn1Spec is None and not trusted
+                )
             idx = idx + 1
-        r.verifySizeSpec()
+        if not trusted:
+            r.verifySizeSpec()
         return r, tail
 
     def indefLenValueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                             length, state, decodeFun, substrateFun):
+                             length, state, decodeFun, substrateFun, **options):
+        if options.get('native') and not substrateFun:
+            self._verifyTagFormat(tagSet)
+            return self._decodeNative(
+                substrate, asn1Spec, decodeFun, options, 1
+                )
         r = self._createComponent(asn1Spec, tagSet)
         if substrateFun:
             return substrateFun(r, substrate, length)
         asn1Spec = r.getComponentType()
+        options = self._getComponentOptions(options)
+        trusted = options.get('trusted')
         idx = 0
         while substrate:
-            component, substrate = decodeFun(substrate, asn1Spec)
-            if eoo.endOfOctets.isSameTypeWith(component) and \
-                    component == eoo.endOfOctets:
+            if substrate[:2] == eooOctets:
+                substrate = substrate[2:]
                 break
-            r.setComponentByPosition(idx, component, asn1Spec is None)
+            component, substrate = decodeFun(substrate, asn1Spec, **options)
+            r.setComponentByPosition(
+                idx, component, asn1Spec is None and not trusted
+                )
             idx = idx + 1                
         else:
             raise error.SubstrateUnderrunError(
                 'No EOO seen before substrate ends'
                 )
-        r.verifySizeSpec()
+        if not trusted:
+            r.verifySizeSpec()
         return r, substrate
 
 class SetDecoder(SequenceDecoder):
@@ -429,54 +691,109 @@ class SetOfDecoder(SequenceOfDecoder):
 class ChoiceDecoder(AbstractConstructedDecoder):
     protoComponent = univ.Choice()
     tagFormats = (tag.tagFormatSimple, tag.tagFormatConstructed)
+    def _decodeNative(self, substrate, asn1Spec, tagSet, length, state,
+                      decodeFun, options, indefMode):
+        # (name, value) pair of the chosen alternative
+        tagMap = asn1Spec.getComponentTagMap()
+        if asn1Spec.getTagSet() == tagSet: # explicitly tagged Choice
+            componentSpec, componentTagSet = self._peekComponent(
+                decodeFun, substrate, tagMap
+                )
+            component, substrate = decodeFun(
+                substrate, componentSpec, **options
+                )
+            if indefMode:
+                if substrate[:2] != eooOctets:
+                    raise error.PyAsn1Error('No EOO seen before substrate ends')
+                substrate = substrate[2:]
+        else:
+            componentSpec, componentTagSet = self._peekComponent(
+                decodeFun, substrate, tagMap, tagSet
+                )
+            component, substrate = decodeFun(
+                substrate, componentSpec, tagSet, length, state, **options
+                )
+        componentTypes = asn1Spec.getComponentType()
+        idx = componentTypes.getPositionByType(componentTagSet)
+        return (componentTypes.getNameByPosition(idx), component), substrate
+
     def valueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                     length, state, decodeFun, substrateFun):
+                     length, state, decodeFun, substrateFun, **options):
         head, tail = substrate[:length], substrate[length:]
+        if options.get('native') and not substrateFun:
+            self._verifyTagFormat(tagSet)
+            r, _ = self._decodeNative(
+                head, asn1Spec, tagSet, length, state, decodeFun, options, 0
+                )
+            return r, tail
         r = self._createComponent(asn1Spec, tagSet)
         if substrateFun:
             return substrateFun(r, substrate, length)
+        if 'deferred' in options:
+            # alternatives are always decoded, Choice selects them by type
+            options = options.copy()
+            del options['deferred']
         if r.getTagSet() == tagSet: # explicitly tagged Choice
             component, head = decodeFun(
-                head, r.getComponentTagMap()
+                head, r.getComponentTagMap(), **options
                 )
         else:
             component, head = decodeFun(
-                head, r.getComponentTagMap(), tagSet, length, state
+                head, r.getComponentTagMap(), tagSet, length, state,
+                **options
                 )
         if isinstance(component, univ.Choice):
             effectiveTagSet = component.getEffectiveTagSet()
         else:
             effectiveTagSet = component.getTagSet()
-        r.setComponentByType(effectiveTagSet, component, 0, asn1Spec is None)
+        r.setComponentByType(
+            effectiveTagSet, component, 0,
+            asn1Spec is None and not options.get('trusted')
+            )
         return r, tail
 
     def indefLenValueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                     length, state, decodeFun, substrateFun):
+                     length, state, decodeFun, substrateFun, **options):
+        if options.get('native') and not substrateFun:
+            self._verifyTagFormat(tagSet)
+            return self._decodeNative(
+                substrate, asn1Spec, tagSet, length, state, decodeFun,
+                options, 1
+                )
         r = self._createComponent(asn1Spec, tagSet)
         if substrateFun:
             return substrateFun(r, substrate, length)
+        if 'deferred' in options:
+            # alternatives are always decoded, Choice selects them by type
+            options = options.copy()
+            del options['deferred']
         if r.getTagSet() == tagSet: # explicitly tagged Choice
-            component, substrate = decodeFun(substrate, r.getComponentTagMap())
-            eooMarker, substrate = decodeFun(substrate)  # eat up EOO marker
-            if not eoo.endOfOctets.isSameTypeWith(eooMarker) or \
-                    eooMarker != eoo.endOfOctets:
+            component, substrate = decodeFun(
+                substrate, r.getComponentTagMap(), **options
+                )
+            if substrate[:2] != eooOctets:
                 raise error.PyAsn1Error('No EOO seen before substrate ends')
+            substrate = substrate[2:]  # eat up EOO marker
         else:
             component, substrate= decodeFun(
-                substrate, r.getComponentTagMap(), tagSet, length, state
+                substrate, r.getComponentTagMap(), tagSet, length, state,
+                **options
             )
         if isinstance(component, univ.Choice):
             effectiveTagSet = component.getEffectiveTagSet()
         else:
             effectiveTagSet = component.getTagSet()
-        r.setComponentByType(effectiveTagSet, component, 0, asn1Spec is None)
+        r.setComponentByType(
+            effectiveTagSet, component, 0,
+            asn1Spec is None and not options.get('trusted')
+            )
         return r, substrate
 
 class AnyDecoder(AbstractSimpleDecoder):
     protoComponent = univ.Any()
     tagFormats = (tag.tagFormatSimple, tag.tagFormatConstructed)
     def valueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                     length, state, decodeFun, substrateFun):
+                     length, state, decodeFun, substrateFun, **options):
         if asn1Spec is None or \
                asn1Spec is not None and tagSet != asn1Spec.getTagSet():
             # untagged Any container, recover inner header substrate
@@ -485,36 +802,41 @@ class AnyDecoder(AbstractSimpleDecoder):
         if substrateFun:
             return substrateFun(self._createComponent(asn1Spec, tagSet),
                                 substrate, length)
-        head, tail = substrate[:length], substrate[length:]
-        return self._createComponent(asn1Spec, tagSet, value=head), tail
+        head, tail = view2octs(substrate[:length]), substrate[length:]
+        return self._createComponent(asn1Spec, tagSet, head, **options), tail
 
     def indefLenValueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet,
-                             length, state, decodeFun, substrateFun):
+                             length, state, decodeFun, substrateFun, **options):
         if asn1Spec is not None and tagSet == asn1Spec.getTagSet():
             # tagged Any type -- consume header substrate
-            header = ''
+            header = null
         else:
             # untagged Any, recover header substrate
-            header = fullSubstrate[:-len(substrate)]
+            header = view2octs(fullSubstrate[:-len(substrate)])
 
-        r = self._createComponent(asn1Spec, tagSet, header)
+        if substrateFun:
+            return substrateFun(self._createComponent(asn1Spec, tagSet, header),
+                                substrate, length)
 
         # Any components do not inherit initial tag
-        asn1Spec = self.protoComponent
-        
-        if substrateFun:
-            return substrateFun(r, substrate, length)
+        protoComponent = self.protoComponent
+
+        chunkOptions = self._getChunkOptions(options)
+        chunks = [ header ]
         while substrate:
-            component, substrate = decodeFun(substrate, asn1Spec)
-            if eoo.endOfOctets.isSameTypeWith(component) and \
-                    component == eoo.endOfOctets:
+            if substrate[:2] == eooOctets:
+                substrate = substrate[2:]
                 break
-            r = r + component
+            component, substrate = decodeFun(substrate, protoComponent,
+                                             **chunkOptions)
+            chunks.append(component.asOctets())
         else:
             raise error.SubstrateUnderrunError(
                 'No EOO seen before substrate ends'
                 )
-        return r, substrate
+        return self._createComponent(
+            asn1Spec, tagSet, null.join(chunks), **options
+            ), substrate
 
 # character string types
 class UTF8StringDecoder(OctetStringDecoder):
@@ -593,6 +915,625 @@ typeMap = {
   stGetValueDecoderByTag, stTryAsExplicitTag, stDecodeValue,
   stDumpRawValue, stErrorCondition, stStop ) = [x for x in range(10)]
 
+# Stream framing: pull exactly as many octets as TLV headers announce
+
+class ChunksReader:
+    """File-like read() over an iterable of octet chunks"""
+    def __init__(self, chunks):
+        self.__chunks = iter(chunks)
+        self.__chunk = null
+        self.__pos = 0
+
+    def read(self, size):
+        r = []
+        while size > 0:
+            if self.__pos >= len(self.__chunk):
+                try:
+                    self.__chunk = next(self.__chunks)
+                except StopIteration:
+                    break
+                self.__pos = 0
+                continue
+            octets = self.__chunk[self.__pos:self.__pos+size]
+            self.__pos = self.__pos + len(octets)
+            size = size - len(octets)
+            r.append(octets)
+        return null.join(r)
+
+( frTag, frLongTag, frLength, frLongLength, frValue ) = [x for x in range(5)]
+
+class RecordFramer:
+    """Push-style TLV framing state machine. Finds where top-level
+       records end in substrate fed to it piece by piece, looking at
+       TLV headers only.
+
+       Stream readers, blocking or asynchronous, drive it by reading
+       as many octets as wanted() tells and passing them to frame().
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.__state = frTag
+        self.__depth = 0  # indefinite length values under way
+        self.__firstOctet = 0
+        self.__eoo = 0
+        self.__lengthOctets = 0
+        self.__remaining = 0
+
+    def atRecordStart(self):
+        return self.__state == frTag and not self.__depth
+
+    def wanted(self):
+        """Octets to read for the framer to make progress"""
+        if self.__state == frValue:
+            return self.__remaining
+        if self.__state == frLongLength:
+            return self.__lengthOctets
+        return 1
+
+    def frame(self, octets, pos, end):
+        """Frame octets[pos:end] (indexable as integers), stop past the
+           end of the top-level record under way. Return the position
+           framing stopped at and true if a record ended there"""
+        state = self.__state; depth = self.__depth
+        remaining = self.__remaining
+        complete = 0
+        while 1:
+            if state == frValue:
+                n = end - pos
+                if n > remaining:
+                    n = remaining
+                pos = pos + n
+                remaining = remaining - n
+                if remaining:
+                    break
+                state = frTag
+                if depth and self.__eoo:
+                    depth = depth - 1
+                if not depth:
+                    complete = 1
+                    break
+                continue
+            if pos >= end:
+                break
+            octet = octets[pos]
+            pos = pos + 1
+            if state == frTag:
+                self.__firstOctet = octet
+                if octet&0x1F == 0x1F:
+                    state = frLongTag
+                else:
+                    state = frLength
+            elif state == frLongTag:
+                if not octet&0x80:
+                    state = frLength
+            elif state == frLength:
+                self.__eoo = not self.__firstOctet and not octet
+                if octet == 128:
+                    if not self.__firstOctet&0x20:
+                        self.reset()
+                        raise error.PyAsn1Error(
+                            'Indefinite length in primitive form'
+                            )
+                    depth = depth + 1
+                    state = frTag
+                elif octet < 128:
+                    remaining = octet
+                    state = frValue
+                else:
+                    self.__lengthOctets = octet & 0x7F
+                    remaining = 0
+                    state = frLongLength
+            elif state == frLongLength:
+                remaining = (remaining << 8) | octet
+                self.__lengthOctets = self.__lengthOctets - 1
+                if not self.__lengthOctets:
+                    state = frValue
+        self.__state = state; self.__depth = depth
+        self.__remaining = remaining
+        return pos, complete
+
+    def checkComplete(self):
+        """Complain if substrate ended amid a record"""
+        if self.__depth:
+            raise error.SubstrateUnderrunError(
+                'No EOO seen before substrate ends'
+                )
+        if self.__state != frTag:
+            raise error.SubstrateUnderrunError(
+                '%d-octet short' % self.wanted()
+                )
+
+def readRecord(read, chunks):
+    """Read one complete TLV into chunks, return false on end of stream"""
+    framer = RecordFramer()
+    while 1:
+        octets = read(framer.wanted())
+        if not octets:
+            if framer.atRecordStart():
+                return
+            framer.checkComplete()
+        chunks.append(octets)
+        if framer.frame(intsView(octets), 0, len(octets))[1]:
+            return 1
+
+def decodeOctets(decodeFun, substrate, *args, **options):
+    # Top-level call: decode over a zero-copy view of the caller's
+    # buffer so that nested slicing never copies octets
+    if isinstance(substrate, univ.OctetString):
+        substrate = substrate.asOctets()
+    try:
+        view = octsView(substrate)
+    except TypeError:
+        raise error.PyAsn1Error('Bad octet stream type')
+    plainOctets = isOctetsType(substrate)
+    if options.get('lazy') and not plainOctets:
+        # undecoded components would refer to the caller's (possibly
+        # mutable) buffer for as long as they live, decode off a snapshot
+        view = octsView(view2octs(view))
+    value, view = decodeFun(view, *args, **options)
+    if plainOctets:
+        # plain octets in -- plain octets out
+        if isOctsView(value):
+            value = view2octs(value)
+        if isOctsView(view):
+            view = view2octs(view)
+    return value, view
+
+# Spec-compiled decoding: codecs, tags and component positions get
+# resolved once per ASN.1 spec rather than for every value decoded
+
+def tagOctet(t):
+    """Identifier octet of a low tag number, None for a high one"""
+    if t[2] < 31:
+        return t[0]|t[1]|t[2]
+
+def skipValue(substrate):
+    """Return substrate past the definite length TLV it starts with or
+       None for an indefinite length one"""
+    offset = 1
+    if oct2int(substrate[0])&0x1F == 0x1F:
+        while offset < len(substrate) and oct2int(substrate[offset])&0x80:
+            offset = offset + 1
+        offset = offset + 1
+    if offset >= len(substrate):
+        raise error.SubstrateUnderrunError(
+            'Short octet stream on length decoding'
+            )
+    firstOctet = oct2int(substrate[offset])
+    offset = offset + 1
+    if firstOctet == 128:
+        return
+    if firstOctet < 128:
+        length = firstOctet
+    else:
+        size = firstOctet & 0x7F
+        if offset + size > len(substrate):
+            raise error.SubstrateUnderrunError(
+                '%s<%s' % (size, len(substrate) - offset)
+                )
+        length = 0
+        for char in substrate[offset:offset+size]:
+            length = (length << 8) | oct2int(char)
+        offset = offset + size
+    if offset + length > len(substrate):
+        raise error.SubstrateUnderrunError(
+            '%d-octet short' % (offset + length - len(substrate))
+            )
+    return substrate[offset+length:]
+
+def pickPaths(value, paths, path, values):
+    """Copy components of decoded value named in paths tree into values"""
+    for name, subpaths in paths.items():
+        if name is None:
+            values[path] = value
+            continue
+        if not isinstance(value, univ.SequenceAndSetBase):
+            raise error.PyAsn1Error(
+                'No component %s in %s at %s' %
+                (name, value.__class__.__name__, path)
+                )
+        component = value.getComponentByName(name)
+        if component is None:
+            continue  # absent OPTIONAL or alternative not chosen
+        pickPaths(component, subpaths, path and path + '.' + name or name,
+                  values)
+
+class DecoderPlan:
+    """Decoder bound to an ASN.1 spec, generic decoding by default"""
+    def __init__(self, decodeFun, asn1Spec):
+        self._decodeFun = decodeFun
+        self._asn1Spec = asn1Spec
+
+    def __call__(self, substrate):
+        if not isOctsView(substrate):
+            return decodeOctets(self, substrate)
+        return self.decodeValue(substrate)
+
+    def compileComponents(self, compileFun): pass
+
+    def decodeValue(self, substrate):
+        return self._decodeFun(substrate, self._asn1Spec)
+
+    def decodePaths(self, substrate, paths, path, values):
+        """Decode value, pick components on paths into values"""
+        value, substrate = self.decodeValue(substrate)
+        pickPaths(value, paths, path, values)
+        return substrate
+
+class ValuePlan(DecoderPlan):
+    def __init__(self, decodeFun, asn1Spec, concreteDecoder):
+        DecoderPlan.__init__(self, decodeFun, asn1Spec)
+        self._concreteDecoder = concreteDecoder
+        self._tagSet = asn1Spec.getTagSet()
+        # outermost tag comes first on the wire
+        self._tagOctets = [ tagOctet(t) for t in self._tagSet ]
+        self._tagOctets.reverse()
+
+    def _decodeHeaders(self, substrate):
+        """Skip definite length headers bearing spec tags, return value
+           length and substrate along with the substrate past the TLV.
+           Anything else is left to the generic decoder."""
+        tail = None
+        for t in self._tagOctets:
+            if len(substrate) < 2 or oct2int(substrate[0]) != t:
+                return
+            fullSubstrate = substrate
+            firstOctet = oct2int(substrate[1])
+            if firstOctet < 128:
+                length = firstOctet
+                substrate = substrate[2:]
+            elif firstOctet == 128:
+                return
+            else:
+                size = firstOctet & 0x7F
+                lengthString = substrate[2:size+2]
+                if len(lengthString) != size:
+                    return
+                length = 0
+                for octet in lengthString:
+                    length = (length << 8) | oct2int(octet)
+                substrate = substrate[size+2:]
+            if len(substrate) < length:
+                return
+            if tail is None:
+                tail = substrate[length:]
+            substrate = substrate[:length]
+        return fullSubstrate, substrate, length, tail
+
+    def decodeValue(self, substrate):
+        headers = self._decodeHeaders(substrate)
+        if headers is None:
+            return self._decodeFun(substrate, self._asn1Spec)
+        fullSubstrate, substrate, length, tail = headers
+        value, _ = self._concreteDecoder.valueDecoder(
+            fullSubstrate, substrate, self._asn1Spec, self._tagSet, length,
+            stGetValueDecoder, self._decodeFun, None
+            )
+        return value, tail
+
+class SequencePlan(ValuePlan):
+    """SEQUENCE/SET with component plans keyed by component position
+       and identifier octet"""
+    # no component plans till compiled: all decoded generically
+    _componentPlans = ()
+    def compileComponents(self, compileFun):
+        plans = []
+        idx = 0
+        while idx < len(self._asn1Spec.getComponentType() or ()):
+            componentPlans = {}
+            tagMap = self._concreteDecoder._getComponentTagMap(
+                self._asn1Spec, idx
+                )
+            if tagMap is not None:
+                for tagSet, t in tagMap.getPosMap().items():
+                    if not tagSet:
+                        continue  # untagged ANY, decoded generically
+                    octet = tagOctet(tagSet[-1])
+                    if octet is None:
+                        continue
+                    if octet in componentPlans:
+                        # ambiguous in a single octet
+                        componentPlans[octet] = None
+                        continue
+                    componentPlans[octet] = (
+                        self._concreteDecoder._getComponentPositionByType(
+                            self._asn1Spec, tagSet, idx
+                            ), compileFun(t)
+                        )
+            plans.append(componentPlans)
+            idx = idx + 1
+        self._componentPlans = plans
+
+    def decodeValue(self, substrate):
+        headers = self._decodeHeaders(substrate)
+        if headers is None:
+            return self._decodeFun(substrate, self._asn1Spec)
+        _, head, _, tail = headers
+        r = self._asn1Spec.clone()
+        componentPlans = self._componentPlans
+        idx = 0
+        while head:
+            if idx < len(componentPlans):
+                componentPlan = componentPlans[idx].get(oct2int(head[0]))
+            else:
+                componentPlan = None
+            if componentPlan is None:
+                # unforeseen component, do as generic decoder does
+                asn1Spec = self._concreteDecoder._getComponentTagMap(
+                    self._asn1Spec, idx
+                    )
+                component, head = self._decodeFun(head, asn1Spec)
+                idx = self._concreteDecoder._getComponentPositionByType(
+                    self._asn1Spec, component.getEffectiveTagSet(), idx
+                    )
+                r.setComponentByPosition(idx, component, asn1Spec is None)
+            else:
+                idx, componentPlan = componentPlan
+                component, head = componentPlan.decodeValue(head)
+                r.setComponentByPosition(idx, component, 0)
+            idx = idx + 1
+        r.setDefaultComponents()
+        r.verifySizeSpec()
+        return r, tail
+
+    def decodePaths(self, substrate, paths, path, values):
+        if None in paths:
+            # whole value wanted
+            return DecoderPlan.decodePaths(self, substrate, paths, path, values)
+        headers = self._decodeHeaders(substrate)
+        if headers is None:
+            return DecoderPlan.decodePaths(self, substrate, paths, path, values)
+        _, head, _, tail = headers
+        componentType = self._asn1Spec.getComponentType()
+        wanted = {}
+        for name in paths:
+            wanted[componentType.getPositionByName(name)] = name
+        componentPlans = self._componentPlans
+        idx = 0
+        while head and wanted:
+            if idx < len(componentPlans):
+                componentPlan = componentPlans[idx].get(oct2int(head[0]))
+            else:
+                componentPlan = None
+            if componentPlan is None:
+                # unforeseen component, leave it all to generic decoder
+                return DecoderPlan.decodePaths(
+                    self, substrate, paths, path, values
+                    )
+            idx, componentPlan = componentPlan
+            if idx in wanted:
+                name = wanted[idx]
+                del wanted[idx]
+                head = componentPlan.decodePaths(
+                    head, paths[name], path and path + '.' + name or name,
+                    values
+                    )
+            else:
+                # jump over unwanted component
+                rest = skipValue(head)
+                if rest is None:
+                    _, head = componentPlan.decodeValue(head)
+                else:
+                    head = rest
+            idx = idx + 1
+        for idx, name in wanted.items():
+            component = self._asn1Spec.getDefaultComponentByPosition(idx)
+            if component is not None:
+                pickPaths(component, paths[name],
+                          path and path + '.' + name or name, values)
+        return tail
+
+class SequenceOfPlan(ValuePlan):
+    def compileComponents(self, compileFun):
+        self._componentPlan = compileFun(self._asn1Spec.getComponentType())
+
+    def decodeValue(self, substrate):
+        headers = self._decodeHeaders(substrate)
+        if headers is None:
+            return self._decodeFun(substrate, self._asn1Spec)
+        _, head, _, tail = headers
+        r = self._asn1Spec.clone()
+        decodeValue = self._componentPlan.decodeValue
+        idx = 0
+        while head:
+            component, head = decodeValue(head)
+            r.setComponentByPosition(idx, component, 0)
+            idx = idx + 1
+        r.verifySizeSpec()
+        return r, tail
+
+class ChoicePlan(DecoderPlan):
+    """Untagged CHOICE with alternative plans keyed by identifier octet"""
+    _componentPlans = {}
+    def compileComponents(self, compileFun):
+        plans = {}
+        for tagSet, t in self._asn1Spec.getComponentTagMap().getPosMap().items():
+            if not tagSet:
+                continue  # untagged ANY, decoded generically
+            octet = tagOctet(tagSet[-1])
+            if octet is None:
+                continue
+            if octet in plans:
+                plans[octet] = None
+            else:
+                plans[octet] = compileFun(t)
+        self._componentPlans = plans
+
+    def decodeValue(self, substrate):
+        if substrate:
+            componentPlan = self._componentPlans.get(oct2int(substrate[0]))
+        else:
+            componentPlan = None
+        if componentPlan is None:
+            return self._decodeFun(substrate, self._asn1Spec)
+        component, tail = componentPlan.decodeValue(substrate)
+        r = self._asn1Spec.clone()
+        if isinstance(component, univ.Choice):
+            effectiveTagSet = component.getEffectiveTagSet()
+        else:
+            effectiveTagSet = component.getTagSet()
+        r.setComponentByType(effectiveTagSet, component, 0, 0)
+        return r, tail
+
+class HeaderCache:
+    """Bounded caches of Tag objects keyed by raw identifier octets and
+       of TagSet chains built of them by explicit tagging"""
+    maxSize = 1024
+    def __init__(self, maxSize=None):
+        if maxSize is not None:
+            self.maxSize = maxSize
+        # identifier octets -> (Tag, TagSet)
+        self.__tags = {}
+        # (identifier octets, id(outer TagSet)) -> (outer TagSet, TagSet)
+        self.__chains = {}
+        self.tagHits = self.tagMisses = 0
+        self.chainHits = self.chainMisses = 0
+
+    def decodeTag(self, substrate, tagSet=None):
+        """Decode identifier octets, return TagSet (on top of the given
+           outer one if any) and remaining substrate"""
+        size = 1
+        if oct2int(substrate[0])&0x1F == 0x1F:
+            while 1:
+                if size >= len(substrate):
+                    raise error.SubstrateUnderrunError(
+                        'Short octet stream on long tag decoding'
+                        )
+                size = size + 1
+                if not oct2int(substrate[size-1])&0x80:
+                    break
+        octets = substrate[:size]
+        if isOctsView(octets):
+            octets = view2octs(octets)
+        if octets in self.__tags:
+            self.tagHits = self.tagHits + 1
+            lastTag, lastTagSet = self.__tags[octets]
+        else:
+            self.tagMisses = self.tagMisses + 1
+            t = oct2int(octets[0])
+            tagId = t&0x1F
+            if tagId == 0x1F:
+                tagId = 0
+                for octet in octets[1:]:
+                    tagId = tagId << 7 | (oct2int(octet)&0x7F)
+            lastTag = tag.Tag(
+                tagClass=t&0xC0, tagFormat=t&0x20, tagId=tagId
+                )
+            # base tag not recovered
+            lastTagSet = tag.TagSet((), lastTag)
+            if len(self.__tags) < self.maxSize:
+                self.__tags[octets] = lastTag, lastTagSet
+        if tagSet is None:
+            return lastTagSet, substrate[size:]
+        key = octets, id(tagSet)
+        if key in self.__chains and self.__chains[key][0] is tagSet:
+            self.chainHits = self.chainHits + 1
+            return self.__chains[key][1], substrate[size:]
+        self.chainMisses = self.chainMisses + 1
+        chain = lastTag + tagSet
+        if len(self.__chains) < self.maxSize:
+            self.__chains[key] = tagSet, chain
+        return chain, substrate[size:]
+
+    def getStats(self):
+        return {
+            'tagHits': self.tagHits, 'tagMisses': self.tagMisses,
+            'chainHits': self.chainHits, 'chainMisses': self.chainMisses,
+            'tags': len(self.__tags), 'chains': len(self.__chains)
+            }
+
+    def clear(self):
+        self.__tags.clear()
+        self.__chains.clear()
+        self.tagHits = self.tagMisses = 0
+        self.chainHits = self.chainMisses = 0
+
+class DispatchCache(dict):
+    """Bounded memo of codec resolution keyed by (id(TagSet), id(spec)).
+
+       Values are (TagSet, spec ref, codec, chosen spec ref, next state).
+       TagSets are held on to, specs are referred to weakly so that they
+       can be garbage-collected and their stale entries never match
+       specs reusing their ids.
+    """
+    maxSize = 4096
+    def __init__(self, maxSize=None):
+        dict.__init__(self)
+        if maxSize is not None:
+            self.maxSize = maxSize
+
+    def __reduce__(self):
+        # weak references do not pickle, start afresh
+        return self.__class__, (self.maxSize,)
+
+    def put(self, tagSet, asn1Spec, concreteDecoder, chosenSpec, state):
+        try:
+            specRef = weakref.ref(asn1Spec)
+            if chosenSpec is not asn1Spec:
+                chosenRef = weakref.ref(chosenSpec)
+            else:
+                chosenRef = specRef
+        except TypeError:
+            return  # e.g. plain dict
+        if len(self) >= self.maxSize:
+            self.clear()
+        self[(id(tagSet), id(asn1Spec))] = (
+            tagSet, specRef, concreteDecoder, chosenRef, state
+            )
+
+class PeekCache(dict):
+    """Bounded memo of component specs and TagSets keyed by
+       (id(TagMap), identifier octet) for native mode decoding.
+
+       Values are (TagMap ref, spec, TagSet), TagMaps are referred to
+       weakly so that stale entries never match TagMaps reusing their ids.
+    """
+    maxSize = 4096
+    def __init__(self, maxSize=None):
+        dict.__init__(self)
+        if maxSize is not None:
+            self.maxSize = maxSize
+
+    def __reduce__(self):
+        # weak references do not pickle, start afresh
+        return self.__class__, (self.maxSize,)
+
+    def put(self, key, tagMap, componentSpec, tagSet):
+        if len(self) >= self.maxSize:
+            self.clear()
+        self[key] = weakref.ref(tagMap), componentSpec, tagSet
+
+class PlanCache(dict):
+    """Bounded memo of spec-compiled decoders or encoders keyed by
+       id(spec) and encoding mode if any.
+
+       Values are (spec, plan). Plans hold on to their specs anyway, so
+       entries are checked by spec identity and the whole cache gets
+       dropped once full rather than growing with every spec object
+       ever compiled.
+    """
+    maxSize = 1024
+    def __init__(self, maxSize=None):
+        dict.__init__(self)
+        if maxSize is not None:
+            self.maxSize = maxSize
+
+    def __reduce__(self):
+        # plans are rebuilt on demand
+        return self.__class__, (self.maxSize,)
+
+    def get(self, key, asn1Spec):
+        entry = dict.get(self, key)
+        if entry is not None and entry[0] is asn1Spec:
+            return entry[1]
+
+    def put(self, key, asn1Spec, plan):
+        if len(self) >= self.maxSize:
+            self.clear()
+        self[key] = asn1Spec, plan
+
 class Decoder:
     defaultErrorState = stErrorCondition
 #    defaultErrorState = stDumpRawValue
@@ -601,98 +1542,35 @@ class Decoder:
         self.__tagMap = tagMap
         self.__typeMap = typeMap
         self.__endOfOctetsTagSet = eoo.endOfOctets.getTagSet()
-        # Tag & TagSet objects caches
-        self.__tagCache = {}
+        # TagSet objects by single identifier octet
         self.__tagSetCache = {}
-        
+        self.__headerCache = HeaderCache()
+        self.__dispatchCache = DispatchCache()
+        self.__peekCache = PeekCache()
+        # spec-compiled decoders by spec object
+        self.__plans = PlanCache()
+
+    def __reduce__(self):
+        # caches are rebuilt on demand, do not ship them
+        return self.__class__, (self.__tagMap, self.__typeMap)
+
     def __call__(self, substrate, asn1Spec=None, tagSet=None,
                  length=None, state=stDecodeTag, recursiveFlag=1,
-                 substrateFun=None):
+                 substrateFun=None, **options):
+        if not isOctsView(substrate):
+            return decodeOctets(self, substrate, asn1Spec, tagSet, length,
+                                state, recursiveFlag, substrateFun, **options)
         if debug.logger & debug.flagDecoder:
             debug.logger('decoder called at scope %s with state %d, working with up to %d octets of substrate: %s' % (debug.scope, state, len(substrate), debug.hexdump(substrate)))
         fullSubstrate = substrate
+        outerTagSet = tagSet
         while state != stStop:
             if state == stDecodeTag:
-                # Decode tag
-                if not substrate:
-                    raise error.SubstrateUnderrunError(
-                        'Short octet stream on tag decoding'
-                        )
-                if not isOctetsType(substrate) and \
-                   not isinstance(substrate, univ.OctetString):
-                    raise error.PyAsn1Error('Bad octet stream type')
-                
-                firstOctet = substrate[0]
-                substrate = substrate[1:]
-                if firstOctet in self.__tagCache:
-                    lastTag = self.__tagCache[firstOctet]
-                else:
-                    t = oct2int(firstOctet)
-                    tagClass = t&0xC0
-                    tagFormat = t&0x20
-                    tagId = t&0x1F
-                    if tagId == 0x1F:
-                        tagId = 0
-                        while 1:
-                            if not substrate:
-                                raise error.SubstrateUnderrunError(
-                                    'Short octet stream on long tag decoding'
-                                    )
-                            t = oct2int(substrate[0])
-                            tagId = tagId << 7 | (t&0x7F)
-                            substrate = substrate[1:]
-                            if not t&0x80:
-                                break
-                    lastTag = tag.Tag(
-                        tagClass=tagClass, tagFormat=tagFormat, tagId=tagId
-                        )
-                    if tagId < 31:
-                        # cache short tags
-                        self.__tagCache[firstOctet] = lastTag
-                if tagSet is None:
-                    if firstOctet in self.__tagSetCache:
-                        tagSet = self.__tagSetCache[firstOctet]
-                    else:
-                        # base tag not recovered
-                        tagSet = tag.TagSet((), lastTag)
-                        if firstOctet in self.__tagCache:
-                            self.__tagSetCache[firstOctet] = tagSet
-                else:
-                    tagSet = lastTag + tagSet
+                tagSet, substrate = self._decodeTagSet(substrate, tagSet)
                 state = stDecodeLength
                 debug.logger and debug.logger & debug.flagDecoder and debug.logger('tag decoded into %s, decoding length' % tagSet)
             if state == stDecodeLength:
-                # Decode length
-                if not substrate:
-                    raise error.SubstrateUnderrunError(
-                        'Short octet stream on length decoding'
-                    )
-                firstOctet  = oct2int(substrate[0])
-                if firstOctet == 128:
-                    size = 1
-                    length = -1
-                elif firstOctet < 128:
-                    length, size = firstOctet, 1
-                else:
-                    size = firstOctet & 0x7F
-                    # encoded in size bytes
-                    length = 0
-                    lengthString = substrate[1:size+1]
-                    # missing check on maximum size, which shouldn't be a
-                    # problem, we can handle more than is possible
-                    if len(lengthString) != size:
-                        raise error.SubstrateUnderrunError(
-                            '%s<%s at %s' %
-                            (size, len(lengthString), tagSet)
-                            )
-                    for char in lengthString:
-                        length = (length << 8) | oct2int(char)
-                    size = size + 1
-                substrate = substrate[size:]
-                if length != -1 and len(substrate) < length:
-                    raise error.SubstrateUnderrunError(
-                        '%d-octet short' % (length - len(substrate))
-                        )
+                length, substrate = self._decodeLength(substrate, tagSet)
                 state = stGetValueDecoder
                 debug.logger and debug.logger & debug.flagDecoder and debug.logger('value length decoded into %d, payload substrate is: %s' % (length, debug.hexdump(length == -1 and substrate or substrate[:length])))
             if state == stGetValueDecoder:
@@ -700,102 +1578,23 @@ class Decoder:
                     state = stGetValueDecoderByTag
                 else:
                     state = stGetValueDecoderByAsn1Spec
-            #
-            # There're two ways of creating subtypes in ASN.1 what influences
-            # decoder operation. These methods are:
-            # 1) Either base types used in or no IMPLICIT tagging has been
-            #    applied on subtyping.
-            # 2) Subtype syntax drops base type information (by means of
-            #    IMPLICIT tagging.
-            # The first case allows for complete tag recovery from substrate
-            # while the second one requires original ASN.1 type spec for
-            # decoding.
-            #
-            # In either case a set of tags (tagSet) is coming from substrate
-            # in an incremental, tag-by-tag fashion (this is the case of
-            # EXPLICIT tag which is most basic). Outermost tag comes first
-            # from the wire.
-            #            
             if state == stGetValueDecoderByTag:
-                if tagSet in self.__tagMap:
-                    concreteDecoder = self.__tagMap[tagSet]
+                concreteDecoder = self._chooseDecoderByTag(tagSet)
+                if concreteDecoder is None:
+                    state = stTryAsExplicitTag
                 else:
-                    concreteDecoder = None
-                if concreteDecoder:
                     state = stDecodeValue
-                else:
-                    _k = tagSet[:1]
-                    if _k in self.__tagMap:
-                        concreteDecoder = self.__tagMap[_k]
-                    else:
-                        concreteDecoder = None
-                    if concreteDecoder:
-                        state = stDecodeValue
-                    else:
-                        state = stTryAsExplicitTag
                 if debug.logger and debug.logger & debug.flagDecoder:
                     debug.logger('codec %s chosen by a built-in type, decoding %s' % (concreteDecoder and concreteDecoder.__class__.__name__ or "<none>", state == stDecodeValue and 'value' or 'as explicit tag'))
                     debug.scope.push(concreteDecoder is None and '?' or concreteDecoder.protoComponent.__class__.__name__)
             if state == stGetValueDecoderByAsn1Spec:
-                if isinstance(asn1Spec, (dict, tagmap.TagMap)):
-                    if tagSet in asn1Spec:
-                        __chosenSpec = asn1Spec[tagSet]
-                    else:
-                        __chosenSpec = None
-                    if debug.logger and debug.logger & debug.flagDecoder:
-                        debug.logger('candidate ASN.1 spec is a map of:')
-                        for t, v in asn1Spec.getPosMap().items():
-                            debug.logger('  %s -> %s' % (t, v.__class__.__name__))
-                        if asn1Spec.getNegMap():
-                            debug.logger('but neither of: ')
-                            for t, v in asn1Spec.getNegMap().items():
-                                debug.logger('  %s -> %s' % (t, v.__class__.__name__))
-                        debug.logger('new candidate ASN.1 spec is %s, chosen by %s' % (__chosenSpec is None and '<none>' or __chosenSpec.prettyPrintType(), tagSet))
-                else:
-                    __chosenSpec = asn1Spec
-                    debug.logger and debug.logger & debug.flagDecoder and debug.logger('candidate ASN.1 spec is %s' % asn1Spec.__class__.__name__)
-                if __chosenSpec is not None and (
-                       tagSet == __chosenSpec.getTagSet() or \
-                       tagSet in __chosenSpec.getTagMap()
-                       ):
-                    # use base type for codec lookup to recover untagged types
-                    baseTagSet = __chosenSpec.baseTagSet
-                    if __chosenSpec.typeId is not None and \
-                           __chosenSpec.typeId in self.__typeMap:
-                        # ambiguous type
-                        concreteDecoder = self.__typeMap[__chosenSpec.typeId]
-                        debug.logger and debug.logger & debug.flagDecoder and debug.logger('value decoder chosen for an ambiguous type by type ID %s' % (__chosenSpec.typeId,))
-                    elif baseTagSet in self.__tagMap:
-                        # base type or tagged subtype
-                        concreteDecoder = self.__tagMap[baseTagSet]
-                        debug.logger and debug.logger & debug.flagDecoder and debug.logger('value decoder chosen by base %s' % (baseTagSet,))
-                    else:
-                        concreteDecoder = None
-                    if concreteDecoder:
-                        asn1Spec = __chosenSpec
-                        state = stDecodeValue
-                    else:
-                        state = stTryAsExplicitTag
-                elif tagSet == self.__endOfOctetsTagSet:
-                    concreteDecoder = self.__tagMap[tagSet]
-                    state = stDecodeValue
-                    debug.logger and debug.logger & debug.flagDecoder and debug.logger('end-of-octets found')
-                else:
-                    concreteDecoder = None
-                    state = stTryAsExplicitTag
+                concreteDecoder, asn1Spec, state = \
+                    self._chooseDecoderByAsn1Spec(tagSet, asn1Spec)
                 if debug.logger and debug.logger & debug.flagDecoder:
                     debug.logger('codec %s chosen by ASN.1 spec, decoding %s' % (state == stDecodeValue and concreteDecoder.__class__.__name__ or "<none>", state == stDecodeValue and 'value' or 'as explicit tag'))
-                    debug.scope.push(__chosenSpec is None and '?' or __chosenSpec.__class__.__name__)
+                    debug.scope.push(state == stDecodeValue and asn1Spec.__class__.__name__ or '?')
             if state == stTryAsExplicitTag:
-                if tagSet and \
-                       tagSet[0][1] == tag.tagFormatConstructed and \
-                       tagSet[0][0] != tag.tagClassUniversal:
-                    # Assume explicit tagging
-                    concreteDecoder = explicitTagDecoder
-                    state = stDecodeValue
-                else:                    
-                    concreteDecoder = None
-                    state = self.defaultErrorState
+                concreteDecoder, state = self._chooseExplicitTagDecoder(tagSet)
                 debug.logger and debug.logger & debug.flagDecoder and debug.logger('codec %s chosen, decoding %s' % (concreteDecoder and concreteDecoder.__class__.__name__ or "<none>", state == stDecodeValue and 'value' or 'as failure'))
             if state == stDumpRawValue:
                 concreteDecoder = self.defaultRawDecoder
@@ -807,15 +1606,26 @@ class Decoder:
                 if length == -1:  # indef length
                     value, substrate = concreteDecoder.indefLenValueDecoder(
                         fullSubstrate, substrate, asn1Spec, tagSet, length,
-                        stGetValueDecoder, self, substrateFun
+                        stGetValueDecoder, self, substrateFun, **options
                         )
+                elif options.get('deferred') and \
+                         concreteDecoder.supportLazyMode and not substrateFun:
+                    # skip over value octets, decode them on first access
+                    lazyOptions = options.copy()
+                    del lazyOptions['deferred']
+                    value = base.LazyComponent(
+                        asn1Spec is None and tagSet or asn1Spec.getTagSet(),
+                        self, fullSubstrate[:len(fullSubstrate)-len(substrate)+length],
+                        asn1Spec, outerTagSet, **lazyOptions
+                        )
+                    substrate = substrate[length:]
                 else:
                     value, substrate = concreteDecoder.valueDecoder(
                         fullSubstrate, substrate, asn1Spec, tagSet, length,
-                        stGetValueDecoder, self, substrateFun
+                        stGetValueDecoder, self, substrateFun, **options
                         )
                 state = stStop
-                debug.logger and debug.logger & debug.flagDecoder and debug.logger('codec %s yields type %s, value:\n%s\n...remaining substrate is: %s' % (concreteDecoder.__class__.__name__, value.__class__.__name__, value.prettyPrint(), substrate and debug.hexdump(substrate) or '<none>'))
+                debug.logger and debug.logger & debug.flagDecoder and debug.logger('codec %s yields type %s, value:\n%s\n...remaining substrate is: %s' % (concreteDecoder.__class__.__name__, value.__class__.__name__, hasattr(value, 'prettyPrint') and value.prettyPrint() or repr(value), substrate and debug.hexdump(substrate) or '<none>'))
             if state == stErrorCondition:
                 raise error.PyAsn1Error(
                     '%s not in asn1Spec: %s' % (tagSet, asn1Spec)
@@ -824,8 +1634,586 @@ class Decoder:
             debug.scope.pop()
             debug.logger('decoder left scope %s, call completed' % debug.scope)
         return value, substrate
+
+    # Decoding states shared by recursive and iterative engines
+
+    def _decodeTagSet(self, substrate, tagSet=None):
+        """Return TagSet (on top of the given outer one if any) decoded
+           off substrate and the substrate past identifier octets"""
+        if not substrate:
+            raise error.SubstrateUnderrunError(
+                'Short octet stream on tag decoding'
+                )
+        if tagSet is not None:
+            return self.__headerCache.decodeTag(substrate, tagSet)
+        firstOctet = substrate[0]
+        if firstOctet in self.__tagSetCache:
+            return self.__tagSetCache[firstOctet], substrate[1:]
+        tagSet, substrate = self.__headerCache.decodeTag(substrate)
+        if oct2int(firstOctet)&0x1F != 0x1F:
+            # cache short tags
+            self.__tagSetCache[firstOctet] = tagSet
+        return tagSet, substrate
+
+    def _decodeLength(self, substrate, tagSet):
+        """Return value length, -1 if indefinite, and the substrate past
+           length octets"""
+        if not substrate:
+            raise error.SubstrateUnderrunError(
+                'Short octet stream on length decoding'
+            )
+        firstOctet  = oct2int(substrate[0])
+        if firstOctet == 128:
+            size = 1
+            length = -1
+        elif firstOctet < 128:
+            length, size = firstOctet, 1
+        else:
+            size = firstOctet & 0x7F
+            # encoded in size bytes
+            length = 0
+            lengthString = substrate[1:size+1]
+            # missing check on maximum size, which shouldn't be a
+            # problem, we can handle more than is possible
+            if len(lengthString) != size:
+                raise error.SubstrateUnderrunError(
+                    '%s<%s at %s' %
+                    (size, len(lengthString), tagSet)
+                    )
+            for char in lengthString:
+                length = (length << 8) | oct2int(char)
+            size = size + 1
+        substrate = substrate[size:]
+        if length != -1 and len(substrate) < length:
+            raise error.SubstrateUnderrunError(
+                '%d-octet short' % (length - len(substrate))
+                )
+        return length, substrate
+
+    #
+    # There're two ways of creating subtypes in ASN.1 what influences
+    # decoder operation. These methods are:
+    # 1) Either base types used in or no IMPLICIT tagging has been
+    #    applied on subtyping.
+    # 2) Subtype syntax drops base type information (by means of
+    #    IMPLICIT tagging.
+    # The first case allows for complete tag recovery from substrate
+    # while the second one requires original ASN.1 type spec for
+    # decoding.
+    #
+    # In either case a set of tags (tagSet) is coming from substrate
+    # in an incremental, tag-by-tag fashion (this is the case of
+    # EXPLICIT tag which is most basic). Outermost tag comes first
+    # from the wire.
+    #
+
+    def _chooseDecoderByTag(self, tagSet):
+        """Return codec of a built-in type by its tags, None if unknown"""
+        if tagSet in self.__tagMap:
+            return self.__tagMap[tagSet]
+        _k = tagSet[:1]
+        if _k in self.__tagMap:
+            return self.__tagMap[_k]
+
+    def _chooseDecoderByAsn1Spec(self, tagSet, asn1Spec):
+        """Return codec, ASN.1 spec to decode with and next state for
+           tags found in substrate and ASN.1 spec (or map of specs)"""
+        dispatchEntry = self.__dispatchCache.get((id(tagSet), id(asn1Spec)))
+        if dispatchEntry is not None:
+            _, specRef, concreteDecoder, chosenRef, state = dispatchEntry
+            if specRef() is asn1Spec:
+                # resolved for this tag and spec before
+                debug.logger and debug.logger & debug.flagDecoder and debug.logger('codec resolution for %s found in cache' % (tagSet,))
+                return concreteDecoder, chosenRef(), state
+        concreteDecoder, chosenSpec, state = self._resolveAsn1Spec(
+            tagSet, asn1Spec
+            )
+        self.__dispatchCache.put(
+            tagSet, asn1Spec, concreteDecoder, chosenSpec, state
+            )
+        return concreteDecoder, chosenSpec, state
+
+    def _resolveAsn1Spec(self, tagSet, asn1Spec):
+        if isinstance(asn1Spec, (dict, tagmap.TagMap)):
+            if tagSet in asn1Spec:
+                chosenSpec = asn1Spec[tagSet]
+            else:
+                chosenSpec = None
+            if debug.logger and debug.logger & debug.flagDecoder:
+                debug.logger('candidate ASN.1 spec is a map of:')
+                for t, v in asn1Spec.getPosMap().items():
+                    debug.logger('  %s -> %s' % (t, v.__class__.__name__))
+                if asn1Spec.getNegMap():
+                    debug.logger('but neither of: ')
+                    for t, v in asn1Spec.getNegMap().items():
+                        debug.logger('  %s -> %s' % (t, v.__class__.__name__))
+                debug.logger('new candidate ASN.1 spec is %s, chosen by %s' % (chosenSpec is None and '<none>' or chosenSpec.prettyPrintType(), tagSet))
+        else:
+            chosenSpec = asn1Spec
+            debug.logger and debug.logger & debug.flagDecoder and debug.logger('candidate ASN.1 spec is %s' % asn1Spec.__class__.__name__)
+        if chosenSpec is not None and (
+               tagSet == chosenSpec.getTagSet() or \
+               tagSet in chosenSpec.getTagMap()
+               ):
+            # use base type for codec lookup to recover untagged types
+            baseTagSet = chosenSpec.baseTagSet
+            if chosenSpec.typeId is not None and \
+                   chosenSpec.typeId in self.__typeMap:
+                # ambiguous type
+                debug.logger and debug.logger & debug.flagDecoder and debug.logger('value decoder chosen for an ambiguous type by type ID %s' % (chosenSpec.typeId,))
+                return self.__typeMap[chosenSpec.typeId], chosenSpec, \
+                       stDecodeValue
+            if baseTagSet in self.__tagMap:
+                # base type or tagged subtype
+                debug.logger and debug.logger & debug.flagDecoder and debug.logger('value decoder chosen by base %s' % (baseTagSet,))
+                return self.__tagMap[baseTagSet], chosenSpec, stDecodeValue
+        elif tagSet == self.__endOfOctetsTagSet:
+            debug.logger and debug.logger & debug.flagDecoder and debug.logger('end-of-octets found')
+            return self.__tagMap[tagSet], asn1Spec, stDecodeValue
+        return None, asn1Spec, stTryAsExplicitTag
+
+    def _chooseExplicitTagDecoder(self, tagSet):
+        """Return explicit tag codec and next state if tags look like
+           explicit ones, no codec and failure state otherwise"""
+        if tagSet and \
+               tagSet[0][1] == tag.tagFormatConstructed and \
+               tagSet[0][0] != tag.tagClassUniversal:
+            # Assume explicit tagging
+            return explicitTagDecoder, stDecodeValue
+        return None, self.defaultErrorState
+
+    def getHeaderCache(self): return self.__headerCache
+    def getDispatchCache(self): return self.__dispatchCache
+    def getPeekCache(self): return self.__peekCache
+    def getPlanCache(self): return self.__plans
+
+    def compile(self, asn1Spec):
+        """Return decoder specialized for the given ASN.1 spec object.
+
+           Compiled decoders are cached per spec object and accept
+           substrate only. Values they can not foresee, such as those
+           in indefinite length form, are handed over to this decoder.
+        """
+        plan = self.__plans.get(id(asn1Spec), asn1Spec)
+        if plan is not None:
+            return plan
+        concreteDecoder = None
+        if not isinstance(asn1Spec, (dict, tagmap.TagMap)):
+            if asn1Spec.typeId is not None and \
+                   asn1Spec.typeId in self.__typeMap:
+                concreteDecoder = self.__typeMap[asn1Spec.typeId]
+            elif asn1Spec.baseTagSet in self.__tagMap:
+                concreteDecoder = self.__tagMap[asn1Spec.baseTagSet]
+        if concreteDecoder is None:
+            plan = DecoderPlan(self, asn1Spec)
+        elif not asn1Spec.getTagSet():
+            if isinstance(concreteDecoder, ChoiceDecoder):
+                plan = ChoicePlan(self, asn1Spec)
+            else:
+                plan = DecoderPlan(self, asn1Spec)
+        elif [ t for t in asn1Spec.getTagSet() if tagOctet(t) is None ]:
+            plan = DecoderPlan(self, asn1Spec)
+        elif isinstance(concreteDecoder, SequenceDecoder):
+            plan = SequencePlan(self, asn1Spec, concreteDecoder)
+        elif isinstance(concreteDecoder, SequenceOfDecoder) and \
+                 asn1Spec.getComponentType() is not None:
+            plan = SequenceOfPlan(self, asn1Spec, concreteDecoder)
+        else:
+            plan = ValuePlan(self, asn1Spec, concreteDecoder)
+        # cache ahead of components compilation to let recursive specs in
+        self.__plans.put(id(asn1Spec), asn1Spec, plan)
+        try:
+            plan.compileComponents(self.compile)
+        except error.PyAsn1Error:
+            # e.g. ambiguous components, left to generic decoder
+            debug.logger and debug.logger & debug.flagDecoder and debug.logger('failed to compile %s for %s: %s' % (plan.__class__.__name__, asn1Spec.__class__.__name__, sys.exc_info()[1]))
+            plan = DecoderPlan(self, asn1Spec)
+            self.__plans.put(id(asn1Spec), asn1Spec, plan)
+            return plan
+        debug.logger and debug.logger & debug.flagDecoder and debug.logger('compiled %s for %s' % (plan.__class__.__name__, asn1Spec.__class__.__name__))
+        return plan
+
+    def decodePaths(self, substrate, asn1Spec, paths):
+        """Decode components on dotted paths (e.g. 'tbsCertificate.subject')
+           only, return a dict of path to value along with remaining
+           substrate.
+
+           Components off the paths are jumped over rather than decoded
+           and so not verified. Absent components are left out.
+        """
+        tree = {}
+        for path in paths:
+            node = tree
+            for name in path.split('.'):
+                node = node.setdefault(name, {})
+            node[None] = 1
+        plan = self.compile(asn1Spec)
+        values = {}
+        def decodeValue(substrate):
+            return values, plan.decodePaths(substrate, tree, '', values)
+        return decodeOctets(decodeValue, substrate)
+
+    def decodeStream(self, stream, asn1Spec=None):
+        """Decode top-level values one by one off a binary file object
+           or an iterable of octet chunks"""
+        if hasattr(stream, 'read'):
+            read = stream.read
+        else:
+            read = ChunksReader(stream).read
+        while 1:
+            chunks = []
+            if not readRecord(read, chunks):
+                return
+            debug.logger and debug.logger & debug.flagDecoder and debug.logger('read %d-octet record off stream' % sum([ len(x) for x in chunks ]))
+            value, _ = self(null.join(chunks), asn1Spec)
+            yield value
+
+    def decodeMany(self, substrate, asn1Spec=None, streaming=False,
+                   **options):
+        """Decode back-to-back top-level values off a single buffer.
+
+           Returns a list of values or, in streaming mode, a generator
+           yielding them one by one.
+        """
+        values = self.__decodeValues(substrate, asn1Spec, options)
+        if streaming:
+            return values
+        return list(values)
+
+    def __decodeValues(self, substrate, asn1Spec, options):
+        if isinstance(substrate, univ.OctetString):
+            substrate = substrate.asOctets()
+        plainOctets = isOctetsType(substrate)
+        try:
+            view = octsView(substrate)
+        except TypeError:
+            raise error.PyAsn1Error('Bad octet stream type')
+        if asn1Spec is None or options:
+            def decodeValue(substrate):
+                return self(substrate, asn1Spec, **options)
+        else:
+            # one spec lookup for the whole batch
+            decodeValue = self.compile(asn1Spec).decodeValue
+        while view:
+            value, view = decodeValue(view)
+            if plainOctets and isOctsView(value):
+                value = view2octs(value)
+            yield value
             
 decode = Decoder(tagMap, typeMap)
+decodeStream = decode.decodeStream
+decodeMany = decode.decodeMany
+decodePaths = decode.decodePaths
+
+# Iterative decoding: constructed values under way are kept on an explicit
+# stack of frames rather than in nested decoder calls
+
+stReturnValue = 10
+
+class DecoderContext:
+    """Decoding state of the TLV at hand"""
+    def __init__(self, substrate, asn1Spec, tagSet, length):
+        self.substrate = self.fullSubstrate = substrate
+        self.asn1Spec = asn1Spec
+        self.tagSet = tagSet
+        self.length = length
+        self.concreteDecoder = None
+        self.value = None
+        self.stack = []
+
+class DecoderFrame:
+    """Constructed value waiting for its components"""
+    def __init__(self, kind, concreteDecoder, value, asn1Spec, tagSet,
+                 length, head, tail):
+        self.kind = kind
+        self.concreteDecoder = concreteDecoder
+        self.value = value
+        self.asn1Spec = asn1Spec
+        self.tagSet = tagSet
+        self.length = length
+        self.head = head  # None in indefinite length mode
+        self.tail = tail
+        self.idx = 0
+        self.componentSpec = None
+        self.componentTypes = None
+
+( fkExplicitTag, fkSequence, fkSequenceOf, fkChoice ) = [x for x in range(4)]
+
+class IterativeDecoder(Decoder):
+    """Decoder with call depth not growing with substrate nesting.
+
+       Yields the same values as Decoder does: codecs of simple types
+       are shared while SEQUENCE/SET (OF), CHOICE and explicit tags are
+       decoded by this engine over its frames stack.
+    """
+    frameKinds = {
+        ExplicitTagDecoder: fkExplicitTag,
+        SequenceDecoder: fkSequence,
+        SetDecoder: fkSequence,
+        SequenceOfDecoder: fkSequenceOf,
+        SetOfDecoder: fkSequenceOf,
+        ChoiceDecoder: fkChoice
+        }
+    def __init__(self, tagMap, typeMap={}):
+        Decoder.__init__(self, tagMap, typeMap)
+        # state handlers by state number
+        self.__handlers = [
+            self._stDecodeTag, self._stDecodeLength, self._stGetValueDecoder,
+            self._stGetValueDecoderByAsn1Spec, self._stGetValueDecoderByTag,
+            self._stTryAsExplicitTag, self._stDecodeValue,
+            self._stDumpRawValue, self._stErrorCondition, None,
+            self._stReturnValue
+            ]
+
+    def __call__(self, substrate, asn1Spec=None, tagSet=None,
+                 length=None, state=stDecodeTag, recursiveFlag=1,
+                 substrateFun=None, **options):
+        if not isOctsView(substrate):
+            return decodeOctets(self, substrate, asn1Spec, tagSet, length,
+                                state, recursiveFlag, substrateFun, **options)
+        if recursiveFlag != 1 or substrateFun or options:
+            return Decoder.__call__(
+                self, substrate, asn1Spec, tagSet, length, state,
+                recursiveFlag, substrateFun, **options
+                )
+        debug.logger and debug.logger & debug.flagDecoder and debug.logger('iterative decoder called with state %d, working with up to %d octets of substrate: %s' % (state, len(substrate), debug.hexdump(substrate)))
+        ctx = DecoderContext(substrate, asn1Spec, tagSet, length)
+        handlers = self.__handlers
+        while state != stStop:
+            state = handlers[state](ctx)
+        return ctx.value, ctx.substrate
+
+    def _stDecodeTag(self, ctx):
+        ctx.tagSet, ctx.substrate = self._decodeTagSet(
+            ctx.substrate, ctx.tagSet
+            )
+        return stDecodeLength
+
+    def _stDecodeLength(self, ctx):
+        ctx.length, ctx.substrate = self._decodeLength(
+            ctx.substrate, ctx.tagSet
+            )
+        return stGetValueDecoder
+
+    def _stGetValueDecoder(self, ctx):
+        if ctx.asn1Spec is None:
+            return stGetValueDecoderByTag
+        else:
+            return stGetValueDecoderByAsn1Spec
+
+    def _stGetValueDecoderByTag(self, ctx):
+        ctx.concreteDecoder = self._chooseDecoderByTag(ctx.tagSet)
+        if ctx.concreteDecoder is None:
+            return stTryAsExplicitTag
+        return stDecodeValue
+
+    def _stGetValueDecoderByAsn1Spec(self, ctx):
+        ctx.concreteDecoder, ctx.asn1Spec, state = \
+            self._chooseDecoderByAsn1Spec(ctx.tagSet, ctx.asn1Spec)
+        return state
+
+    def _stTryAsExplicitTag(self, ctx):
+        ctx.concreteDecoder, state = self._chooseExplicitTagDecoder(
+            ctx.tagSet
+            )
+        return state
+
+    def _stDumpRawValue(self, ctx):
+        ctx.concreteDecoder = self.defaultRawDecoder
+        return stDecodeValue
+
+    def _stErrorCondition(self, ctx):
+        raise error.PyAsn1Error(
+            '%s not in asn1Spec: %s' % (ctx.tagSet, ctx.asn1Spec)
+            )
+
+    def _stDecodeValue(self, ctx):
+        concreteDecoder = ctx.concreteDecoder
+        substrate = ctx.substrate; length = ctx.length
+        kind = self.frameKinds.get(concreteDecoder.__class__)
+        if kind is None:
+            # simple value, decoded in one go
+            if length == -1:
+                ctx.value, ctx.substrate = concreteDecoder.indefLenValueDecoder(
+                    ctx.fullSubstrate, substrate, ctx.asn1Spec, ctx.tagSet,
+                    length, stGetValueDecoder, self, None
+                    )
+            else:
+                ctx.value, ctx.substrate = concreteDecoder.valueDecoder(
+                    ctx.fullSubstrate, substrate, ctx.asn1Spec, ctx.tagSet,
+                    length, stGetValueDecoder, self, None
+                    )
+            return stReturnValue
+        if length == -1:
+            head = tail = None
+        else:
+            head, tail = substrate[:length], substrate[length:]
+            substrate = head
+        if kind == fkExplicitTag:
+            r = None
+        else:
+            r = concreteDecoder._createComponent(ctx.asn1Spec, ctx.tagSet)
+        frame = DecoderFrame(kind, concreteDecoder, r, ctx.asn1Spec,
+                             ctx.tagSet, length, head, tail)
+        ctx.stack.append(frame)
+        if kind == fkSequence:
+            frame.componentTypes = concreteDecoder._getComponentTypes(
+                r, ctx.asn1Spec
+                )
+        if kind == fkExplicitTag:
+            return self._decodeComponent(
+                ctx, substrate, ctx.asn1Spec, ctx.tagSet
+                )
+        if kind == fkChoice:
+            if r.getTagSet() == ctx.tagSet: # explicitly tagged Choice
+                return self._decodeComponent(
+                    ctx, substrate, r.getComponentTagMap()
+                    )
+            else:
+                return self._decodeComponent(
+                    ctx, substrate, r.getComponentTagMap(), ctx.tagSet,
+                    length, stGetValueDecoder
+                    )
+        return self._nextComponent(ctx, frame, substrate)
+
+    def _decodeComponent(self, ctx, substrate, asn1Spec, tagSet=None,
+                         length=None, state=stDecodeTag):
+        ctx.substrate = ctx.fullSubstrate = substrate
+        ctx.asn1Spec = asn1Spec
+        ctx.tagSet = tagSet
+        ctx.length = length
+        return state
+
+    def _nextComponent(self, ctx, frame, substrate):
+        """Decode next SEQUENCE/SET (OF) component or finish the value"""
+        if frame.head is None:
+            if not substrate:
+                raise error.SubstrateUnderrunError(
+                    'No EOO seen before substrate ends'
+                    )
+            if substrate[:2] == eooOctets:
+                return self._finishValue(ctx, frame, substrate[2:])
+        else:
+            frame.head = substrate
+            if not substrate:
+                return self._finishValue(ctx, frame, frame.tail)
+        if frame.kind == fkSequence:
+            frame.componentSpec = frame.concreteDecoder._getComponentTagMap(
+                frame.componentTypes, frame.idx
+                )
+        else:
+            frame.componentSpec = frame.value.getComponentType()
+        return self._decodeComponent(ctx, substrate, frame.componentSpec)
+
+    def _finishValue(self, ctx, frame, substrate):
+        if frame.kind == fkSequence:
+            frame.value.setDefaultComponents()
+        frame.value.verifySizeSpec()
+        ctx.stack.pop()
+        ctx.value = frame.value
+        ctx.substrate = substrate
+        return stReturnValue
+
+    def _stReturnValue(self, ctx):
+        if not ctx.stack:
+            return stStop
+        frame = ctx.stack[-1]
+        component = ctx.value; substrate = ctx.substrate
+        if frame.kind == fkExplicitTag:
+            if frame.head is not None:
+                ctx.substrate = frame.tail
+            elif substrate[:2] == eooOctets:
+                ctx.substrate = substrate[2:]
+            else:
+                raise error.PyAsn1Error('Missing end-of-octets terminator')
+            ctx.stack.pop()
+            return stReturnValue
+        if frame.kind == fkChoice:
+            r = frame.value
+            if frame.head is None and r.getTagSet() == frame.tagSet:
+                # explicitly tagged Choice, eat up EOO marker
+                if substrate[:2] != eooOctets:
+                    raise error.PyAsn1Error('No EOO seen before substrate ends')
+                substrate = substrate[2:]
+            if isinstance(component, univ.Choice):
+                effectiveTagSet = component.getEffectiveTagSet()
+            else:
+                effectiveTagSet = component.getTagSet()
+            r.setComponentByType(effectiveTagSet, component, 0,
+                                 frame.asn1Spec is None)
+            if frame.head is not None:
+                substrate = frame.tail
+            ctx.stack.pop()
+            ctx.value = r
+            ctx.substrate = substrate
+            return stReturnValue
+        r = frame.value
+        if frame.kind == fkSequence:
+            frame.idx = frame.concreteDecoder._getComponentPositionByType(
+                frame.componentTypes, component.getEffectiveTagSet(),
+                frame.idx
+                )
+        r.setComponentByPosition(frame.idx, component,
+                                 frame.componentSpec is None)
+        frame.idx = frame.idx + 1
+        return self._nextComponent(ctx, frame, substrate)
+
+iterativeDecode = IterativeDecoder(tagMap, typeMap)
+
+# Push-style decoding: framing state survives across feed() calls
+
+class IncrementalDecoder:
+    """Accepts substrate in arbitrary pieces, returns complete values.
+
+       TLV headers are framed octet by octet as they arrive while value
+       octets are skipped over in bulk. Framing state persists across
+       feed() calls so already seen octets are never re-scanned, and
+       each record is decoded exactly once, when its last octet is in.
+    """
+    decodeFun = decode
+    def __init__(self, asn1Spec=None):
+        self.__asn1Spec = asn1Spec
+        self.__buffer = bytearray()
+        self.__records = []
+        self.__pos = 0
+        self.__framer = RecordFramer()
+
+    def feed(self, substrate):
+        buffer = self.__buffer
+        buffer.extend(substrate)
+        pos = self.__pos
+        l = len(buffer); recordStart = 0
+        while 1:
+            try:
+                pos, complete = self.__framer.frame(buffer, pos, l)
+            except error.PyAsn1Error:
+                self.__reset()
+                raise
+            if not complete:
+                break
+            self.__records.append(buffer[recordStart:pos])
+            recordStart = pos
+        del buffer[:recordStart]
+        self.__pos = pos - recordStart
+        values = []
+        while self.__records:
+            record = self.__records.pop(0)
+            values.append(self.decodeFun(record, self.__asn1Spec)[0])
+        return values
+
+    def __reset(self):
+        del self.__buffer[:]
+        self.__pos = 0
+        self.__framer.reset()
+
+    def close(self):
+        """Make sure no incomplete value is left behind"""
+        if self.__buffer:
+            size = len(self.__buffer)
+            self.__reset()
+            raise error.SubstrateUnderrunError(
+                '%d-octet incomplete value left' % size
+                )
 
 # XXX
-# non-recursive decoding; return position rather than substrate
+# return position rather than substrate
@@ -1,11 +1,63 @@
 # BER encoder
 from pyasn1.type import base, tag, univ, char, useful
-from pyasn1.codec.ber import eoo
-from pyasn1.compat.octets import int2oct, oct2int, ints2octs, null, str2octs
+from pyasn1.codec.ber import eoo, decoder
+from pyasn1.compat.octets import int2oct, oct2int, ints2octs, null, str2octs, \
+     isOctetsType
+from pyasn1.compat import integer
 from pyasn1 import debug, error
 
 class Error(Exception): pass
 
+# native values of DEFAULT components by component types object
+nativeDefaultsCache = decoder.PlanCache()
+
+def nativeDefaults(componentType):
+    """Return native values of DEFAULT components by name"""
+    defaults = nativeDefaultsCache.get(id(componentType), componentType)
+    if defaults is None:
+        defaults = {}
+        for namedType in componentType:
+            if namedType.isDefaulted:
+                defaults[namedType.getName()] = decoder.nativeValue(
+                    namedType.getType()
+                    )
+        nativeDefaultsCache.put(id(componentType), componentType, defaults)
+    return defaults
+
+def nativeComponents(value, asn1Spec, trusted=0):
+    """Return (name, value, spec) of SEQUENCE/SET dict value components
+       to encode, DEFAULT ones equal to their defaults left out"""
+    componentType = asn1Spec.getComponentType()
+    if componentType is None:
+        raise error.PyAsn1Error(
+            'No component types for %s' % asn1Spec.__class__.__name__
+            )
+    if not trusted:
+        asn1Spec.getSizeSpec()(value)
+    defaults = nativeDefaults(componentType)
+    components = []
+    present = 0
+    for namedType in componentType:
+        name = namedType.getName()
+        if name in value:
+            present = present + 1
+            component = value[name]
+            if not namedType.isDefaulted or defaults[name] != component:
+                components.append((name, component, namedType.getType()))
+        elif not namedType.isOptional and not namedType.isDefaulted:
+            raise error.PyAsn1Error(
+                'Uninitialized component %s at %s' % (name, asn1Spec.__class__.__name__)
+                )
+    if present != len(value):
+        names = [ x.getName() for x in componentType ]
+        raise error.PyAsn1Error(
+            'Unknown components %s at %s' % (
+                [ x for x in value if x not in names ],
+                asn1Spec.__class__.__name__
+                )
+            )
+    return components
+
 class AbstractItemEncoder:
     supportIndefLenMode = 1
     def encodeTag(self, t, isConstructed):
@@ -41,40 +93,196 @@ class AbstractItemEncoder:
     def encodeValue(self, encodeFun, value, defMode, maxChunkSize):
         raise Error('Not implemented')
 
-    def _encodeEndOfOctets(self, encodeFun, defMode):
-        if defMode or not self.supportIndefLenMode:
-            return null
-        else:
-            return encodeFun(eoo.endOfOctets, defMode)
-        
-    def encode(self, encodeFun, value, defMode, maxChunkSize):
+    # Value encoders append their substrate fragments to the shared chunks
+    # list and report its total length. Fragments are joined just once,
+    # by the top-level encoder call.
+
+    def encodeChunks(self, encodeFun, value, defMode, maxChunkSize, chunks):
         substrate, isConstructed = self.encodeValue(
             encodeFun, value, defMode, maxChunkSize
             )
+        chunks.append(substrate)
+        return len(substrate), isConstructed
+
+    # Native value encoders take plain Python values (as native mode
+    # decoder yields) along with their ASN.1 spec. Spec-compiled encoders
+    # write TLV headers around them.
+
+    def encodeNativeChunks(self, encodeFun, value, asn1Spec, defMode,
+                           maxChunkSize, chunks):
+        if not encodeFun.trusted:
+            asn1Spec.getSubtypeSpec()(value)
+        return self.encodeChunks(
+            encodeFun, value, defMode, maxChunkSize, chunks
+            )
+
+    def encodeSegments(self, value, tagOctets, maxChunkSize, chunks):
+        # primitive segments of a long string in constructed form
+        length = 0; pos = 0
+        while pos < len(value):
+            segment = value[pos:pos+maxChunkSize]
+            header = tagOctets + self.encodeLength(len(segment), 1)
+            chunks.append(header)
+            chunks.append(segment)
+            length = length + len(header) + len(segment)
+            pos = pos + maxChunkSize
+        return length
+
+    def encode(self, encodeFun, value, defMode, maxChunkSize, chunks):
+        tagSet = value.getTagSet()
+        if not tagSet:  # untagged value
+            return self.encodeChunks(
+                encodeFun, value, defMode, maxChunkSize, chunks
+                )[0]
+        headerIdx = len(chunks)
+        chunks.append(null)  # header goes here once value length is known
+        length, isConstructed = self.encodeChunks(
+            encodeFun, value, defMode, maxChunkSize, chunks
+            )
+        if not isConstructed:  # primitive form implies definite mode
+            defMode = 1
+        header = self.encodeTag(
+            tagSet[-1], isConstructed
+            ) + self.encodeLength(length, defMode)
+        chunks[headerIdx] = header
+        length = length + len(header)
+        if not defMode and self.supportIndefLenMode:
+            length = length + encodeFun.encodeChunks(
+                eoo.endOfOctets, defMode, maxChunkSize, chunks
+                )
+        return length
+
+    # In-place encoding takes two passes over the value. The first one
+    # computes contents lengths and notes them in the sizes list in TLV
+    # order, the second one writes headers and contents right into the
+    # buffer popping sizes off the (reversed) list.
+
+    def sizeValue(self, encodeFun, value, defMode, maxChunkSize, sizes):
+        # no in-place support: contents get encoded into fragments,
+        # writeValue() copies them into the buffer
+        chunks = []
+        length, isConstructed = self.encodeChunks(
+            encodeFun, value, defMode, maxChunkSize, chunks
+            )
+        sizes.append(chunks)
+        return length, isConstructed
+
+    def writeValue(self, encodeFun, value, defMode, maxChunkSize, sizes,
+                   buffer, offset):
+        for chunk in sizes.pop():
+            buffer[offset:offset+len(chunk)] = chunk
+            offset = offset + len(chunk)
+        return offset
+
+    def size(self, encodeFun, value, defMode, maxChunkSize, sizes):
+        tagSet = value.getTagSet()
+        if not tagSet:  # untagged value
+            return self.sizeValue(
+                encodeFun, value, defMode, maxChunkSize, sizes
+                )[0]
+        sizeIdx = len(sizes)
+        sizes.extend((None, None))  # filled in once value length is known
+        length, isConstructed = self.sizeValue(
+            encodeFun, value, defMode, maxChunkSize, sizes
+            )
+        sizes[sizeIdx] = isConstructed
+        sizes[sizeIdx+1] = length
+        if not isConstructed:  # primitive form implies definite mode
+            defMode = 1
+        if not defMode and self.supportIndefLenMode:
+            headerLength = 3  # indefinite length and EOO octets
+        else:
+            headerLength = len(self.encodeLength(length, 1))
+        tagId = tagSet[-1][2]
+        if tagId < 31:
+            return length + headerLength + 1
+        while tagId:
+            headerLength = headerLength + 1
+            tagId = tagId >> 7
+        return length + headerLength + 1
+
+    def write(self, encodeFun, value, defMode, maxChunkSize, sizes,
+              buffer, offset):
         tagSet = value.getTagSet()
-        if tagSet:
-            if not isConstructed:  # primitive form implies definite mode
-                defMode = 1
-            return self.encodeTag(
-                tagSet[-1], isConstructed
-                ) + self.encodeLength(
-                len(substrate), defMode
-                ) + substrate + self._encodeEndOfOctets(encodeFun, defMode)
+        if not tagSet:  # untagged value
+            return self.writeValue(
+                encodeFun, value, defMode, maxChunkSize, sizes, buffer, offset
+                )
+        isConstructed = sizes.pop()
+        length = sizes.pop()
+        if not isConstructed:  # primitive form implies definite mode
+            defMode = 1
+        tagClass, tagFormat, tagId = tagSet[-1].asTuple()
+        v = tagClass | tagFormat
+        if isConstructed:
+            v = v|tag.tagFormatConstructed
+        if tagId < 31:
+            buffer[offset] = v|tagId
+            offset = offset + 1
+        else:
+            buffer[offset] = v|0x1F
+            end = offset + 1
+            t = tagId
+            while t:
+                end = end + 1
+                t = t >> 7
+            offset = end
+            end = end - 1
+            buffer[end] = tagId&0x7f
+            tagId = tagId >> 7
+            while tagId:
+                end = end - 1
+                buffer[end] = 0x80|(tagId&0x7f)
+                tagId = tagId >> 7
+        indefMode = not defMode and self.supportIndefLenMode
+        if indefMode:
+            buffer[offset] = 0x80
+            offset = offset + 1
+        elif length < 0x80:
+            buffer[offset] = length
+            offset = offset + 1
         else:
-            return substrate  # untagged value
+            header = self.encodeLength(length, 1)
+            buffer[offset:offset+len(header)] = header
+            offset = offset + len(header)
+        offset = self.writeValue(
+            encodeFun, value, defMode, maxChunkSize, sizes, buffer, offset
+            )
+        if indefMode:
+            buffer[offset] = buffer[offset+1] = 0
+            offset = offset + 2
+        return offset
 
 class EndOfOctetsEncoder(AbstractItemEncoder):
     def encodeValue(self, encodeFun, value, defMode, maxChunkSize):
         return null, 0
 
 class ExplicitlyTaggedItemEncoder(AbstractItemEncoder):
-    def encodeValue(self, encodeFun, value, defMode, maxChunkSize):
+    def _stripTag(self, encodeFun, value):
         if isinstance(value, base.AbstractConstructedAsn1Item):
-            value = value.clone(tagSet=value.getTagSet()[:-1],
-                                cloneValueFlag=1)
+            return value.clone(tagSet=value.getTagSet()[:-1],
+                               cloneValueFlag=1)
+        elif encodeFun.trusted:
+            return value.cloneTrusted(tagSet=value.getTagSet()[:-1])
         else:
-            value = value.clone(tagSet=value.getTagSet()[:-1])
-        return encodeFun(value, defMode, maxChunkSize), 1
+            return value.clone(tagSet=value.getTagSet()[:-1])
+
+    def encodeChunks(self, encodeFun, value, defMode, maxChunkSize, chunks):
+        return encodeFun.encodeChunks(
+            self._stripTag(encodeFun, value), defMode, maxChunkSize, chunks
+            ), 1
+
+    def sizeValue(self, encodeFun, value, defMode, maxChunkSize, sizes):
+        return encodeFun.encodeSize(
+            self._stripTag(encodeFun, value), defMode, maxChunkSize, sizes
+            ), 1
+
+    def writeValue(self, encodeFun, value, defMode, maxChunkSize, sizes,
+                   buffer, offset):
+        return encodeFun.encodeWrite(
+            self._stripTag(encodeFun, value), defMode, maxChunkSize, sizes,
+            buffer, offset
+            )
 
 explicitlyTaggedItemEncoder = ExplicitlyTaggedItemEncoder()
 
@@ -88,6 +296,10 @@ class BooleanEncoder(AbstractItemEncoder):
 class IntegerEncoder(AbstractItemEncoder):
     supportIndefLenMode = 0
     supportCompactZero = False
+    # single octet encodings
+    precomputedValues = dict(
+        [ (x, int2oct(x & 0xff)) for x in range(-128, 128) ]
+        )
     def encodeValue(self, encodeFun, value, defMode, maxChunkSize):
         if value == 0:  # shortcut for zero value
             if self.supportCompactZero:
@@ -96,61 +308,144 @@ class IntegerEncoder(AbstractItemEncoder):
             else:
                 # this seems to be a widespread way for encoding zeros
                 return ints2octs((0,)), 0
-        octets = []
         value = int(value) # to save on ops on asn1 type
-        while 1:
-            octets.insert(0, value & 0xff)
-            if value == 0 or value == -1:
-                break
-            value = value >> 8
-        if value == 0 and octets[0] & 0x80:
-            octets.insert(0, 0)
-        while len(octets) > 1 and \
-                  (octets[0] == 0 and octets[1] & 0x80 == 0 or \
-                   octets[0] == 0xff and octets[1] & 0x80 != 0):
-            del octets[0]
-        return ints2octs(octets), 0
+        if value in self.precomputedValues:
+            return self.precomputedValues[value], 0
+        return integer.to_bytes(value, signed=True), 0
 
 class BitStringEncoder(AbstractItemEncoder):
-    def encodeValue(self, encodeFun, value, defMode, maxChunkSize):
+    segmentTagOctets = int2oct(0x03)
+    def encodeChunks(self, encodeFun, value, defMode, maxChunkSize, chunks):
         if not maxChunkSize or len(value) <= maxChunkSize*8:
-            r = {}; l = len(value); p = 0; j = 7
-            while p < l:
-                i, j = divmod(p, 8)
-                r[i] = r.get(i,0) | value[p]<<(7-j)
-                p = p + 1
-            keys = list(r); keys.sort()
-            return int2oct(7-j) + ints2octs([r[k] for k in keys]), 0
+            substrate = int2oct(-len(value) & 7) + value.asOctets()
+            chunks.append(substrate)
+            return len(substrate), 0
         else:
-            pos = 0; substrate = null
+            pos = 0; length = 0
             while 1:
                 # count in octets
                 v = value.clone(value[pos*8:pos*8+maxChunkSize*8])
                 if not v:
                     break
-                substrate = substrate + encodeFun(v, defMode, maxChunkSize)
+                length = length + encodeFun.encodeChunks(
+                    v, defMode, maxChunkSize, chunks
+                    )
                 pos = pos + maxChunkSize
-            return substrate, 1
+            return length, 1
+
+    def sizeValue(self, encodeFun, value, defMode, maxChunkSize, sizes):
+        if not maxChunkSize or len(value) <= maxChunkSize*8:
+            return len(value.asOctets()) + 1, 0
+        return AbstractItemEncoder.sizeValue(
+            self, encodeFun, value, defMode, maxChunkSize, sizes
+            )
+
+    def writeValue(self, encodeFun, value, defMode, maxChunkSize, sizes,
+                   buffer, offset):
+        if not maxChunkSize or len(value) <= maxChunkSize*8:
+            octets = value.asOctets()
+            buffer[offset] = -len(value) & 7
+            offset = offset + 1
+            buffer[offset:offset+len(octets)] = octets
+            return offset + len(octets)
+        return AbstractItemEncoder.writeValue(
+            self, encodeFun, value, defMode, maxChunkSize, sizes, buffer, offset
+            )
+
+    def encodeNativeChunks(self, encodeFun, value, asn1Spec, defMode,
+                           maxChunkSize, chunks):
+        if not isinstance(value, univ.BitStringValue):
+            value = univ.packBits(value)
+        if not encodeFun.trusted:
+            asn1Spec.getSubtypeSpec()(value)
+        unusedBits = int2oct(value.getUnusedBits())
+        if not maxChunkSize or len(value) <= maxChunkSize*8:
+            chunks.append(unusedBits)
+            chunks.append(value.asOctets())
+            return len(value.asOctets()) + 1, 0
+        octets = value.asOctets()
+        length = 0; pos = 0
+        while pos < len(octets):
+            segment = octets[pos:pos+maxChunkSize]
+            pos = pos + maxChunkSize
+            if pos < len(octets):
+                segment = int2oct(0) + segment
+            else:
+                segment = unusedBits + segment
+            length = length + self.encodeSegments(
+                segment, self.segmentTagOctets, len(segment), chunks
+                )
+        return length, 1
 
 class OctetStringEncoder(AbstractItemEncoder):
-    def encodeValue(self, encodeFun, value, defMode, maxChunkSize):
+    segmentTagOctets = int2oct(0x04)
+    def encodeChunks(self, encodeFun, value, defMode, maxChunkSize, chunks):
         if not maxChunkSize or len(value) <= maxChunkSize:
-            return value.asOctets(), 0
+            substrate = value.asOctets()
+            chunks.append(substrate)
+            return len(substrate), 0
         else:
-            pos = 0; substrate = null
+            pos = 0; length = 0
             while 1:
                 v = value.clone(value[pos:pos+maxChunkSize])
                 if not v:
                     break
-                substrate = substrate + encodeFun(v, defMode, maxChunkSize)
+                length = length + encodeFun.encodeChunks(
+                    v, defMode, maxChunkSize, chunks
+                    )
                 pos = pos + maxChunkSize
-            return substrate, 1
+            return length, 1
+
+    def sizeValue(self, encodeFun, value, defMode, maxChunkSize, sizes):
+        if not maxChunkSize or len(value) <= maxChunkSize:
+            return len(value.asOctets()), 0
+        return AbstractItemEncoder.sizeValue(
+            self, encodeFun, value, defMode, maxChunkSize, sizes
+            )
+
+    def writeValue(self, encodeFun, value, defMode, maxChunkSize, sizes,
+                   buffer, offset):
+        if not maxChunkSize or len(value) <= maxChunkSize:
+            octets = value.asOctets()
+            buffer[offset:offset+len(octets)] = octets
+            return offset + len(octets)
+        return AbstractItemEncoder.writeValue(
+            self, encodeFun, value, defMode, maxChunkSize, sizes, buffer, offset
+            )
+
+    def encodeNativeChunks(self, encodeFun, value, asn1Spec, defMode,
+                           maxChunkSize, chunks):
+        if not encodeFun.trusted:
+            if not isOctetsType(value):
+                raise error.PyAsn1Error(
+                    'Octets expected for %s, got %r' % (asn1Spec.__class__.__name__, value)
+                    )
+            asn1Spec.getSubtypeSpec()(value)
+        if not maxChunkSize or len(value) <= maxChunkSize:
+            chunks.append(value)
+            return len(value), 0
+        return self.encodeSegments(
+            value, self.segmentTagOctets, maxChunkSize, chunks
+            ), 1
 
 class NullEncoder(AbstractItemEncoder):
     supportIndefLenMode = 0
     def encodeValue(self, encodeFun, value, defMode, maxChunkSize):
         return null, 0
 
+    def sizeValue(self, encodeFun, value, defMode, maxChunkSize, sizes):
+        return 0, 0
+
+    def writeValue(self, encodeFun, value, defMode, maxChunkSize, sizes,
+                   buffer, offset):
+        return offset
+
+    def encodeNativeChunks(self, encodeFun, value, asn1Spec, defMode,
+                           maxChunkSize, chunks):
+        if value is not None and not encodeFun.trusted:
+            raise error.PyAsn1Error('None expected for Null, got %r' % (value,))
+        return 0, 0
+
 class ObjectIdentifierEncoder(AbstractItemEncoder):
     supportIndefLenMode = 0
     precomputedValues = {
@@ -158,7 +453,18 @@ class ObjectIdentifierEncoder(AbstractItemEncoder):
         (1, 3, 6, 1, 4): (43, 6, 1, 4)
     }
     def encodeValue(self, encodeFun, value, defMode, maxChunkSize):    
-        oid = value.asTuple()
+        return self.encodeArcs(value.asTuple()), 0
+
+    def encodeNativeChunks(self, encodeFun, value, asn1Spec, defMode,
+                           maxChunkSize, chunks):
+        if not encodeFun.trusted:
+            asn1Spec.getSubtypeSpec()(value)
+        substrate = self.encodeArcs(value)
+        chunks.append(substrate)
+        return len(substrate), 0
+
+    def encodeArcs(self, value):
+        oid = tuple(value)
         if oid[:5] in self.precomputedValues:
             octets = self.precomputedValues[oid[:5]]
             oid = oid[5:]
@@ -199,7 +505,7 @@ class ObjectIdentifierEncoder(AbstractItemEncoder):
                 # Add packed Sub-Object ID to resulted Object ID
                 octets += res
 
-        return ints2octs(octets), 0
+        return ints2octs(octets)
 
 class RealEncoder(AbstractItemEncoder):
     supportIndefLenMode = 0
@@ -248,6 +554,12 @@ class RealEncoder(AbstractItemEncoder):
                 encbase = base[i]
         return sign, m, encbase, e
 
+    def encodeNativeChunks(self, encodeFun, value, asn1Spec, defMode,
+                           maxChunkSize, chunks):
+        return self.encodeChunks(
+            encodeFun, asn1Spec.clone(value), defMode, maxChunkSize, chunks
+            )
+
     def encodeValue(self, encodeFun, value, defMode, maxChunkSize):
         if value.isPlusInfinity():
             return int2oct(0x40), 0
@@ -285,17 +597,7 @@ class RealEncoder(AbstractItemEncoder):
             if sf > 3:
                 raise error.PyAsn1Error('Scale factor overflow') # bug if raised
             fo |= sf << 2
-            eo = null
-            if e == 0 or e == -1:
-                eo = int2oct(e&0xff)
-            else: 
-                while e not in (0, -1):
-                    eo = int2oct(e&0xff) + eo
-                    e >>= 8
-                if e == 0 and eo and oct2int(eo[0]) & 0x80:
-                    eo = int2oct(0) + eo
-                if e == -1 and eo and not (oct2int(eo[0]) & 0x80):
-                    eo = int2oct(0xff) + eo
+            eo = integer.to_bytes(e, signed=True)
             n = len(eo)
             if n > 0xff:
                 raise error.PyAsn1Error('Real exponent overflow')
@@ -308,50 +610,173 @@ class RealEncoder(AbstractItemEncoder):
             else:
                 fo |= 3
                 eo = int2oct(n&0xff) + eo
-            po = null
-            while m:
-                po = int2oct(m&0xff) + po
-                m >>= 8
+            po = integer.to_bytes(m)
             substrate = int2oct(fo) + eo + po
             return substrate, 0
         else:
             raise error.PyAsn1Error('Prohibited Real base %s' % b)
 
 class SequenceEncoder(AbstractItemEncoder):
-    def encodeValue(self, encodeFun, value, defMode, maxChunkSize):
+    def _getComponents(self, value):
+        # present components, DEFAULT ones equal to their defaults left out
+        components = []
+        idx = 0; l = len(value)
+        while idx < l:
+            component = value[idx]
+            if component is not None:
+                defaultComponent = value.getDefaultComponentByPosition(idx)
+                if defaultComponent is None or defaultComponent != component:
+                    components.append(component)
+            idx = idx + 1
+        return components
+
+    def sizeValue(self, encodeFun, value, defMode, maxChunkSize, sizes):
         value.setDefaultComponents()
-        value.verifySizeSpec()
-        substrate = null; idx = len(value)
-        while idx > 0:
-            idx = idx - 1
-            if value[idx] is None:  # Optional component
+        if not encodeFun.trusted:
+            value.verifySizeSpec()
+        length = 0
+        for component in self._getComponents(value):
+            length = length + encodeFun.encodeSize(
+                component, defMode, maxChunkSize, sizes
+                )
+        return length, 1
+
+    def writeValue(self, encodeFun, value, defMode, maxChunkSize, sizes,
+                   buffer, offset):
+        for component in self._getComponents(value):
+            offset = encodeFun.encodeWrite(
+                component, defMode, maxChunkSize, sizes, buffer, offset
+                )
+        return offset
+
+    def encodeChunks(self, encodeFun, value, defMode, maxChunkSize, chunks):
+        value.setDefaultComponents()
+        if not encodeFun.trusted:
+            value.verifySizeSpec()
+        length = 0; idx = 0; l = len(value)
+        while idx < l:
+            component = value[idx]
+            idx = idx + 1
+            if component is None:  # Optional component
                 continue
-            component = value.getDefaultComponentByPosition(idx)
-            if component is not None and component == value[idx]:
+            defaultComponent = value.getDefaultComponentByPosition(idx-1)
+            if defaultComponent is not None and defaultComponent == component:
                 continue
-            substrate = encodeFun(
-                value[idx], defMode, maxChunkSize
-                ) + substrate
-        return substrate, 1
+            length = length + encodeFun.encodeChunks(
+                component, defMode, maxChunkSize, chunks
+                )
+        return length, 1
+
+    def encodeNativeChunks(self, encodeFun, value, asn1Spec, defMode,
+                           maxChunkSize, chunks):
+        length = 0
+        for name, component, componentSpec in nativeComponents(
+                value, asn1Spec, encodeFun.trusted
+                ):
+            length = length + encodeFun.encodeNativeChunks(
+                component, componentSpec, defMode, maxChunkSize, chunks
+                )
+        return length, 1
 
 class SequenceOfEncoder(AbstractItemEncoder):
-    def encodeValue(self, encodeFun, value, defMode, maxChunkSize):
-        value.verifySizeSpec()
-        substrate = null; idx = len(value)
-        while idx > 0:
-            idx = idx - 1
-            substrate = encodeFun(
-                value[idx], defMode, maxChunkSize
-                ) + substrate
-        return substrate, 1
+    def encodeChunks(self, encodeFun, value, defMode, maxChunkSize, chunks):
+        if not encodeFun.trusted:
+            value.verifySizeSpec()
+        length = 0; idx = 0; l = len(value)
+        while idx < l:
+            length = length + encodeFun.encodeChunks(
+                value[idx], defMode, maxChunkSize, chunks
+                )
+            idx = idx + 1
+        return length, 1
+
+    def sizeValue(self, encodeFun, value, defMode, maxChunkSize, sizes):
+        if not encodeFun.trusted:
+            value.verifySizeSpec()
+        length = 0; idx = 0; l = len(value)
+        while idx < l:
+            length = length + encodeFun.encodeSize(
+                value[idx], defMode, maxChunkSize, sizes
+                )
+            idx = idx + 1
+        return length, 1
+
+    def writeValue(self, encodeFun, value, defMode, maxChunkSize, sizes,
+                   buffer, offset):
+        idx = 0; l = len(value)
+        while idx < l:
+            offset = encodeFun.encodeWrite(
+                value[idx], defMode, maxChunkSize, sizes, buffer, offset
+                )
+            idx = idx + 1
+        return offset
+
+    def encodeNativeChunks(self, encodeFun, value, asn1Spec, defMode,
+                           maxChunkSize, chunks):
+        componentSpec = asn1Spec.getComponentType()
+        if componentSpec is None:
+            raise error.PyAsn1Error(
+                'No component type for %s' % asn1Spec.__class__.__name__
+                )
+        if not encodeFun.trusted:
+            asn1Spec.getSizeSpec()(value)
+        length = 0
+        for component in value:
+            length = length + encodeFun.encodeNativeChunks(
+                component, componentSpec, defMode, maxChunkSize, chunks
+                )
+        return length, 1
 
 class ChoiceEncoder(AbstractItemEncoder):
-    def encodeValue(self, encodeFun, value, defMode, maxChunkSize):
-        return encodeFun(value.getComponent(), defMode, maxChunkSize), 1
+    def encodeChunks(self, encodeFun, value, defMode, maxChunkSize, chunks):
+        return encodeFun.encodeChunks(
+            value.getComponent(), defMode, maxChunkSize, chunks
+            ), 1
+
+    def sizeValue(self, encodeFun, value, defMode, maxChunkSize, sizes):
+        return encodeFun.encodeSize(
+            value.getComponent(), defMode, maxChunkSize, sizes
+            ), 1
+
+    def writeValue(self, encodeFun, value, defMode, maxChunkSize, sizes,
+                   buffer, offset):
+        return encodeFun.encodeWrite(
+            value.getComponent(), defMode, maxChunkSize, sizes, buffer, offset
+            )
+
+    def encodeNativeChunks(self, encodeFun, value, asn1Spec, defMode,
+                           maxChunkSize, chunks):
+        name, component = value
+        componentType = asn1Spec.getComponentType()
+        return encodeFun.encodeNativeChunks(
+            component,
+            componentType.getTypeByPosition(
+                componentType.getPositionByName(name)
+                ),
+            defMode, maxChunkSize, chunks
+            ), 1
 
 class AnyEncoder(OctetStringEncoder):
-    def encodeValue(self, encodeFun, value, defMode, maxChunkSize):
-        return value.asOctets(), defMode == 0
+    def encodeChunks(self, encodeFun, value, defMode, maxChunkSize, chunks):
+        substrate = value.asOctets()
+        chunks.append(substrate)
+        return len(substrate), defMode == 0
+
+    def sizeValue(self, encodeFun, value, defMode, maxChunkSize, sizes):
+        return len(value.asOctets()), defMode == 0
+
+    def writeValue(self, encodeFun, value, defMode, maxChunkSize, sizes,
+                   buffer, offset):
+        octets = value.asOctets()
+        buffer[offset:offset+len(octets)] = octets
+        return offset + len(octets)
+
+    def encodeNativeChunks(self, encodeFun, value, asn1Spec, defMode,
+                           maxChunkSize, chunks):
+        if not isOctetsType(value) and not encodeFun.trusted:
+            raise error.PyAsn1Error('Octets expected for Any, got %r' % (value,))
+        chunks.append(value)
+        return len(value), defMode == 0
 
 tagMap = {
     eoo.endOfOctets.tagSet: EndOfOctetsEncoder(),
@@ -395,13 +820,402 @@ typeMap = {
     univ.Any.typeId: AnyEncoder()
     }
 
+# Spec-compiled encoding: codecs, tag octets and DEFAULT values get
+# resolved once per ASN.1 spec rather than for every value encoded
+
+eooOctets = ints2octs((0, 0))
+indefLengthOctets = int2oct(0x80)
+shortLengthOctets = [ int2oct(x) for x in range(0x80) ]
+
+class EncoderPlan:
+    """Encoder bound to an ASN.1 spec, generic encoding by default"""
+    def __init__(self, encodeFun, asn1Spec, defMode, maxChunkSize):
+        self._encodeFun = encodeFun
+        self._asn1Spec = asn1Spec
+        self._defMode = defMode
+        self._maxChunkSize = maxChunkSize
+
+    def __call__(self, value):
+        chunks = []
+        self.encodeChunks(value, chunks)
+        return null.join(chunks)
+
+    def compileComponents(self, compileFun): pass
+
+    def encodeChunks(self, value, chunks):
+        return self._encodeFun.encodeChunks(
+            value, self._defMode, self._maxChunkSize, chunks
+            )
+
+    def encodeNativeChunks(self, value, chunks):
+        raise Error(
+            'No native value encoder for %s' % (self._asn1Spec.__class__.__name__,)
+            )
+
+class ValuePlan(EncoderPlan):
+    def __init__(self, encodeFun, asn1Spec, defMode, maxChunkSize,
+                 concreteEncoder):
+        EncoderPlan.__init__(self, encodeFun, asn1Spec, defMode, maxChunkSize)
+        self._concreteEncoder = concreteEncoder
+        self._tagSet = asn1Spec.getTagSet()
+        # primitive and constructed form identifier octets, outermost
+        # tag first; all but the innermost tag are explicit
+        self._tagOctets = []
+        for t in self._tagSet[1:]:
+            self._tagOctets.insert(
+                0, (None, explicitlyTaggedItemEncoder.encodeTag(t, 1))
+                )
+        if self._tagSet:
+            self._tagOctets.append(
+                (concreteEncoder.encodeTag(self._tagSet[0], 0),
+                 concreteEncoder.encodeTag(self._tagSet[0], 1))
+                )
+        # string values split into chunks carry their tags over to
+        # every chunk, so explicit tags emitted here must go first
+        if len(self._tagSet) > 1 and \
+               isinstance(asn1Spec, (univ.OctetString, univ.BitString)):
+            self._baseTagSet = self._tagSet[:1]
+        else:
+            self._baseTagSet = None
+
+    def _encodeValue(self, value, chunks):
+        if self._baseTagSet is not None:
+            if self._encodeFun.trusted:
+                value = value.cloneTrusted(tagSet=self._baseTagSet)
+            else:
+                value = value.clone(tagSet=self._baseTagSet)
+        return self._concreteEncoder.encodeChunks(
+            self._encodeFun, value, self._defMode, self._maxChunkSize, chunks
+            )
+
+    def _encodeNativeValue(self, value, chunks):
+        return self._concreteEncoder.encodeNativeChunks(
+            self._encodeFun, value, self._asn1Spec, self._defMode,
+            self._maxChunkSize, chunks
+            )
+
+    def encodeChunks(self, value, chunks):
+        tagSet = value.getTagSet()
+        if tagSet is not self._tagSet and tagSet != self._tagSet:
+            # not a value of this spec
+            return EncoderPlan.encodeChunks(self, value, chunks)
+        return self._encodeTagged(self._encodeValue, value, chunks)
+
+    def encodeNativeChunks(self, value, chunks):
+        return self._encodeTagged(self._encodeNativeValue, value, chunks)
+
+    def _encodeTagged(self, encodeValue, value, chunks):
+        tagOctets = self._tagOctets
+        if not tagOctets:  # untagged value
+            return encodeValue(value, chunks)[0]
+        headerIdx = len(chunks)
+        chunks.extend([null]*len(tagOctets))
+        length, isConstructed = encodeValue(value, chunks)
+        concreteEncoder = self._concreteEncoder
+        idx = len(tagOctets)
+        while idx:
+            idx = idx - 1
+            header = tagOctets[idx][isConstructed]
+            if isConstructed and not self._defMode and \
+                   concreteEncoder.supportIndefLenMode:
+                header = header + indefLengthOctets
+                chunks.append(eooOctets)
+                length = length + len(eooOctets)
+            elif length < 0x80:
+                header = header + shortLengthOctets[length]
+            else:
+                header = header + concreteEncoder.encodeLength(length, 1)
+            chunks[headerIdx+idx] = header
+            length = length + len(header)
+            concreteEncoder = explicitlyTaggedItemEncoder
+            isConstructed = 1
+        return length
+
+class SequencePlan(ValuePlan):
+    """SEQUENCE/SET with component plans and DEFAULT values by position"""
+    def compileComponents(self, compileFun):
+        self._componentPlans = []
+        self._defaultComponents = []
+        self._componentPositions = {}
+        componentType = self._asn1Spec.getComponentType() or ()
+        idx = 0
+        while idx < len(componentType):
+            self._componentPlans.append(
+                compileFun(componentType.getTypeByPosition(idx))
+                )
+            self._componentPositions[componentType.getNameByPosition(idx)] = idx
+            self._defaultComponents.append(
+                self._asn1Spec.getDefaultComponentByPosition(idx)
+                )
+            idx = idx + 1
+
+    def _encodeValue(self, value, chunks):
+        value.setDefaultComponents()
+        if not self._encodeFun.trusted:
+            value.verifySizeSpec()
+        componentPlans = self._componentPlans
+        defaultComponents = self._defaultComponents
+        length = 0; idx = 0; l = len(value)
+        while idx < l:
+            component = value.getComponentByPosition(idx)
+            if component is None:  # Optional component
+                pass
+            elif idx >= len(componentPlans):
+                length = length + self._encodeFun.encodeChunks(
+                    component, self._defMode, self._maxChunkSize, chunks
+                    )
+            elif defaultComponents[idx] is None or \
+                     defaultComponents[idx] != component:
+                length = length + componentPlans[idx].encodeChunks(
+                    component, chunks
+                    )
+            idx = idx + 1
+        return length, 1
+
+    def _encodeNativeValue(self, value, chunks):
+        componentPlans = self._componentPlans
+        length = 0
+        for name, component, componentSpec in \
+                nativeComponents(value, self._asn1Spec, self._encodeFun.trusted):
+            length = length + componentPlans[
+                self._componentPositions[name]
+                ].encodeNativeChunks(component, chunks)
+        return length, 1
+
+class SequenceOfPlan(ValuePlan):
+    def compileComponents(self, compileFun):
+        self._componentPlan = compileFun(self._asn1Spec.getComponentType())
+
+    def _encodeValue(self, value, chunks):
+        if not self._encodeFun.trusted:
+            value.verifySizeSpec()
+        encodeChunks = self._componentPlan.encodeChunks
+        length = 0; idx = 0; l = len(value)
+        while idx < l:
+            length = length + encodeChunks(
+                value.getComponentByPosition(idx), chunks
+                )
+            idx = idx + 1
+        return length, 1
+
+    def _encodeNativeValue(self, value, chunks):
+        if not self._encodeFun.trusted:
+            self._asn1Spec.getSizeSpec()(value)
+        encodeNativeChunks = self._componentPlan.encodeNativeChunks
+        length = 0
+        for component in value:
+            length = length + encodeNativeChunks(component, chunks)
+        return length, 1
+
+class ChoicePlan(ValuePlan):
+    """CHOICE with alternative plans by name"""
+    def compileComponents(self, compileFun):
+        self._componentPlans = {}
+        componentType = self._asn1Spec.getComponentType() or ()
+        idx = 0
+        while idx < len(componentType):
+            self._componentPlans[componentType.getNameByPosition(idx)] = \
+                compileFun(componentType.getTypeByPosition(idx))
+            idx = idx + 1
+
+    def _encodeValue(self, value, chunks):
+        component = value.getComponent()
+        name = value.getName()
+        if name in self._componentPlans:
+            return self._componentPlans[name].encodeChunks(
+                component, chunks
+                ), 1
+        return self._encodeFun.encodeChunks(
+            component, self._defMode, self._maxChunkSize, chunks
+            ), 1
+
+    def _encodeNativeValue(self, value, chunks):
+        name, component = value
+        if name not in self._componentPlans:
+            raise error.PyAsn1Error(
+                'Name %s not found at %s' % (name, self._asn1Spec.__class__.__name__)
+                )
+        return self._componentPlans[name].encodeNativeChunks(
+            component, chunks
+            ), 1
+
 class Encoder:
+    # trusted encoder skips values constraints check
+    trusted = 0
     def __init__(self, tagMap, typeMap={}):
         self.__tagMap = tagMap
         self.__typeMap = typeMap
+        # spec-compiled encoders by spec object and encoding mode
+        self.__plans = decoder.PlanCache()
+        self.__trustedEncoder = None
+
+    def getTrustedEncoder(self):
+        """Return the twin of this encoder taking values on trust: no
+           constraints, size or type checks are made on them"""
+        if self.trusted:
+            return self
+        if self.__trustedEncoder is None:
+            self.__trustedEncoder = self.__class__(
+                self.__tagMap, self.__typeMap
+                )
+            self.__trustedEncoder.trusted = 1
+        return self.__trustedEncoder
+
+    def getPlanCache(self): return self.__plans
+
+    def __call__(self, value, defMode=1, maxChunkSize=0, trusted=False):
+        if trusted and not self.trusted:
+            return self.getTrustedEncoder()(value, defMode, maxChunkSize)
+        chunks = []
+        self.encodeChunks(value, defMode, maxChunkSize, chunks)
+        substrate = null.join(chunks)
+        debug.logger & debug.flagEncoder and debug.logger('built %s octets of substrate: %s\nencoder completed' % (len(substrate), debug.hexdump(substrate)))
+        return substrate
+
+    def encodeInto(self, value, buffer, offset=0, defMode=1, maxChunkSize=0):
+        """Encode value into caller-supplied writable buffer (e.g.
+           bytearray) at offset, return the number of octets written.
+
+           The first pass over the value computes lengths of all nested
+           contents, the second one writes tags, lengths and contents
+           right into the buffer. Contents of types having no in-place
+           encoder (e.g. INTEGER or CER SET OF) are encoded into
+           fragments by the first pass and copied by the second one.
+        """
+        sizes = []
+        length = self.encodeSize(value, defMode, maxChunkSize, sizes)
+        if offset < 0 or offset + length > len(buffer):
+            raise Error(
+                '%d octets do not fit into %d-octet buffer at offset %d' %
+                (length, len(buffer), offset)
+                )
+        sizes.reverse()
+        self.encodeWrite(value, defMode, maxChunkSize, sizes, buffer, offset)
+        debug.logger & debug.flagEncoder and debug.logger('written %s octets of substrate into buffer\nencoder completed' % length)
+        return length
+
+    def encodeNative(self, value, asn1Spec, defMode=1, maxChunkSize=0,
+                     trusted=False):
+        """Encode plain Python value (as native mode decoder yields) by
+           the given ASN.1 spec object.
+
+           SEQUENCE/SET values are dicts of components by name, SEQUENCE
+           OF/SET OF are lists, CHOICE is a (name, value) pair. The spec
+           gets compiled once, as by compile(), and tells tags, OPTIONAL
+           and DEFAULT components and constraints.
 
-    def __call__(self, value, defMode=1, maxChunkSize=0):
+           In trusted mode values are taken as they are, with no
+           constraints or type check.
+        """
+        if trusted and not self.trusted:
+            return self.getTrustedEncoder().encodeNative(
+                value, asn1Spec, defMode, maxChunkSize
+                )
+        chunks = []
+        self.encodeNativeChunks(value, asn1Spec, defMode, maxChunkSize, chunks)
+        substrate = null.join(chunks)
+        debug.logger & debug.flagEncoder and debug.logger('built %s octets of substrate: %s\nencoder completed' % (len(substrate), debug.hexdump(substrate)))
+        return substrate
+
+    def encodeNativeChunks(self, value, asn1Spec, defMode, maxChunkSize,
+                           chunks):
+        return self.compile(
+            asn1Spec, defMode, maxChunkSize
+            ).encodeNativeChunks(value, chunks)
+
+    def encodeMany(self, values, asn1Spec=None, defMode=1, maxChunkSize=0,
+                   streaming=False):
+        """Encode values back-to-back.
+
+           Returns a single substrate holding all the values or, in
+           streaming mode, a generator yielding substrate value by value.
+           Values of the given ASN.1 spec are encoded by its compiled
+           encoder.
+        """
+        if asn1Spec is None:
+            def encodeChunks(value, chunks):
+                return self.encodeChunks(value, defMode, maxChunkSize, chunks)
+        else:
+            encodeChunks = self.compile(
+                asn1Spec, defMode, maxChunkSize
+                ).encodeChunks
+        if streaming:
+            return self.__encodeValues(values, encodeChunks)
+        chunks = []
+        for value in values:
+            encodeChunks(value, chunks)
+        return null.join(chunks)
+
+    def __encodeValues(self, values, encodeChunks):
+        chunks = []
+        for value in values:
+            encodeChunks(value, chunks)
+            yield null.join(chunks)
+            del chunks[:]
+
+    def compile(self, asn1Spec, defMode=1, maxChunkSize=0):
+        """Return encoder specialized for values of the given ASN.1 spec
+           object in the given mode.
+
+           Compiled encoders are cached per spec object and mode, they
+           take a value and return its substrate. Values of other types
+           are handed over to this encoder.
+        """
+        key = (id(asn1Spec), defMode, maxChunkSize)
+        plan = self.__plans.get(key, asn1Spec)
+        if plan is not None:
+            return plan
+        tagSet = asn1Spec.getTagSet()
+        # explicit tags aside, codec is chosen by innermost tag
+        if asn1Spec.typeId is not None and asn1Spec.typeId in self.__typeMap:
+            concreteEncoder = self.__typeMap[asn1Spec.typeId]
+        elif tagSet[:1] in self.__tagMap:
+            concreteEncoder = self.__tagMap[tagSet[:1]]
+        elif asn1Spec.baseTagSet in self.__tagMap:
+            concreteEncoder = self.__tagMap[asn1Spec.baseTagSet]
+        else:
+            concreteEncoder = None
+        if concreteEncoder is None:
+            plan = EncoderPlan(self, asn1Spec, defMode, maxChunkSize)
+        elif concreteEncoder.__class__ is SequenceEncoder:
+            plan = SequencePlan(self, asn1Spec, defMode, maxChunkSize,
+                                concreteEncoder)
+        elif concreteEncoder.__class__ is SequenceOfEncoder and \
+                 asn1Spec.getComponentType() is not None:
+            plan = SequenceOfPlan(self, asn1Spec, defMode, maxChunkSize,
+                                  concreteEncoder)
+        elif concreteEncoder.__class__ is ChoiceEncoder:
+            plan = ChoicePlan(self, asn1Spec, defMode, maxChunkSize,
+                              concreteEncoder)
+        else:
+            plan = ValuePlan(self, asn1Spec, defMode, maxChunkSize,
+                             concreteEncoder)
+        # cache ahead of components compilation to let recursive specs in
+        self.__plans.put(key, asn1Spec, plan)
+        plan.compileComponents(
+            lambda x, self=self: self.compile(x, defMode, maxChunkSize)
+            )
+        debug.logger & debug.flagEncoder and debug.logger('compiled %s for %s' % (plan.__class__.__name__, asn1Spec.__class__.__name__))
+        return plan
+
+    def encodeChunks(self, value, defMode, maxChunkSize, chunks):
         debug.logger & debug.flagEncoder and debug.logger('encoder called in %sdef mode, chunk size %s for type %s, value:\n%s' % (not defMode and 'in' or '', maxChunkSize, value.prettyPrintType(), value.prettyPrint()))
+        return self.__getEncoder(value).encode(
+            self, value, defMode, maxChunkSize, chunks
+            )
+
+    def encodeSize(self, value, defMode, maxChunkSize, sizes):
+        return self.__getEncoder(value).size(
+            self, value, defMode, maxChunkSize, sizes
+            )
+
+    def encodeWrite(self, value, defMode, maxChunkSize, sizes, buffer,
+                    offset):
+        return self.__getEncoder(value).write(
+            self, value, defMode, maxChunkSize, sizes, buffer, offset
+            )
+
+    def __getEncoder(self, value):
         tagSet = value.getTagSet()
         if len(tagSet) > 1:
             concreteEncoder = explicitlyTaggedItemEncoder
@@ -417,10 +1231,9 @@ class Encoder:
                 else:
                     raise Error('No encoder for %s' % (value,))
         debug.logger & debug.flagEncoder and debug.logger('using value codec %s chosen by %s' % (concreteEncoder.__class__.__name__, tagSet))
-        substrate = concreteEncoder.encode(
-            self, value, defMode, maxChunkSize
-            )
-        debug.logger & debug.flagEncoder and debug.logger('built %s octets of substrate: %s\nencoder completed' % (len(substrate), debug.hexdump(substrate)))
-        return substrate
+        return concreteEncoder
 
 encode = Encoder(tagMap, typeMap)
+encodeInto = encode.encodeInto
+encodeMany = encode.encodeMany
+encodeNative = encode.encodeNative
@@ -0,0 +1,104 @@
+# Process pool decoding of top-level BER/CER/DER records (Python 3.8+)
+import mmap, pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pyasn1.codec.ber import decoder
+from pyasn1 import debug
+
+def recordBoundaries(substrate):
+    """Return (offset, length) of each top-level TLV in substrate judging
+       by TLV headers alone"""
+    records = []
+    size = len(substrate)
+    offset = start = 0
+    framer = decoder.RecordFramer()
+    while offset < size:
+        offset, complete = framer.frame(substrate, offset, size)
+        if complete:
+            records.append((start, offset - start))
+            start = offset
+    framer.checkComplete()
+    return records
+
+# worker process state: shared substrate, decoder and ASN.1 spec
+_worker = {}
+
+def _initWorker(source, decoderState):
+    kind, name = source
+    if kind == 'file':
+        f = open(name, 'rb')
+        try:
+            _worker['buffer'] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            f.close()
+        _worker['substrate'] = memoryview(_worker['buffer'])
+    else:
+        _worker['buffer'] = shared_memory.SharedMemory(name=name)
+        _worker['substrate'] = _worker['buffer'].buf
+    # codec (sans caches) and spec travel once per worker
+    decodeFun, asn1Spec = pickle.loads(decoderState)
+    if asn1Spec is None:
+        _worker['decodeFun'] = decodeFun
+    else:
+        _worker['decodeFun'] = decodeFun.compile(asn1Spec)
+
+def _decodeRecords(records):
+    substrate = _worker['substrate']
+    decodeFun = _worker['decodeFun']
+    values = []
+    for offset, length in records:
+        value, _ = decodeFun(substrate[offset:offset+length])
+        values.append(value)
+    return values
+
+def decodeParallel(source, asn1Spec=None, decodeFun=decoder.decode,
+                   workers=None, batchSize=256):
+    """Decode top-level values of a file (given by name) or of an octet
+       buffer in a pool of worker processes, return them in order.
+
+       Workers map the file or attach to a shared memory copy of the
+       buffer and receive records as (offset, length) batches.
+    """
+    shm = buffer = None
+    try:
+        if isinstance(source, str):
+            f = open(source, 'rb')
+            try:
+                if not f.seek(0, 2):
+                    return []
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            finally:
+                f.close()
+            substrate = memoryview(buffer)
+            source = ('file', source)
+        else:
+            substrate = memoryview(source).cast('B')
+            if not substrate:
+                return []
+            shm = shared_memory.SharedMemory(create=True, size=len(substrate))
+            shm.buf[:len(substrate)] = substrate
+            substrate = shm.buf
+            source = ('shm', shm.name)
+        try:
+            records = recordBoundaries(substrate)
+        finally:
+            # exported views would keep the buffer from closing
+            substrate.release()
+        debug.logger and debug.logger & debug.flagDecoder and debug.logger('decoding %d records in batches of %d' % (len(records), batchSize))
+        batches = [ records[x:x+batchSize]
+                    for x in range(0, len(records), batchSize) ]
+        decoderState = pickle.dumps(
+            (decodeFun, asn1Spec), pickle.HIGHEST_PROTOCOL
+            )
+        with ProcessPoolExecutor(workers, initializer=_initWorker,
+                                 initargs=(source, decoderState)) as executor:
+            values = []
+            for batch in executor.map(_decodeRecords, batches):
+                values.extend(batch)
+        return values
+    finally:
+        if buffer is not None:
+            buffer.close()
+        if shm is not None:
+            shm.close()
+            shm.unlink()
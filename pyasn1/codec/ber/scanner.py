@@ -0,0 +1,138 @@
+# Structural scanning of BER/CER/DER substrate: TLV positions only,
+# no ASN.1 objects get built
+import array
+from pyasn1.compat.octets import intsView
+from pyasn1 import debug, error
+
+try:
+    array.array('q')
+    entryType = 'q'
+except ValueError:
+    # no 64-bit arrays before Python 3.3
+    entryType = 'l'
+
+class TlvIndex:
+    """Array-backed sequence of TLV positions in document order.
+
+       Entries are (depth, tagClass, tagFormat, tagId, headerOffset,
+       contentOffset, length) tuples. Indefinite length values get their
+       content length, end-of-octets excluded, once terminated.
+    """
+    fields = ('depth', 'tagClass', 'tagFormat', 'tagId',
+              'headerOffset', 'contentOffset', 'length')
+    def __init__(self):
+        self.__entries = array.array(entryType)
+
+    def __len__(self): return len(self.__entries) // 7
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx = idx + len(self)
+        if idx < 0 or idx >= len(self):
+            raise IndexError('TLV index out of range')
+        idx = idx * 7
+        return tuple(self.__entries[idx:idx+7])
+
+    def __iter__(self):
+        entries = self.__entries
+        for idx in range(0, len(entries), 7):
+            yield tuple(entries[idx:idx+7])
+
+    def append(self, entry):
+        try:
+            entry = array.array(entryType, entry)
+        except OverflowError:
+            raise error.PyAsn1Error('TLV field out of range: %s' % (entry,))
+        self.__entries.extend(entry)
+        return len(self) - 1
+
+    def setLength(self, idx, length):
+        self.__entries[idx*7+6] = length
+
+def scan(substrate, offset=0):
+    """Return TlvIndex of all TLVs in substrate, nested ones included"""
+    octets = intsView(substrate)
+    size = len(octets)
+    index = TlvIndex()
+    # constructed values under way: (entry, content offset, content end
+    # or None if indefinite length, end of enclosing definite length value)
+    stack = []
+    limit = size
+    while 1:
+        while stack and stack[-1][2] == offset:
+            stack.pop()
+        if stack:
+            limit = stack[-1][3]
+        else:
+            limit = size
+        if offset >= limit:
+            if stack:
+                raise error.SubstrateUnderrunError(
+                    'No EOO seen before substrate ends'
+                    )
+            break
+        headerOffset = offset
+        t = octets[offset]
+        offset = offset + 1
+        if not t and stack and stack[-1][2] is None and \
+               offset < limit and not octets[offset]:
+            # end-of-octets terminates innermost indefinite length value
+            entry, contentOffset, _, _ = stack.pop()
+            index.setLength(entry, headerOffset - contentOffset)
+            offset = offset + 1
+            continue
+        tagClass = t&0xC0
+        tagFormat = t&0x20
+        tagId = t&0x1F
+        if tagId == 0x1F:
+            tagId = 0
+            while 1:
+                if offset >= limit:
+                    raise error.SubstrateUnderrunError(
+                        'Short octet stream on long tag decoding'
+                        )
+                t = octets[offset]
+                offset = offset + 1
+                tagId = tagId << 7 | (t&0x7F)
+                if not t&0x80:
+                    break
+        if offset >= limit:
+            raise error.SubstrateUnderrunError(
+                'Short octet stream on length decoding'
+                )
+        firstOctet = octets[offset]
+        offset = offset + 1
+        if firstOctet == 128:
+            if not tagFormat:
+                raise error.PyAsn1Error('Indefinite length in primitive form')
+            length = -1
+        elif firstOctet < 128:
+            length = firstOctet
+        else:
+            lengthSize = firstOctet & 0x7F
+            if offset + lengthSize > limit:
+                raise error.SubstrateUnderrunError(
+                    '%s<%s at offset %s' %
+                    (lengthSize, limit - offset, headerOffset)
+                    )
+            length = 0
+            while lengthSize:
+                length = (length << 8) | octets[offset]
+                offset = offset + 1
+                lengthSize = lengthSize - 1
+        if length != -1 and offset + length > limit:
+            raise error.SubstrateUnderrunError(
+                '%d-octet short' % (offset + length - limit)
+                )
+        entry = index.append(
+            (len(stack), tagClass, tagFormat, tagId, headerOffset, offset,
+             length)
+            )
+        if length == -1:
+            stack.append((entry, offset, None, limit))
+        elif tagFormat:
+            stack.append((entry, offset, offset + length, offset + length))
+        else:
+            offset = offset + length
+    debug.logger and debug.logger & debug.flagDecoder and debug.logger('scanned %d TLVs off %d octets' % (len(index), size))
+    return index
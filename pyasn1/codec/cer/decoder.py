@@ -7,7 +7,7 @@ from pyasn1 import error
 class BooleanDecoder(decoder.AbstractSimpleDecoder):
     protoComponent = univ.Boolean(0)
     def valueDecoder(self, fullSubstrate, substrate, asn1Spec, tagSet, length,
-                     state, decodeFun, substrateFun):
+                     state, decodeFun, substrateFun, **options):
         head, tail = substrate[:length], substrate[length:]
         if not head:
             raise error.PyAsn1Error('Empty substrate')
@@ -21,7 +21,9 @@ class BooleanDecoder(decoder.AbstractSimpleDecoder):
             value = 0
         else:
             raise error.PyAsn1Error('Boolean CER violation: %s' % byte)
-        return self._createComponent(asn1Spec, tagSet, value), tail
+        return self._createComponent(asn1Spec, tagSet, value, **options), tail
+
+    def _nativeValue(self, asn1Spec, value): return bool(value)
 
 tagMap = decoder.tagMap.copy()
 tagMap.update({
@@ -33,3 +35,13 @@ typeMap = decoder.typeMap
 class Decoder(decoder.Decoder): pass
 
 decode = Decoder(tagMap, decoder.typeMap)
+decodeStream = decode.decodeStream
+decodeMany = decode.decodeMany
+decodePaths = decode.decodePaths
+
+class IterativeDecoder(decoder.IterativeDecoder): pass
+
+iterativeDecode = IterativeDecoder(tagMap, decoder.typeMap)
+
+class IncrementalDecoder(decoder.IncrementalDecoder):
+    decodeFun = decode
@@ -12,15 +12,49 @@ class BooleanEncoder(encoder.IntegerEncoder):
         return substrate, 0
 
 class BitStringEncoder(encoder.BitStringEncoder):
-    def encodeValue(self, encodeFun, client, defMode, maxChunkSize):
-        return encoder.BitStringEncoder.encodeValue(
-            self, encodeFun, client, defMode, 1000
+    def encodeChunks(self, encodeFun, client, defMode, maxChunkSize, chunks):
+        return encoder.BitStringEncoder.encodeChunks(
+            self, encodeFun, client, defMode, 1000, chunks
+            )
+
+    def encodeNativeChunks(self, encodeFun, client, asn1Spec, defMode,
+                           maxChunkSize, chunks):
+        return encoder.BitStringEncoder.encodeNativeChunks(
+            self, encodeFun, client, asn1Spec, defMode, 1000, chunks
+            )
+
+    def sizeValue(self, encodeFun, client, defMode, maxChunkSize, sizes):
+        return encoder.BitStringEncoder.sizeValue(
+            self, encodeFun, client, defMode, 1000, sizes
+            )
+
+    def writeValue(self, encodeFun, client, defMode, maxChunkSize, sizes,
+                   buffer, offset):
+        return encoder.BitStringEncoder.writeValue(
+            self, encodeFun, client, defMode, 1000, sizes, buffer, offset
             )
 
 class OctetStringEncoder(encoder.OctetStringEncoder):
-    def encodeValue(self, encodeFun, client, defMode, maxChunkSize):
-        return encoder.OctetStringEncoder.encodeValue(
-            self, encodeFun, client, defMode, 1000
+    def encodeChunks(self, encodeFun, client, defMode, maxChunkSize, chunks):
+        return encoder.OctetStringEncoder.encodeChunks(
+            self, encodeFun, client, defMode, 1000, chunks
+            )
+
+    def encodeNativeChunks(self, encodeFun, client, asn1Spec, defMode,
+                           maxChunkSize, chunks):
+        return encoder.OctetStringEncoder.encodeNativeChunks(
+            self, encodeFun, client, asn1Spec, defMode, 1000, chunks
+            )
+
+    def sizeValue(self, encodeFun, client, defMode, maxChunkSize, sizes):
+        return encoder.OctetStringEncoder.sizeValue(
+            self, encodeFun, client, defMode, 1000, sizes
+            )
+
+    def writeValue(self, encodeFun, client, defMode, maxChunkSize, sizes,
+                   buffer, offset):
+        return encoder.OctetStringEncoder.writeValue(
+            self, encodeFun, client, defMode, 1000, sizes, buffer, offset
             )
 
 class RealEncoder(encoder.RealEncoder):
@@ -33,11 +67,25 @@ class RealEncoder(encoder.RealEncoder):
 # specialized UTCTimeEncoder here
 
 class SetOfEncoder(encoder.SequenceOfEncoder):
-    def encodeValue(self, encodeFun, client, defMode, maxChunkSize):
+    # components order is only known once they are encoded
+    def sizeValue(self, encodeFun, client, defMode, maxChunkSize, sizes):
+        return encoder.AbstractItemEncoder.sizeValue(
+            self, encodeFun, client, defMode, maxChunkSize, sizes
+            )
+
+    def writeValue(self, encodeFun, client, defMode, maxChunkSize, sizes,
+                   buffer, offset):
+        return encoder.AbstractItemEncoder.writeValue(
+            self, encodeFun, client, defMode, maxChunkSize, sizes, buffer,
+            offset
+            )
+
+    def encodeChunks(self, encodeFun, client, defMode, maxChunkSize, chunks):
         if isinstance(client, univ.SequenceAndSetBase):
             client.setDefaultComponents()
-        client.verifySizeSpec()
-        substrate = null; idx = len(client)
+        if not encodeFun.trusted:
+            client.verifySizeSpec()
+        length = 0; idx = len(client)
         # This is certainly a hack but how else do I distinguish SetOf
         # from Set if they have the same tags&constraints?
         if isinstance(client, univ.SequenceAndSetBase):
@@ -53,20 +101,61 @@ class SetOfEncoder(encoder.SequenceOfEncoder):
             comps.sort(key=lambda x: isinstance(x, univ.Choice) and \
                                      x.getMinTagSet() or x.getTagSet())
             for c in comps:
-                substrate += encodeFun(c, defMode, maxChunkSize)
+                length = length + encodeFun.encodeChunks(
+                    c, defMode, maxChunkSize, chunks
+                    )
         else:
             # SetOf
             compSubs = []
             while idx > 0:
                 idx = idx - 1
-                compSubs.append(
-                    encodeFun(client[idx], defMode, maxChunkSize)
+                compChunks = []
+                encodeFun.encodeChunks(
+                    client[idx], defMode, maxChunkSize, compChunks
                     )
+                compSubs.append(null.join(compChunks))
             compSubs.sort()  # perhaps padding's not needed
-            substrate = null
             for compSub in compSubs:
-                substrate += compSub
-        return substrate, 1
+                length = length + len(compSub)
+            chunks.extend(compSubs)
+        return length, 1
+
+    def encodeNativeChunks(self, encodeFun, client, asn1Spec, defMode,
+                           maxChunkSize, chunks):
+        if isinstance(asn1Spec, univ.SequenceAndSetBase):
+            # Set, components go in their types tag order
+            comps = []
+            for name, component, componentSpec in \
+                    encoder.nativeComponents(client, asn1Spec, encodeFun.trusted):
+                comps.append(
+                    (isinstance(componentSpec, univ.Choice) and \
+                     componentSpec.getMinTagSet() or componentSpec.getTagSet(),
+                     component, componentSpec)
+                    )
+            comps.sort(key=lambda x: x[0])
+            length = 0
+            for _, component, componentSpec in comps:
+                length = length + encodeFun.encodeNativeChunks(
+                    component, componentSpec, defMode, maxChunkSize, chunks
+                    )
+            return length, 1
+        # SetOf, components go in their encodings order
+        componentSpec = asn1Spec.getComponentType()
+        if not encodeFun.trusted:
+            asn1Spec.getSizeSpec()(client)
+        compSubs = []
+        for component in client:
+            compChunks = []
+            encodeFun.encodeNativeChunks(
+                component, componentSpec, defMode, maxChunkSize, compChunks
+                )
+            compSubs.append(null.join(compChunks))
+        compSubs.sort()
+        length = 0
+        for compSub in compSubs:
+            length = length + len(compSub)
+        chunks.extend(compSubs)
+        return length, 1
 
 tagMap = encoder.tagMap.copy()
 tagMap.update({
@@ -84,9 +173,34 @@ typeMap.update({
     })
 
 class Encoder(encoder.Encoder):
-    def __call__(self, client, defMode=0, maxChunkSize=0):
-        return encoder.Encoder.__call__(self, client, defMode, maxChunkSize)
+    def __call__(self, client, defMode=0, maxChunkSize=0, trusted=False):
+        return encoder.Encoder.__call__(
+            self, client, defMode, maxChunkSize, trusted
+            )
+
+    def encodeInto(self, client, buffer, offset=0, defMode=0, maxChunkSize=0):
+        return encoder.Encoder.encodeInto(
+            self, client, buffer, offset, defMode, maxChunkSize
+            )
+
+    def encodeMany(self, values, asn1Spec=None, defMode=0, maxChunkSize=0,
+                   streaming=False):
+        return encoder.Encoder.encodeMany(
+            self, values, asn1Spec, defMode, maxChunkSize, streaming
+            )
+
+    def encodeNative(self, client, asn1Spec, defMode=0, maxChunkSize=0,
+                     trusted=False):
+        return encoder.Encoder.encodeNative(
+            self, client, asn1Spec, defMode, maxChunkSize, trusted
+            )
+
+    def compile(self, asn1Spec, defMode=0, maxChunkSize=0):
+        return encoder.Encoder.compile(self, asn1Spec, defMode, maxChunkSize)
 
 encode = Encoder(tagMap, typeMap)
+encodeInto = encode.encodeInto
+encodeMany = encode.encodeMany
+encodeNative = encode.encodeNative
 
 # EncoderFactory queries class instance and builds a map of tags -> encoders
@@ -6,3 +6,13 @@ typeMap = decoder.typeMap
 Decoder = decoder.Decoder
 
 decode = Decoder(tagMap, typeMap)
+decodeStream = decode.decodeStream
+decodeMany = decode.decodeMany
+decodePaths = decode.decodePaths
+
+IterativeDecoder = decoder.IterativeDecoder
+
+iterativeDecode = IterativeDecoder(tagMap, typeMap)
+
+class IncrementalDecoder(decoder.IncrementalDecoder):
+    decodeFun = decode
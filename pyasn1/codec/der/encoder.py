@@ -22,7 +22,32 @@ tagMap.update({
 typeMap = encoder.typeMap
 
 class Encoder(encoder.Encoder):
-    def __call__(self, client, defMode=1, maxChunkSize=0):
-        return encoder.Encoder.__call__(self, client, defMode, maxChunkSize)
+    def __call__(self, client, defMode=1, maxChunkSize=0, trusted=False):
+        return encoder.Encoder.__call__(
+            self, client, defMode, maxChunkSize, trusted
+            )
+
+    def encodeInto(self, client, buffer, offset=0, defMode=1, maxChunkSize=0):
+        return encoder.Encoder.encodeInto(
+            self, client, buffer, offset, defMode, maxChunkSize
+            )
+
+    def encodeMany(self, values, asn1Spec=None, defMode=1, maxChunkSize=0,
+                   streaming=False):
+        return encoder.Encoder.encodeMany(
+            self, values, asn1Spec, defMode, maxChunkSize, streaming
+            )
+
+    def encodeNative(self, client, asn1Spec, defMode=1, maxChunkSize=0,
+                     trusted=False):
+        return encoder.Encoder.encodeNative(
+            self, client, asn1Spec, defMode, maxChunkSize, trusted
+            )
+
+    def compile(self, asn1Spec, defMode=1, maxChunkSize=0):
+        return encoder.Encoder.compile(self, asn1Spec, defMode, maxChunkSize)
         
 encode = Encoder(tagMap, typeMap)
+encodeInto = encode.encodeInto
+encodeMany = encode.encodeMany
+encodeNative = encode.encodeNative
@@ -0,0 +1,43 @@
+# Linear time conversion between integers and big-endian octets
+from sys import version_info
+
+if version_info[0:2] < (3, 2):
+    from binascii import hexlify, unhexlify
+    from pyasn1.compat.octets import oct2int, str2octs, octs2str
+
+    # two's complement if signed, shortest form on encoding
+    def from_bytes(octets, signed=False):
+        if not octets:
+            return 0
+        value = int(octs2str(hexlify(octets)), 16)
+        if signed and oct2int(octets[0]) & 0x80:
+            return value - (1 << len(octets) * 8)
+        return value
+
+    def to_bytes(value, signed=False):
+        if value < 0 and not signed:
+            raise OverflowError("can't convert negative int to unsigned")
+        if value < 0:
+            hexValue = '%x' % ~value
+        else:
+            hexValue = '%x' % value
+        length = (len(hexValue) + 1) // 2
+        if signed and not len(hexValue) % 2 and hexValue[0] in '89abcdef':
+            length = length + 1  # room for sign bit
+        if value < 0:
+            value = value + (1 << length * 8)
+        hexValue = '%x' % value
+        return unhexlify(str2octs('0' * (length * 2 - len(hexValue)) + hexValue))
+else:
+    def from_bytes(octets, signed=False):
+        return int.from_bytes(octets, 'big', signed=signed)
+
+    def to_bytes(value, signed=False):
+        if signed:
+            if value < 0:
+                length = (~value).bit_length() // 8 + 1
+            else:
+                length = value.bit_length() // 8 + 1
+        else:
+            length = (value.bit_length() + 7) // 8 or 1
+        return value.to_bytes(length, 'big', signed=signed)
@@ -18,3 +18,36 @@ else:
     str2octs = lambda x: x.encode()
     octs2str = lambda x: x.decode()
     isOctetsType = lambda s: isinstance(s, bytes)
+
+# Zero-copy views over octet buffers (used by the decoders)
+if version_info[0:2] < (2, 7):
+    # no memoryview, fall back to plain (copying) strings
+    def octsView(s):
+        if not isOctetsType(s):
+            raise TypeError('octets expected, got %s' % type(s).__name__)
+        return s
+    isOctsView = lambda s: isinstance(s, str)
+    view2octs = lambda s: s
+elif version_info[0] <= 2:
+    def octsView(s):
+        try:
+            return memoryview(s)
+        except TypeError:
+            if isinstance(s, unicode):
+                raise
+            # old-style buffers (e.g. mmap) only
+            return memoryview(buffer(s))
+    isOctsView = lambda s: isinstance(s, memoryview)
+    view2octs = lambda s: s.tobytes()
+else:
+    octsView = lambda s: memoryview(s).cast('B')
+    isOctsView = lambda s: isinstance(s, memoryview)
+    view2octs = lambda s: s.tobytes()
+
+# Random access octets as integers (copying on Python 2)
+if version_info[0:2] < (2, 6):
+    intsView = octs2ints
+elif version_info[0] <= 2:
+    intsView = bytearray
+else:
+    intsView = octsView
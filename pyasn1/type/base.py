@@ -61,6 +61,29 @@ class NoValue:
     
 noValue = NoValue()
 
+class LazyComponent:
+    """Undecoded component value held by its constructed container
+       until first accessed.
+
+       It refers to its substrate till then: decoders snapshot mutable
+       buffers in lazy mode, memoryviews passed in are taken as they are
+       and must be kept unchanged by the caller.
+    """
+    def __init__(self, tagSet, decodeFun, *args, **kwargs):
+        self.__tagSet = tagSet
+        self.__decodeFun = decodeFun
+        self.__args = args
+        self.__kwargs = kwargs
+
+    def getTagSet(self): return self.__tagSet
+    getEffectiveTagSet = getTagSet
+
+    def decode(self):
+        value, _ = self.__decodeFun(*self.__args, **self.__kwargs)
+        return value
+
+    def prettyPrint(self, scope=0): return '<not decoded>'
+
 # Base class for "simple" ASN.1 objects. These are immutable.
 class AbstractSimpleAsn1Item(Asn1ItemBase):    
     defaultValue = noValue
@@ -73,7 +96,7 @@ class AbstractSimpleAsn1Item(Asn1ItemBase):
         else:
             value = self.prettyIn(value)
             self._verifySubtypeSpec(value)
-            self.__hashedValue = hash(value)
+            self.__hashedValue = None  # computed on demand
         self._value = value
         self._len = None
         
@@ -99,7 +122,10 @@ class AbstractSimpleAsn1Item(Asn1ItemBase):
         def __nonzero__(self): return bool(self._value)
     else:
         def __bool__(self): return bool(self._value)
-    def __hash__(self): return self.__hashedValue
+    def __hash__(self):
+        if self.__hashedValue is None:
+            self.__hashedValue = hash(self._value)
+        return self.__hashedValue
 
     def clone(self, value=None, tagSet=None, subtypeSpec=None):
         if value is None and tagSet is None and subtypeSpec is None:
@@ -112,6 +138,18 @@ class AbstractSimpleAsn1Item(Asn1ItemBase):
             subtypeSpec = self._subtypeSpec
         return self.__class__(value, tagSet, subtypeSpec)
 
+    def cloneTrusted(self, value=None, tagSet=None):
+        """Clone holding value (own one by default) in its internal form
+           as it is, with no conversion or constraints check"""
+        if value is None:
+            value = self._value
+        if tagSet is None:
+            tagSet = self._tagSet
+        r = self.clone(noValue, tagSet)
+        r._value = value
+        r.__hashedValue = None
+        return r
+
     def subtype(self, value=None, implicitTag=None, explicitTag=None,
                 subtypeSpec=None):
         if value is None:
@@ -178,6 +216,7 @@ class AbstractConstructedAsn1Item(Asn1ItemBase):
             self._sizeSpec = sizeSpec
         self._componentValues = []
         self._componentValuesSet = 0
+        self._lazyComponents = 0
 
     def __repr__(self):
         r = []
@@ -188,17 +227,20 @@ class AbstractConstructedAsn1Item(Asn1ItemBase):
         if self._subtypeSpec is not self.subtypeSpec:
             r.append('subtypeSpec=%r' % (self._subtypeSpec,))
         r = '%s(%s)' % (self.__class__.__name__, ', '.join(r))
-        if self._componentValues:
-            r += '.setComponents(%s)' % ', '.join([repr(x) for x in self._componentValues])
+        componentValues = self._getComponentValues()[:]
+        while componentValues and componentValues[-1] is None:
+            componentValues.pop()  # unset trailing slots
+        if componentValues:
+            r += '.setComponents(%s)' % ', '.join([repr(x) for x in componentValues])
         return r
 
     def __eq__(self, other):
-        return self is other and True or self._componentValues == other
-    def __ne__(self, other): return self._componentValues != other
-    def __lt__(self, other): return self._componentValues < other
-    def __le__(self, other): return self._componentValues <= other
-    def __gt__(self, other): return self._componentValues > other
-    def __ge__(self, other): return self._componentValues >= other
+        return self is other and True or self._getComponentValues() == other
+    def __ne__(self, other): return self._getComponentValues() != other
+    def __lt__(self, other): return self._getComponentValues() < other
+    def __le__(self, other): return self._getComponentValues() <= other
+    def __gt__(self, other): return self._getComponentValues() > other
+    def __ge__(self, other): return self._getComponentValues() >= other
     if sys.version_info[0] <= 2:
         def __nonzero__(self): return bool(self._componentValues)
     else:
@@ -209,6 +251,16 @@ class AbstractConstructedAsn1Item(Asn1ItemBase):
 
     def _cloneComponentValues(self, myClone, cloneValueFlag): pass
 
+    def _getComponentValues(self):
+        if self._lazyComponents:
+            # decode whatever components are still left undecoded
+            componentValues = self._componentValues
+            for idx in range(len(componentValues)):
+                if isinstance(componentValues[idx], LazyComponent):
+                    componentValues[idx] = componentValues[idx].decode()
+            self._lazyComponents = 0
+        return self._componentValues
+
     def clone(self, tagSet=None, subtypeSpec=None, sizeSpec=None, 
               cloneValueFlag=None):
         if tagSet is None:
@@ -246,6 +298,7 @@ class AbstractConstructedAsn1Item(Asn1ItemBase):
     def _verifyComponent(self, idx, value): pass
 
     def verifySizeSpec(self): self._sizeSpec(self)
+    def getSizeSpec(self): return self._sizeSpec
 
     def getComponentByPosition(self, idx):
         raise error.PyAsn1Error('Method not implemented')
@@ -271,4 +324,5 @@ class AbstractConstructedAsn1Item(Asn1ItemBase):
     def clear(self):
         self._componentValues = []
         self._componentValuesSet = 0
+        self._lazyComponents = 0
 
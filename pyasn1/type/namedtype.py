@@ -38,7 +38,10 @@ class NamedTypes:
         self.__minTagSet = None
         self.__tagToPosIdx = {}; self.__nameToPosIdx = {}
         self.__tagMap = { False: None, True: None }
-        self.__ambigiousTypes = {}
+        # (position, tagSet) -> position of component that tagSet may
+        # stand for next to position, built one position at a time
+        self.__nearPositions = {}
+        self.__nearTagMaps = {}; self.__nearDuplicates = {}
 
     def __repr__(self):
         return '%s(%s)' % (
@@ -61,7 +64,16 @@ class NamedTypes:
         def __bool__(self): return bool(self.__namedTypesLen)
     def __len__(self): return self.__namedTypesLen
    
-    def clone(self): return self.__class__(*self.__namedTypes)
+    def clone(self):
+        r = self.__class__(*self.__namedTypes)
+        # lookup tables depend on named types only, clones share them
+        r.__tagToPosIdx = self.__tagToPosIdx
+        r.__nameToPosIdx = self.__nameToPosIdx
+        r.__tagMap = self.__tagMap
+        r.__nearPositions = self.__nearPositions
+        r.__nearTagMaps = self.__nearTagMaps
+        r.__nearDuplicates = self.__nearDuplicates
+        return r
      
     def getTypeByPosition(self, idx):
         if idx < 0 or idx >= self.__namedTypesLen:
@@ -103,31 +115,47 @@ class NamedTypes:
         except KeyError:
             raise error.PyAsn1Error('Name %s not found' % (name,))
 
-    def __buildAmbigiousTagMap(self):
-        ambigiousTypes = ()
-        idx = self.__namedTypesLen
-        while idx > 0:
-            idx = idx - 1
-            t = self.__namedTypes[idx]
-            if t.isOptional or t.isDefaulted:
-                ambigiousTypes = (t, ) + ambigiousTypes
-            else:
-                ambigiousTypes = (t, )
-            self.__ambigiousTypes[idx] = NamedTypes(*ambigiousTypes)
-        
-    def getTagMapNearPosition(self, idx):
-        if not self.__ambigiousTypes: self.__buildAmbigiousTagMap()
-        try:
-            return self.__ambigiousTypes[idx].getTagMap()
-        except KeyError:
+    def __buildNearPosition(self, idx):
+        # any of OPTIONAL/DEFAULT types from idx on and the first
+        # mandatory one past them may come next
+        if idx < 0 or idx >= self.__namedTypesLen:
             raise error.PyAsn1Error('Type position out of range')
+        tagMap = tagmap.TagMap()
+        positions = {}; duplicates = {}
+        pos = idx
+        while pos < self.__namedTypesLen:
+            t = self.__namedTypes[pos]
+            tagMap = tagMap.clone(t.getType(), t.getType().getTagMap())
+            for tagSet in t.getType().getTagMap().getPosMap():
+                if tagSet in positions:
+                    duplicates[tagSet] = 1
+                positions[tagSet] = pos
+            if not t.isOptional and not t.isDefaulted:
+                break
+            pos = pos + 1
+        for tagSet in positions:
+            if tagSet not in duplicates:
+                self.__nearPositions[(idx, tagSet)] = positions[tagSet]
+        self.__nearDuplicates[idx] = duplicates
+        self.__nearTagMaps[idx] = tagMap
+
+    def getTagMapNearPosition(self, idx):
+        if idx not in self.__nearTagMaps:
+            self.__buildNearPosition(idx)
+        return self.__nearTagMaps[idx]
 
     def getPositionNearType(self, tagSet, idx):
-        if not self.__ambigiousTypes: self.__buildAmbigiousTagMap()
         try:
-            return idx+self.__ambigiousTypes[idx].getPositionByType(tagSet)
+            return self.__nearPositions[(idx, tagSet)]
         except KeyError:
-            raise error.PyAsn1Error('Type position out of range')
+            pass
+        if idx not in self.__nearTagMaps:
+            self.__buildNearPosition(idx)
+            if (idx, tagSet) in self.__nearPositions:
+                return self.__nearPositions[(idx, tagSet)]
+        if tagSet in self.__nearDuplicates[idx]:
+            raise error.PyAsn1Error('Duplicate type %s' % (tagSet,))
+        raise error.PyAsn1Error('Type %s not found' % (tagSet,))
 
     def genMinTagSet(self):
         if self.__minTagSet is None:
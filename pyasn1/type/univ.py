@@ -2,7 +2,7 @@
 import operator, sys, math
 from pyasn1.type import base, tag, constraint, namedtype, namedval, tagmap
 from pyasn1.codec.ber import eoo
-from pyasn1.compat import octets
+from pyasn1.compat import octets, integer
 from pyasn1 import error
 
 # "Simple" ASN.1 types (yet incomplete)
@@ -152,6 +152,115 @@ class Boolean(Integer):
     subtypeSpec = Integer.subtypeSpec+constraint.SingleValueConstraint(0,1)
     namedValues = Integer.namedValues.clone(('False', 0), ('True', 1))
 
+class BitStringValue:
+    """Immutable sequence of bits packed into octets, most significant
+       bit first; unused bits of the last octet are kept zero"""
+    # bits of each octet value
+    octetBits = [ tuple([ (x >> j) & 0x01 for j in (7, 6, 5, 4, 3, 2, 1, 0) ])
+                  for x in range(256) ]
+    def __init__(self, value=octets.null, unusedBits=0):
+        if unusedBits < 0 or unusedBits > 7:
+            raise error.PyAsn1Error('Unused bits overflow %s' % unusedBits)
+        if not value:
+            unusedBits = 0
+        elif unusedBits:
+            lastOctet = octets.oct2int(value[-1])
+            if lastOctet & ((1 << unusedBits) - 1):
+                value = value[:-1] + octets.int2oct(
+                    lastOctet >> unusedBits << unusedBits
+                    )
+        self.__octets = value
+        self.__len = len(value) * 8 - unusedBits
+        self.__bits = None
+
+    def __repr__(self):
+        return '%s(%r, %d)' % (self.__class__.__name__, self.__octets,
+                               self.getUnusedBits())
+
+    def asOctets(self): return self.__octets
+    def asInteger(self):
+        return integer.from_bytes(self.__octets) >> self.getUnusedBits()
+    def asTuple(self):
+        if self.__bits is None:
+            bits = []
+            for x in octets.octs2ints(self.__octets):
+                bits.extend(self.octetBits[x])
+            del bits[self.__len:]
+            self.__bits = tuple(bits)
+        return self.__bits
+
+    def getUnusedBits(self): return -self.__len & 7
+
+    def __len__(self): return self.__len
+    def __iter__(self): return iter(self.asTuple())
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(self.__len)
+            if step != 1:
+                return packBits(self.asTuple()[i])
+            if stop <= start:
+                return BitStringValue()
+            if not start & 7:
+                return BitStringValue(
+                    self.__octets[start>>3:(stop+7)>>3], -stop & 7
+                    )
+            return packInteger(
+                self.asInteger() >> (self.__len - stop) & \
+                ((1 << (stop - start)) - 1), stop - start
+                )
+        if i < 0:
+            i = i + self.__len
+        if i < 0 or i >= self.__len:
+            raise IndexError('bit index out of range')
+        return octets.oct2int(self.__octets[i>>3]) >> (7 - (i & 7)) & 0x01
+
+    def __add__(self, other):
+        if not isinstance(other, BitStringValue):
+            other = packBits(other)
+        if not self.__len & 7:
+            return BitStringValue(self.__octets + other.asOctets(),
+                                  other.getUnusedBits())
+        return packInteger(self.asInteger() << len(other) | other.asInteger(),
+                           self.__len + len(other))
+    def __radd__(self, other): return packBits(other) + self
+    def __mul__(self, value):
+        if not self.__len & 7:
+            return BitStringValue(self.__octets * value)
+        return packBits(self.asTuple() * value)
+    def __rmul__(self, value): return self * value
+
+    def __eq__(self, other):
+        if isinstance(other, BitStringValue):
+            return self.__len == len(other) and \
+                   self.__octets == other.asOctets()
+        return self.asTuple() == other
+    def __ne__(self, other): return not self == other
+    def __lt__(self, other): return self.asTuple() < self.__cmpKey(other)
+    def __le__(self, other): return self.asTuple() <= self.__cmpKey(other)
+    def __gt__(self, other): return self.asTuple() > self.__cmpKey(other)
+    def __ge__(self, other): return self.asTuple() >= self.__cmpKey(other)
+    def __hash__(self): return hash(self.asTuple())
+
+    def __cmpKey(self, other):
+        if isinstance(other, BitStringValue):
+            return other.asTuple()
+        return other
+
+def packInteger(value, length):
+    """BitStringValue of the length least significant bits of value"""
+    if not length:
+        return BitStringValue()
+    size = (length + 7) >> 3
+    value = integer.to_bytes(value << (size * 8 - length))
+    if len(value) < size:
+        value = octets.ints2octs((0,)) * (size - len(value)) + value
+    return BitStringValue(value, size * 8 - length)
+
+def packBits(bits):
+    """BitStringValue of a sequence of 0/1 values"""
+    bits = ''.join([ b and '1' or '0' for b in bits ])
+    return packInteger(bits and int(bits, 2) or 0, len(bits))
+
 class BitString(base.AbstractSimpleAsn1Item):
     tagSet = baseTagSet = tag.initTagSet(
         tag.Tag(tag.tagClassUniversal, tag.tagFormatSimple, 0x03)
@@ -204,27 +313,42 @@ class BitString(base.AbstractSimpleAsn1Item):
 
     def __str__(self): return str(tuple(self))
 
+    def asOctets(self): return self._value.asOctets()
+    def asTuple(self): return self._value.asTuple()
+
     # Immutable sequence object protocol
 
     def __len__(self):
         if self._len is None:
             self._len = len(self._value)
         return self._len
+    def __iter__(self): return iter(self._value)
     def __getitem__(self, i):
         if isinstance(i, slice):
             return self.clone(operator.getitem(self._value, i))
+        elif isinstance(i, str):
+            j = self.__namedValues.getValue(i)
+            if j is None:
+                raise error.PyAsn1Error(
+                    'Unknown bit identifier \'%s\'' % (i,)
+                    )
+            if j >= len(self._value):
+                return 0  # trailing zero bits may be left out
+            return self._value[j]
         else:
             return self._value[i]
 
-    def __add__(self, value): return self.clone(self._value + value)
-    def __radd__(self, value): return self.clone(value + self._value)
+    def __add__(self, value):
+        return self.clone(self._value + self.prettyIn(value))
+    def __radd__(self, value):
+        return self.clone(self.prettyIn(value) + self._value)
     def __mul__(self, value): return self.clone(self._value * value)
     def __rmul__(self, value): return self * value
 
     def prettyIn(self, value):
         r = []
         if not value:
-            return ()
+            return BitStringValue()
         elif isinstance(value, str):
             if value[0] == '\'':
                 if value[-2:] == '\'B':
@@ -237,7 +361,7 @@ class BitString(base.AbstractSimpleAsn1Item):
                             raise error.PyAsn1Error(
                                 'Non-binary BIT STRING initializer %s' % (v,)
                                 )
-                    return tuple(r)
+                    return packBits(r)
                 elif value[-2:] == '\'H':
                     for v in value[1:-2]:
                         i = 4
@@ -245,7 +369,7 @@ class BitString(base.AbstractSimpleAsn1Item):
                         while i:
                             i = i - 1
                             r.append((v>>i)&0x01)
-                    return tuple(r)
+                    return packBits(r)
                 else:
                     raise error.PyAsn1Error(
                         'Bad BIT STRING value notation %s' % (value,)
@@ -260,7 +384,7 @@ class BitString(base.AbstractSimpleAsn1Item):
                     if j >= len(r):
                         r.extend([0]*(j-len(r)+1))
                     r[j] = 1
-                return tuple(r)
+                return packBits(r)
         elif isinstance(value, (tuple, list)):
             r = tuple(value)
             for b in r:
@@ -268,9 +392,11 @@ class BitString(base.AbstractSimpleAsn1Item):
                     raise error.PyAsn1Error(
                         'Non-binary BitString initializer \'%s\'' % (r,)
                         )
-            return r
+            return packBits(r)
         elif isinstance(value, BitString):
-            return tuple(value)
+            return value._value
+        elif isinstance(value, BitStringValue):
+            return value
         else:
             raise error.PyAsn1Error(
                 'Bad BitString initializer type \'%s\'' % (value,)
@@ -707,7 +833,7 @@ class SetOf(base.AbstractConstructedAsn1Item):
     strictConstraints = False
 
     def _cloneComponentValues(self, myClone, cloneValueFlag):
-        idx = 0; l = len(self._componentValues)
+        idx = 0; l = len(self._getComponentValues())
         while idx < l:
             c = self._componentValues[idx]
             if c is not None:
@@ -729,11 +855,17 @@ class SetOf(base.AbstractConstructedAsn1Item):
                 not t.isSuperTypeOf(value, matchTags=False):
             raise error.PyAsn1Error('Component value is constraints-incompatible: %r vs %r' % (value, t))
 
-    def getComponentByPosition(self, idx): return self._componentValues[idx]
+    def getComponentByPosition(self, idx):
+        c = self._componentValues[idx]
+        if self._lazyComponents and isinstance(c, base.LazyComponent):
+            c = self._componentValues[idx] = c.decode()
+        return c
+
     def setComponentByPosition(self, idx, value=None, verifyConstraints=True):
         l = len(self._componentValues)
         if idx >= l:
-            self._componentValues = self._componentValues + (idx-l+1)*[None]
+            # grow in place -- amortized O(1) on append
+            self._componentValues.extend((idx-l+1)*[None])
         if value is None:
             if self._componentValues[idx] is None:
                 if self._componentType is None:
@@ -742,9 +874,13 @@ class SetOf(base.AbstractConstructedAsn1Item):
                 self._componentValuesSet = self._componentValuesSet + 1
             return self
         elif not isinstance(value, base.Asn1Item):
-            if self._componentType is None:
+            if isinstance(value, base.LazyComponent):
+                # checked, if at all, by its decoder on first access
+                verifyConstraints = False
+                self._lazyComponents = 1
+            elif self._componentType is None:
                 raise error.PyAsn1Error('Component type not defined')
-            if isinstance(self._componentType, base.AbstractSimpleAsn1Item):
+            elif isinstance(self._componentType, base.AbstractSimpleAsn1Item):
                 value = self._componentType.clone(value=value)
             else:
                 raise error.PyAsn1Error('Instance value required')
@@ -764,7 +900,7 @@ class SetOf(base.AbstractConstructedAsn1Item):
     def prettyPrint(self, scope=0):
         scope = scope + 1
         r = self.__class__.__name__ + ':\n'        
-        for idx in range(len(self._componentValues)):
+        for idx in range(len(self._getComponentValues())):
             r = r + ' '*scope
             if self._componentValues[idx] is None:
                 r = r + '<empty>'
@@ -797,6 +933,27 @@ class SequenceAndSetBase(base.AbstractConstructedAsn1Item):
             self, componentType.clone(), tagSet, subtypeSpec, sizeSpec
         )
         self._componentTypeLen = len(self._componentType)
+        # all component slots are known in advance
+        self._componentValues = self._componentTypeLen*[None]
+
+    # Unset trailing slots do not count as components
+    def __len__(self):
+        l = len(self._componentValues)
+        while l and self._componentValues[l-1] is None:
+            l = l - 1
+        return l
+
+    def __eq__(self, other):
+        return self is other and True or self._getComponentValues()[:len(self)] == other
+    def __ne__(self, other): return self._getComponentValues()[:len(self)] != other
+    def __lt__(self, other): return self._getComponentValues()[:len(self)] < other
+    def __le__(self, other): return self._getComponentValues()[:len(self)] <= other
+    def __gt__(self, other): return self._getComponentValues()[:len(self)] > other
+    def __ge__(self, other): return self._getComponentValues()[:len(self)] >= other
+    if sys.version_info[0] <= 2:
+        def __nonzero__(self): return self._componentValuesSet > 0
+    else:
+        def __bool__(self): return self._componentValuesSet > 0
 
     def __getitem__(self, idx):
         if isinstance(idx, str):
@@ -811,7 +968,7 @@ class SequenceAndSetBase(base.AbstractConstructedAsn1Item):
             base.AbstractConstructedAsn1Item.__setitem__(self, idx, value)
         
     def _cloneComponentValues(self, myClone, cloneValueFlag):
-        idx = 0; l = len(self._componentValues)
+        idx = 0; l = len(self._getComponentValues())
         while idx < l:
             c = self._componentValues[idx]
             if c is not None:
@@ -846,11 +1003,14 @@ class SequenceAndSetBase(base.AbstractConstructedAsn1Item):
 
     def getComponentByPosition(self, idx):
         try:
-            return self._componentValues[idx]
+            c = self._componentValues[idx]
         except IndexError:
             if idx < self._componentTypeLen:
                 return
             raise
+        if self._lazyComponents and isinstance(c, base.LazyComponent):
+            c = self._componentValues[idx] = c.decode()
+        return c
     def setComponentByPosition(self, idx, value=None,
                                verifyConstraints=True,
                                exactTypes=False,
@@ -858,18 +1018,23 @@ class SequenceAndSetBase(base.AbstractConstructedAsn1Item):
                                matchConstraints=True):
         l = len(self._componentValues)
         if idx >= l:
-            self._componentValues = self._componentValues + (idx-l+1)*[None]
+            self._componentValues.extend((idx-l+1)*[None])
         if value is None:
             if self._componentValues[idx] is None:
                 self._componentValues[idx] = self._componentType.getTypeByPosition(idx).clone()
                 self._componentValuesSet = self._componentValuesSet + 1
             return self
         elif not isinstance(value, base.Asn1Item):
-            t = self._componentType.getTypeByPosition(idx)
-            if isinstance(t, base.AbstractSimpleAsn1Item):
-                value = t.clone(value=value)
+            if isinstance(value, base.LazyComponent):
+                # checked, if at all, by its decoder on first access
+                verifyConstraints = False
+                self._lazyComponents = 1
             else:
-                raise error.PyAsn1Error('Instance value required')
+                t = self._componentType.getTypeByPosition(idx)
+                if isinstance(t, base.AbstractSimpleAsn1Item):
+                    value = t.clone(value=value)
+                else:
+                    raise error.PyAsn1Error('Instance value required')
         if verifyConstraints:
             if self._componentTypeLen:
                 self._verifyComponent(idx, value)
@@ -879,6 +1044,11 @@ class SequenceAndSetBase(base.AbstractConstructedAsn1Item):
         self._componentValues[idx] = value
         return self
 
+    def clear(self):
+        self._componentValues = self._componentTypeLen*[None]
+        self._componentValuesSet = 0
+        self._lazyComponents = 0
+
     def getNameByPosition(self, idx):
         if self._componentTypeLen:
             return self._componentType.getNameByPosition(idx)
@@ -898,10 +1068,10 @@ class SequenceAndSetBase(base.AbstractConstructedAsn1Item):
         while idx:
             idx = idx - 1
             if self._componentType[idx].isDefaulted:
-                if self.getComponentByPosition(idx) is None:
+                if self._componentValues[idx] is None:
                     self.setComponentByPosition(idx)
             elif not self._componentType[idx].isOptional:
-                if self.getComponentByPosition(idx) is None:
+                if self._componentValues[idx] is None:
                     raise error.PyAsn1Error(
                         'Uninitialized component #%s at %r' % (idx, self)
                         )
@@ -909,7 +1079,7 @@ class SequenceAndSetBase(base.AbstractConstructedAsn1Item):
     def prettyPrint(self, scope=0):
         scope = scope + 1
         r = self.__class__.__name__ + ':\n'
-        for idx in range(len(self._componentValues)):
+        for idx in range(len(self._getComponentValues())):
             if self._componentValues[idx] is not None:
                 r = r + ' '*scope
                 componentType = self.getComponentType()
@@ -1004,33 +1174,33 @@ class Choice(Set):
     _currentIdx = None
 
     def __eq__(self, other):
-        if self._componentValues:
+        if self._currentIdx is not None:
             return self._componentValues[self._currentIdx] == other
         return NotImplemented
     def __ne__(self, other):
-        if self._componentValues:
+        if self._currentIdx is not None:
             return self._componentValues[self._currentIdx] != other
         return NotImplemented
     def __lt__(self, other):
-        if self._componentValues:
+        if self._currentIdx is not None:
             return self._componentValues[self._currentIdx] < other
         return NotImplemented
     def __le__(self, other):
-        if self._componentValues:
+        if self._currentIdx is not None:
             return self._componentValues[self._currentIdx] <= other
         return NotImplemented
     def __gt__(self, other):
-        if self._componentValues:
+        if self._currentIdx is not None:
             return self._componentValues[self._currentIdx] > other
         return NotImplemented
     def __ge__(self, other):
-        if self._componentValues:
+        if self._currentIdx is not None:
             return self._componentValues[self._currentIdx] >= other
         return NotImplemented
     if sys.version_info[0] <= 2:
-        def __nonzero__(self): return bool(self._componentValues)
+        def __nonzero__(self): return self._currentIdx is not None
     else:
-        def __bool__(self): return bool(self._componentValues)
+        def __bool__(self): return self._currentIdx is not None
 
     def __len__(self): return self._currentIdx is not None and 1 or 0
     
@@ -1060,7 +1230,7 @@ class Choice(Set):
     def setComponentByPosition(self, idx, value=None, verifyConstraints=True):
         l = len(self._componentValues)
         if idx >= l:
-            self._componentValues = self._componentValues + (idx-l+1)*[None]
+            self._componentValues.extend((idx-l+1)*[None])
         if self._currentIdx is not None:
             self._componentValues[self._currentIdx] = None
         if value is None:
@@ -1,7 +1,11 @@
 from sys import path, version_info
 from os.path import sep
 path.insert(1, path[0]+sep+'ber')
-import test_encoder, test_decoder
+import test_encoder, test_decoder, test_scanner
+if version_info[0:2] >= (3, 7):
+    import test_aio
+if version_info[0:2] >= (3, 8):
+    import test_parallel
 from pyasn1.error import PyAsn1Error
 if version_info[0:2] < (2, 7) or \
    version_info[0:2] in ( (3, 0), (3, 1) ):
@@ -14,8 +18,12 @@ else:
 
 suite = unittest.TestSuite()
 loader = unittest.TestLoader()
-for m in (test_encoder, test_decoder):
+for m in (test_encoder, test_decoder, test_scanner):
     suite.addTest(loader.loadTestsFromModule(m))
+if version_info[0:2] >= (3, 7):
+    suite.addTest(loader.loadTestsFromModule(test_aio))
+if version_info[0:2] >= (3, 8):
+    suite.addTest(loader.loadTestsFromModule(test_parallel))
 
 def runTests(): unittest.TextTestRunner(verbosity=2).run(suite)
 
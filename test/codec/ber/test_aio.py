@@ -0,0 +1,87 @@
+import asyncio
+from pyasn1.type import univ
+from pyasn1.codec.ber import aio
+from pyasn1.codec.cer import decoder as cer_decoder, encoder as cer_encoder
+from pyasn1.compat.octets import ints2octs, str2octs
+from pyasn1.error import SubstrateUnderrunError
+import unittest
+
+class LoopbackTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_echo(self, client, asn1Spec=None, decodeFun=aio.decoder.decode,
+                 encodeFun=aio.encoder.encode):
+        async def echo(reader, writer):
+            # decode incoming PDUs and send them back re-encoded
+            encoder = aio.StreamEncoder(writer, encodeFun)
+            async for value in aio.StreamDecoder(reader, asn1Spec, decodeFun):
+                await encoder.write(value)
+            await encoder.close()
+
+        async def main():
+            server = await asyncio.start_server(echo, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                return await client(reader, writer)
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        return self.loop.run_until_complete(main())
+
+    def testEcho(self):
+        values = [univ.Integer(12), univ.OctetString('fox'*1000)]
+
+        async def client(reader, writer):
+            await aio.StreamEncoder(writer).write(*values)
+            writer.write_eof()
+            return [ x async for x in aio.StreamDecoder(reader) ]
+
+        assert self.run_echo(client) == values
+
+    def testPartialWrites(self):
+        substrate = ints2octs((48, 128, 2, 1, 1, 4, 2, 102, 111, 0, 0))
+
+        async def client(reader, writer):
+            for idx in range(len(substrate)):
+                writer.write(substrate[idx:idx+1])
+                await writer.drain()
+            writer.write_eof()
+            return [ x async for x in aio.StreamDecoder(reader) ]
+
+        assert self.run_echo(client) == [[1, str2octs('fo')]]
+
+    def testCer(self):
+        value = univ.OctetString('Q'*1001)
+
+        async def client(reader, writer):
+            await aio.StreamEncoder(writer, cer_encoder.encode).write(value)
+            writer.write_eof()
+            return [ x async for x in aio.StreamDecoder(
+                reader, asn1Spec=univ.OctetString(),
+                decodeFun=cer_decoder.decode) ]
+
+        assert self.run_echo(
+            client, univ.OctetString(), cer_decoder.decode, cer_encoder.encode
+            ) == [value]
+
+    def testTruncated(self):
+        async def client():
+            reader = asyncio.StreamReader()
+            reader.feed_data(ints2octs((4, 3, 102, 111)))
+            reader.feed_eof()
+            return [ x async for x in aio.StreamDecoder(reader) ]
+
+        try:
+            self.loop.run_until_complete(client())
+        except SubstrateUnderrunError:
+            pass
+        else:
+            assert 0, 'truncated stream tolerated'
+
+if __name__ == '__main__': unittest.main()
@@ -1,8 +1,9 @@
-from pyasn1.type import tag, namedtype, univ
+from pyasn1.type import tag, namedtype, univ, constraint
 from pyasn1.codec.ber import decoder
 from pyasn1.compat.octets import ints2octs, str2octs, null
-from pyasn1.error import PyAsn1Error
+from pyasn1.error import PyAsn1Error, SubstrateUnderrunError
 from sys import version_info
+import mmap, tempfile, io, gc, weakref
 if version_info[0:2] < (2, 7) or \
    version_info[0:2] in ( (3, 0), (3, 1) ):
     try:
@@ -16,6 +17,84 @@ class LargeTagDecoderTestCase(unittest.TestCase):
     def testLargeTag(self):
         assert decoder.decode(ints2octs((127, 141, 245, 182, 253, 47, 3, 2, 1, 1))) == (1, null)
 
+class HeaderCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.decoder = decoder.Decoder(decoder.tagMap, decoder.typeMap)
+        self.cache = self.decoder.getHeaderCache()
+
+    def testLongTag(self):
+        substrate = ints2octs((127, 141, 245, 182, 253, 47, 3, 2, 1, 1))
+        assert self.decoder(substrate) == (1, null)
+        assert self.decoder(substrate) == (1, null)
+        stats = self.cache.getStats()
+        assert stats['tagHits'] == 2
+        assert stats['tagMisses'] == 2
+        assert stats['chainHits'] == 1
+
+    def testSharedTagSets(self):
+        substrate = ints2octs((127, 141, 245, 182, 253, 47, 3, 2, 1, 1))
+        tagSet = self.cache.decodeTag(substrate)[0]
+        assert self.cache.decodeTag(substrate)[0] is tagSet
+        chain = self.cache.decodeTag(substrate[7:], tagSet)[0]
+        assert self.cache.decodeTag(substrate[7:], tagSet)[0] is chain
+        assert chain == tag.TagSet(
+            (), tag.Tag(tag.tagClassUniversal, tag.tagFormatSimple, 2),
+            tag.Tag(tag.tagClassApplication, tag.tagFormatConstructed, 0xdeadbeaf)
+            )
+
+    def testBounded(self):
+        cache = decoder.HeaderCache(maxSize=1)
+        cache.decodeTag(ints2octs((2, 1, 1)))
+        cache.decodeTag(ints2octs((4, 0)))
+        cache.decodeTag(ints2octs((4, 0)))
+        assert cache.getStats()['tags'] == 1
+        assert cache.getStats()['tagMisses'] == 3
+
+class DispatchCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.decoder = decoder.Decoder(decoder.tagMap, decoder.typeMap)
+        self.cache = self.decoder.getDispatchCache()
+
+    def testReuse(self):
+        s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('number', univ.Integer()),
+            namedtype.OptionalNamedType('name', univ.OctetString())
+            ))
+        substrate = ints2octs((48, 6, 2, 1, 12, 4, 1, 120))
+        self.decoder(substrate, asn1Spec=s)
+        size = len(self.cache)
+        assert size
+        assert self.decoder(substrate, asn1Spec=s)[0] == [12, str2octs('x')]
+        assert len(self.cache) == size
+
+    def testCollectedSpec(self):
+        substrate = ints2octs((2, 1, 12))
+        s = univ.Integer().subtype(
+            subtypeSpec=constraint.SingleValueConstraint(12)
+            )
+        assert self.decoder(substrate, asn1Spec=s)[0] == 12
+        ref = weakref.ref(s)
+        del s
+        gc.collect()
+        assert ref() is None, 'spec kept alive by dispatch cache'
+        for idx in range(10):
+            # whichever spec reuses the id, it does not hit stale entry
+            s = univ.Integer().subtype(
+                subtypeSpec=constraint.SingleValueConstraint(13)
+                )
+            try:
+                self.decoder(substrate, asn1Spec=s)
+            except PyAsn1Error:
+                pass
+            else:
+                assert 0, 'stale dispatch cache entry used'
+
+    def testBounded(self):
+        cache = decoder.DispatchCache(maxSize=2)
+        for t in (univ.Integer(), univ.Boolean(), univ.Null()):
+            cache.put(t.getTagSet(), t, None, t, decoder.stDecodeValue)
+        assert len(cache) <= 2
+
 class IntegerDecoderTestCase(unittest.TestCase):
     def testPosInt(self):
         assert decoder.decode(ints2octs((2, 1, 12))) == (12, null)
@@ -35,6 +114,23 @@ class IntegerDecoderTestCase(unittest.TestCase):
         assert decoder.decode(
             ints2octs((2, 9, 255, 0, 0, 0, 0, 0, 0, 0, 1))
             ) == (-0xffffffffffffffff, null)
+    def testBigInt(self):
+        assert decoder.decode(
+            ints2octs((2, 130, 2, 1, 1) + (0,) * 512)
+            ) == (1 << 4096, null)
+    def testBigNegInt(self):
+        assert decoder.decode(
+            ints2octs((2, 130, 2, 0, 128) + (0,) * 511)
+            ) == (-(1 << 4095), null)
+    def testSingleOctets(self):
+        for x in range(256):
+            assert decoder.decode(
+                ints2octs((2, 1, x))
+                ) == (x - (x >> 7) * 256, null)
+    def testEnumerated(self):
+        assert decoder.decode(
+            ints2octs((10, 2, 255, 127))
+            ) == (-129, null)
     def testSpec(self):
         try:
             decoder.decode(
@@ -89,6 +185,20 @@ class BitStringDecoderTestCase(unittest.TestCase):
         assert decoder.decode(
             ints2octs((35, 128, 3, 2, 0, 169, 3, 2, 1, 138, 0, 0))
             ) == ((1,0,1,0,1,0,0,1,1,0,0,0,1,0,1), null)
+    def testUnalignedChunks(self):
+        assert decoder.decode(
+            ints2octs((35, 8, 3, 2, 5, 160, 3, 2, 6, 192))
+            ) == ((1,0,1,1,1), null)
+    def testUnusedBits(self):
+        assert decoder.decode(
+            ints2octs((3, 3, 1, 169, 139))
+            )[0].asOctets() == ints2octs((169, 138))
+    def testLong(self):
+        value = decoder.decode(
+            ints2octs((3, 130, 1, 1, 0) + (85,) * 256)
+            )[0]
+        assert len(value) == 2048
+        assert value[2046] == 0 and value[2047] == 1
     def testDefModeChunkedSubst(self):
         assert decoder.decode(
             ints2octs((35, 8, 3, 2, 0, 169, 3, 2, 1, 138)),
@@ -127,6 +237,20 @@ class OctetStringDecoderTestCase(unittest.TestCase):
             ints2octs((36, 128, 4, 4, 81, 117, 105, 99, 4, 4, 107, 32, 98, 114, 4, 4, 111, 119, 110, 32, 4, 3, 102, 111, 120, 0, 0)),
             substrateFun=lambda a,b,c: (b,c)
             ) == (ints2octs((4, 4, 81, 117, 105, 99, 4, 4, 107, 32, 98, 114, 4, 4, 111, 119, 110, 32, 4, 3, 102, 111, 120, 0, 0)), -1)
+    def testChunkedConstraint(self):
+        s = univ.OctetString().subtype(
+            subtypeSpec=constraint.ValueSizeConstraint(2, 2)
+            )
+        assert decoder.decode(
+            ints2octs((36, 6, 4, 1, 81, 4, 1, 117)), asn1Spec=s
+            ) == (str2octs('Qu'), null)
+    def testBadChunk(self):
+        try:
+            decoder.decode(ints2octs((36, 3, 2, 1, 5)))
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'non-OCTET STRING chunk tolerated'
         
 class ExpTaggedOctetStringDecoderTestCase(unittest.TestCase):
     def setUp(self):
@@ -168,6 +292,42 @@ class ExpTaggedOctetStringDecoderTestCase(unittest.TestCase):
             substrateFun=lambda a,b,c: (b,c)
             ) == (ints2octs((36, 128, 4, 15, 81, 117, 105, 99, 107, 32, 98, 114, 111, 119, 110, 32, 102, 111, 120, 0, 0, 0, 0)), -1)
   
+class EndOfOctetsDecoderTestCase(unittest.TestCase):
+    def testEmptySequenceOf(self):
+        assert decoder.decode(
+            ints2octs((48, 128, 0, 0, 5, 0))
+            ) == (univ.SequenceOf(), ints2octs((5, 0)))
+    def testNonEmptyMarker(self):
+        for substrate in (
+                (0, 1, 0),
+                (48, 128, 0, 1, 0, 0, 0),
+                (48, 128, 2, 1, 1, 0, 1, 0, 0, 0),
+                (36, 128, 4, 1, 102, 0, 1, 0, 0, 0),
+                (160, 128, 0, 1, 0, 0, 0)
+                ):
+            for decodeFun in decoder.decode, decoder.iterativeDecode:
+                try:
+                    decodeFun(ints2octs(substrate))
+                except PyAsn1Error:
+                    pass
+                else:
+                    assert 0, 'non-empty EOO tolerated in %s' % (substrate,)
+    def testNonEmptyMarkerCompiled(self):
+        s = univ.SequenceOf(componentType=univ.Integer())
+        try:
+            decoder.decode.compile(s)(ints2octs((48, 128, 2, 1, 1, 0, 1, 0, 0, 0)))
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'non-empty EOO tolerated'
+    def testMissingMarker(self):
+        try:
+            decoder.decode(ints2octs((101, 128, 5, 0, 5, 0)))
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'missing EOO tolerated'
+
 class NullDecoderTestCase(unittest.TestCase):
     def testNull(self):
         assert decoder.decode(ints2octs((5, 0))) == (null, null)
@@ -646,4 +806,640 @@ class AnyDecoderTestCase(unittest.TestCase):
             substrateFun=lambda a,b,c: (b,c)
         ) == (ints2octs((164, 5, 4, 3, 102, 111, 120)), 7)
 
+class CompiledDecoderTestCase(unittest.TestCase):
+    def setUp(self):
+        c = univ.Choice(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('number', univ.Integer()),
+            namedtype.NamedType('string', univ.OctetString())
+            ))
+        self.s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('place-holder', univ.Null(null)),
+            namedtype.OptionalNamedType('first-name', univ.OctetString(null)),
+            namedtype.DefaultedNamedType('age', univ.Integer(33)),
+            namedtype.NamedType('choice', c.subtype(
+                explicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 0)
+                )),
+            namedtype.OptionalNamedType('list', univ.SequenceOf(
+                componentType=c
+                ))
+            ))
+        self.decode = decoder.decode.compile(self.s)
+
+    def testCached(self):
+        assert decoder.decode.compile(self.s) is self.decode
+
+    def testDefMode(self):
+        substrate = ints2octs((48, 20, 5, 0, 2, 1, 1, 160, 3, 2, 1, 12, 48, 8, 4, 3, 102, 111, 120, 2, 1, 13))
+        assert self.decode(substrate) == decoder.decode(substrate, asn1Spec=self.s)
+        s, rest = self.decode(substrate + ints2octs((1,)))
+        assert rest == ints2octs((1,))
+        assert s.getComponentByPosition(1) is None
+        assert s.getComponentByPosition(2) == 1
+        assert s.getComponentByPosition(3).getComponent() == 12
+        assert s.getComponentByPosition(4).getComponentByPosition(0).getComponent() == str2octs('fox')
+
+    def testDefaulted(self):
+        substrate = ints2octs((48, 12, 5, 0, 4, 3, 102, 111, 120, 160, 3, 2, 1, 12))
+        s, rest = self.decode(substrate)
+        assert s == decoder.decode(substrate, asn1Spec=self.s)[0]
+        assert s.getComponentByPosition(2) == 33
+
+    def testIndefMode(self):
+        substrate = ints2octs((48, 128, 5, 0, 160, 128, 2, 1, 12, 0, 0, 48, 128, 2, 1, 13, 0, 0, 0, 0))
+        assert self.decode(substrate) == decoder.decode(substrate, asn1Spec=self.s)
+
+    def testMissingComponent(self):
+        try:
+            self.decode(ints2octs((48, 2, 5, 0)))
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'missing component tolerated'
+
+    def testShortSubstrate(self):
+        try:
+            self.decode(ints2octs((48, 9, 5, 0, 160, 3, 2, 1)))
+        except SubstrateUnderrunError:
+            pass
+        else:
+            assert 0, 'short substrate tolerated'
+
+    def testUntaggedAny(self):
+        s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('algorithm', univ.ObjectIdentifier()),
+            namedtype.OptionalNamedType('parameters', univ.Any())
+            ))
+        substrate = ints2octs((48, 6, 6, 2, 42, 3, 5, 0, 48, 4, 6, 2, 42, 3))
+        values = decoder.decodeMany(substrate, asn1Spec=s)
+        assert len(values) == 2
+        assert values[0].getComponentByPosition(1) == ints2octs((5, 0))
+        assert values[1].getComponentByPosition(1) is None
+        assert decoder.decode.decodePaths(
+            substrate[:8], s, ['parameters']
+            ) == ({'parameters': ints2octs((5, 0))}, null)
+
+    def testUntaggedAnyAlternative(self):
+        c = univ.Choice(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('number', univ.Integer()),
+            namedtype.NamedType('any', univ.Any())
+            ))
+        assert decoder.decode.compile(c)(
+            ints2octs((2, 1, 12))
+            )[0].getComponent() == 12
+
+    def testAmbiguousSpec(self):
+        s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.OptionalNamedType('first', univ.Integer()),
+            namedtype.OptionalNamedType('second', univ.Integer()),
+            namedtype.NamedType('name', univ.OctetString())
+            ))
+        substrate = ints2octs((48, 5, 4, 3, 102, 111, 120))
+        for _ in range(2):
+            assert decoder.decodeMany(substrate, asn1Spec=s)[0].getComponentByPosition(2) == str2octs('fox')
+        assert decoder.decode.compile(s).__class__ is decoder.DecoderPlan
+
+    def testPlanCacheBounded(self):
+        plans = decoder.decode.getPlanCache()
+        for _ in range(plans.maxSize + 10):
+            decoder.decodeMany(ints2octs((2, 1, 12)), asn1Spec=univ.Integer())
+        assert len(plans) <= plans.maxSize
+
+class PathsDecoderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('number', univ.Integer()),
+            namedtype.OptionalNamedType('flag', univ.Boolean()),
+            namedtype.DefaultedNamedType('version', univ.Integer(1).subtype(
+                implicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 1)
+                )),
+            namedtype.NamedType('record', univ.Sequence(
+                componentType=namedtype.NamedTypes(
+                    namedtype.NamedType('name', univ.OctetString()),
+                    namedtype.NamedType('list', univ.SequenceOf(
+                        componentType=univ.Integer()
+                        ))
+                    )
+                ).subtype(
+                    explicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 0)
+                ))
+            ))
+
+    def testDefMode(self):
+        values, rest = decoder.decodePaths(
+            ints2octs((48, 18, 2, 1, 12, 160, 13, 48, 11, 4, 3, 102, 111, 120, 48, 4, 2, 2, 1, 0, 1)),
+            self.s, ['record.name', 'version', 'flag']
+            )
+        assert values == {'record.name': str2octs('fox'), 'version': 1}
+        assert rest == ints2octs((1,))
+
+    def testIndefMode(self):
+        values, rest = decoder.decodePaths(
+            ints2octs((48, 128, 2, 1, 12, 1, 1, 255, 160, 128, 48, 128, 4, 3, 102, 111, 120, 48, 128, 2, 2, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0)),
+            self.s, ['number', 'record.list', 'record', 'flag']
+            )
+        assert values['number'] == 12
+        assert values['flag'] == 1
+        assert values['record.list'] == [256]
+        assert values['record'][0] == str2octs('fox')
+        assert not rest
+
+    def testSkipped(self):
+        # broken but unwanted component does not get decoded
+        values, rest = decoder.decodePaths(
+            ints2octs((48, 12, 2, 1, 12, 160, 7, 48, 5, 4, 3, 102, 111, 120)),
+            self.s, ['number']
+            )
+        assert values == {'number': 12}
+
+    def testUnknownPath(self):
+        try:
+            decoder.decodePaths(
+                ints2octs((48, 3, 2, 1, 12)), self.s, ['size']
+                )
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'unknown component name tolerated'
+
+    def testPathThroughSequenceOf(self):
+        try:
+            decoder.decodePaths(
+                ints2octs((48, 18, 2, 1, 12, 160, 13, 48, 11, 4, 3, 102, 111, 120, 48, 4, 2, 2, 1, 0)),
+                self.s, ['record.list.x']
+                )
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'path through SEQUENCE OF tolerated'
+
+    def testPathThroughScalar(self):
+        try:
+            decoder.decodePaths(
+                ints2octs((48, 3, 2, 1, 12)), self.s, ['number.foo']
+                )
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'path through scalar tolerated'
+
+class LazyDecoderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('number', univ.Integer()),
+            namedtype.NamedType('record', univ.Sequence(
+                componentType=namedtype.NamedTypes(
+                    namedtype.NamedType('name', univ.OctetString())
+                    )
+                )),
+            namedtype.NamedType('list', univ.SequenceOf(
+                componentType=univ.Integer()
+                ))
+            ))
+        self.substrate = ints2octs(
+            (48, 18, 2, 1, 12, 48, 5, 4, 3, 102, 111, 120, 48, 6, 2, 1, 1, 2)
+            )
+
+    def testDefMode(self):
+        s, rest = decoder.decode(
+            self.substrate + ints2octs((1, 2)), asn1Spec=self.s, lazy=True
+            )
+        assert not rest
+        assert s == decoder.decode(
+            self.substrate + ints2octs((1, 2)), asn1Spec=self.s
+            )[0]
+        assert s['record']['name'] == str2octs('fox')
+        assert s['list'] == [1, 2]
+
+    def testUntagged(self):
+        s, rest = decoder.decode(
+            self.substrate + ints2octs((1, 2)), lazy=True
+            )
+        assert not rest
+        assert s[1][0] == str2octs('fox')
+        assert s[2] == [1, 2]
+
+    def testIndefMode(self):
+        s, rest = decoder.decode(
+            ints2octs((48, 128, 2, 1, 12, 48, 128, 4, 3, 102, 111, 120, 0, 0, 48, 6, 2, 1, 1, 2, 1, 2, 0, 0)),
+            asn1Spec=self.s, lazy=True
+            )
+        assert not rest
+        assert s['record']['name'] == str2octs('fox')
+        assert s['list'] == [1, 2]
+
+    def testDeferredErrors(self):
+        # broken but untouched component does not get in the way
+        s, rest = decoder.decode(
+            self.substrate + ints2octs((5, 2)), asn1Spec=self.s, lazy=True
+            )
+        assert s['number'] == 12
+        assert s['record']['name'] == str2octs('fox')
+        try:
+            s['list']
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'broken component decoded'
+
+    def testMutableBuffer(self):
+        substrate = bytearray(self.substrate + ints2octs((1, 2)))
+        s, rest = decoder.decode(substrate, asn1Spec=self.s, lazy=True)
+        substrate[9:12] = ints2octs((99, 97, 116))
+        substrate.extend(ints2octs((0, 0)))  # not exported, resizable
+        assert s['record']['name'] == str2octs('fox')
+        assert s['list'] == [1, 2]
+
+class NativeDecoderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('flag', univ.Boolean()),
+            namedtype.DefaultedNamedType('version', univ.Integer(1)),
+            namedtype.OptionalNamedType('oid', univ.ObjectIdentifier()),
+            namedtype.NamedType('choice', univ.Choice(
+                componentType=namedtype.NamedTypes(
+                    namedtype.NamedType('null', univ.Null()),
+                    namedtype.NamedType('str', univ.OctetString().subtype(
+                        implicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 0)
+                        ))
+                    )
+                )),
+            namedtype.NamedType('tagged', univ.Integer().subtype(
+                explicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatConstructed, 1)
+                )),
+            namedtype.OptionalNamedType('list', univ.SequenceOf(
+                componentType=univ.Integer()
+                ))
+            ))
+        self.substrate = ints2octs(
+            (48, 15, 1, 1, 255, 6, 2, 43, 6, 128, 1, 120, 161, 3, 2, 1, 5)
+            )
+        self.value = {
+            'flag': True, 'version': 1, 'oid': (1, 3, 6),
+            'choice': ('str', str2octs('x')), 'tagged': 5
+            }
+
+    def testDefMode(self):
+        assert decoder.decode(
+            self.substrate, asn1Spec=self.s, native=True
+            ) == (self.value, null)
+
+    def testIndefMode(self):
+        assert decoder.decode(
+            ints2octs((48, 128, 1, 1, 255, 6, 2, 43, 6, 128, 1, 120, 161, 128, 2, 1, 5, 0, 0, 48, 128, 2, 1, 1, 0, 0, 0, 0)),
+            asn1Spec=self.s, native=True
+            ) == (dict(self.value, list=[1]), null)
+
+    def testGenericValue(self):
+        assert decoder.nativeValue(
+            decoder.decode(self.substrate, asn1Spec=self.s)[0]
+            ) == self.value
+
+    def testUntagged(self):
+        assert decoder.decode(
+            ints2octs((48, 13, 4, 3, 102, 111, 120, 36, 4, 4, 2, 102, 111, 5, 0)),
+            native=True
+            ) == ([str2octs('fox'), str2octs('fo'), None], null)
+
+    def testMissingComponent(self):
+        try:
+            decoder.decode(
+                ints2octs((48, 3, 1, 1, 255)), asn1Spec=self.s, native=True
+                )
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'missing component tolerated'
+
+class TrustedDecoderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('number', univ.Integer().subtype(
+                subtypeSpec=constraint.ValueRangeConstraint(0, 10)
+                )),
+            namedtype.DefaultedNamedType('version', univ.Integer(1)),
+            namedtype.NamedType('list', univ.SequenceOf(
+                componentType=univ.OctetString(),
+                sizeSpec=constraint.ValueSizeConstraint(1, 1)
+                ))
+            ))
+
+    def testValue(self):
+        substrate = ints2octs((48, 8, 2, 1, 5, 48, 3, 4, 1, 120))
+        assert decoder.decode(
+            substrate, asn1Spec=self.s, trusted=True
+            ) == decoder.decode(substrate, asn1Spec=self.s)
+
+    def testConstraint(self):
+        substrate = ints2octs((48, 11, 2, 1, 99, 48, 6, 4, 1, 120, 4, 1, 121))
+        try:
+            decoder.decode(substrate, asn1Spec=self.s)
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'constraint violation tolerated'
+        s, rest = decoder.decode(substrate, asn1Spec=self.s, trusted=True)
+        assert not rest
+        assert s[0] == 99 and s[1] == 1 and len(s[2]) == 2
+
+    def testIndefMode(self):
+        s, rest = decoder.decode(
+            ints2octs((48, 128, 2, 1, 99, 48, 128, 4, 1, 120, 4, 1, 121, 0, 0, 0, 0)),
+            asn1Spec=self.s, trusted=True
+            )
+        assert not rest
+        assert s[0] == 99 and len(s[2]) == 2
+
+    def testUntagged(self):
+        assert decoder.decode(
+            ints2octs((48, 6, 2, 1, 12, 4, 1, 120)), trusted=True
+            )[0] == decoder.decode(ints2octs((48, 6, 2, 1, 12, 4, 1, 120)))[0]
+
+class IterativeDecoderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('number', univ.Integer()),
+            namedtype.NamedType('record', univ.Sequence(
+                componentType=namedtype.NamedTypes(
+                    namedtype.NamedType('name', univ.OctetString())
+                    )
+                ).subtype(
+                    explicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 0)
+                )),
+            namedtype.NamedType('list', univ.SequenceOf(
+                componentType=univ.Integer()
+                )),
+            namedtype.NamedType('choice', univ.Choice(
+                componentType=namedtype.NamedTypes(
+                    namedtype.NamedType('null', univ.Null()),
+                    namedtype.NamedType('text', univ.OctetString())
+                    )
+                ))
+            ))
+
+    def __decode(self, substrate):
+        for asn1Spec in (self.s, None):
+            value, rest = decoder.iterativeDecode(substrate, asn1Spec=asn1Spec)
+            assert repr((value, rest)) == repr(
+                decoder.decode(substrate, asn1Spec=asn1Spec)
+                )
+        return value, rest
+
+    def testDefMode(self):
+        value, rest = self.__decode(
+            ints2octs((48, 22, 2, 1, 12, 160, 7, 48, 5, 4, 3, 102, 111, 120, 48, 6, 2, 1, 1, 2, 1, 2, 5, 0, 1))
+            )
+        assert value[1][0] == str2octs('fox')
+        assert value[2] == [1, 2]
+        assert rest == ints2octs((1,))
+
+    def testIndefMode(self):
+        value, rest = self.__decode(
+            ints2octs((48, 128, 2, 1, 12, 160, 128, 48, 128, 4, 3, 102, 111, 120, 0, 0, 0, 0, 48, 128, 2, 1, 1, 2, 1, 2, 0, 0, 36, 128, 4, 1, 120, 0, 0, 0, 0))
+            )
+        assert value[1][0] == str2octs('fox')
+        assert value[3] == str2octs('x')
+        assert not rest
+
+    def testEmpty(self):
+        assert decoder.iterativeDecode(ints2octs((48, 0, 2, 1, 1))) == (
+            [], ints2octs((2, 1, 1))
+            )
+
+    def testMissingEoo(self):
+        try:
+            decoder.iterativeDecode(ints2octs((48, 128, 2, 1, 12)))
+        except SubstrateUnderrunError:
+            pass
+        else:
+            assert 0, 'missing EOO tolerated'
+
+    def testDeepNesting(self):
+        depth = 5000
+        value, rest = decoder.iterativeDecode(
+            ints2octs((48, 128)) * depth + ints2octs((2, 1, 7)) + \
+            ints2octs((0, 0)) * depth
+            )
+        while depth:
+            value = value[0]
+            depth = depth - 1
+        assert value == 7
+        assert not rest
+
+class OctetBufferDecoderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.substrate = ints2octs((48, 5, 2, 1, 12, 5, 0, 2, 1, 1))
+
+    def testBytearray(self):
+        value, rest = decoder.decode(bytearray(self.substrate))
+        assert value == [12, null]
+        assert rest == ints2octs((2, 1, 1))
+
+    def testMemoryview(self):
+        value, rest = decoder.decode(memoryview(self.substrate))
+        assert value == [12, null]
+        assert isinstance(rest, memoryview)
+        assert rest == ints2octs((2, 1, 1))
+
+    def testMmap(self):
+        f = tempfile.TemporaryFile()
+        try:
+            f.write(self.substrate)
+            f.flush()
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                value, rest = decoder.decode(m)
+                assert value == [12, null]
+                value, rest = decoder.decode(rest)
+                assert value == 1
+                assert not rest
+                del value, rest
+            finally:
+                m.close()
+        finally:
+            f.close()
+
+    def testOctetsRemainder(self):
+        value, rest = decoder.decode(self.substrate)
+        assert isinstance(rest, type(null))
+        assert rest == ints2octs((2, 1, 1))
+
+    def testBadType(self):
+        try:
+            decoder.decode(12)
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'bad octet stream type tolerated'
+
+class StreamDecoderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.substrate = ints2octs(
+            (2, 1, 12) +
+            (48, 128, 2, 1, 1, 36, 128, 4, 2, 102, 111, 0, 0, 0, 0) +
+            (127, 141, 245, 182, 253, 47, 3, 2, 1, 1) +
+            (4, 129, 3, 102, 111, 120)
+            )
+
+    def testFileObject(self):
+        assert list(decoder.decodeStream(io.BytesIO(self.substrate))) == [
+            12, [1, str2octs('fo')], 1, str2octs('fox')
+            ]
+
+    def testChunks(self):
+        chunks = [ self.substrate[x:x+3] for x in range(0, len(self.substrate), 3) ]
+        assert list(decoder.decodeStream(chunks)) == [
+            12, [1, str2octs('fo')], 1, str2octs('fox')
+            ]
+
+    def testSpec(self):
+        assert list(decoder.decodeStream(
+            [ints2octs((2, 1, 12, 2, 1, 13))], asn1Spec=univ.Integer()
+            )) == [12, 13]
+
+    def testEmpty(self):
+        assert list(decoder.decodeStream(io.BytesIO(null))) == []
+
+    def testTruncated(self):
+        values = decoder.decodeStream(io.BytesIO(self.substrate[:-1]))
+        try:
+            list(values)
+        except SubstrateUnderrunError:
+            pass
+        else:
+            assert 0, 'truncated stream tolerated'
+
+    def testTruncatedIndefMode(self):
+        values = decoder.decodeStream(io.BytesIO(self.substrate[:13]))
+        try:
+            list(values)
+        except SubstrateUnderrunError:
+            pass
+        else:
+            assert 0, 'missing EOO tolerated'
+
+class DecodeManyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.substrate = ints2octs(
+            (2, 1, 12) +
+            (48, 128, 2, 1, 1, 36, 128, 4, 2, 102, 111, 0, 0, 0, 0) +
+            (4, 129, 3, 102, 111, 120)
+            )
+
+    def testDecodeMany(self):
+        assert decoder.decodeMany(self.substrate) == [
+            12, [1, str2octs('fo')], str2octs('fox')
+            ]
+
+    def testStreaming(self):
+        values = decoder.decodeMany(bytearray(self.substrate), streaming=True)
+        assert list(values) == [12, [1, str2octs('fo')], str2octs('fox')]
+
+    def testSpec(self):
+        assert decoder.decodeMany(
+            ints2octs((2, 1, 12, 2, 1, 13)), asn1Spec=univ.Integer()
+            ) == [12, 13]
+
+    def testEmpty(self):
+        assert decoder.decodeMany(null) == []
+
+    def testTruncated(self):
+        try:
+            decoder.decodeMany(self.substrate[:-1])
+        except SubstrateUnderrunError:
+            pass
+        else:
+            assert 0, 'truncated substrate tolerated'
+
+class RecordFramerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.substrate = bytearray(ints2octs(
+            (2, 1, 12) +
+            (48, 128, 2, 1, 1, 36, 128, 4, 2, 102, 111, 0, 0, 0, 0) +
+            (127, 141, 245, 182, 253, 47, 3, 2, 1, 1) +
+            (4, 129, 3, 102, 111, 120)
+            ))
+
+    def testOneShot(self):
+        framer = decoder.RecordFramer()
+        ends = []; pos = 0
+        while pos < len(self.substrate):
+            pos, complete = framer.frame(self.substrate, pos, len(self.substrate))
+            if complete:
+                ends.append(pos)
+        framer.checkComplete()
+        assert ends == [3, 18, 28, 34]
+
+    def testWanted(self):
+        framer = decoder.RecordFramer()
+        sizes = []; pos = 0
+        while pos < len(self.substrate):
+            sizes.append(framer.wanted())
+            pos = framer.frame(self.substrate, pos, pos + sizes[-1])[0]
+        assert sizes[-6:] == [1, 3, 1, 1, 1, 3]
+        assert framer.atRecordStart()
+
+    def testIncomplete(self):
+        framer = decoder.RecordFramer()
+        framer.frame(self.substrate, 3, 10)
+        assert not framer.atRecordStart()
+        try:
+            framer.checkComplete()
+        except SubstrateUnderrunError:
+            pass
+        else:
+            assert 0, 'incomplete record tolerated'
+
+class IncrementalDecoderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.substrate = ints2octs(
+            (2, 1, 12) +
+            (48, 128, 2, 1, 1, 36, 128, 4, 2, 102, 111, 0, 0, 0, 0) +
+            (127, 141, 245, 182, 253, 47, 3, 2, 1, 1) +
+            (4, 129, 3, 102, 111, 120)
+            )
+        self.values = [12, [1, str2octs('fo')], 1, str2octs('fox')]
+
+    def testOneShot(self):
+        d = decoder.IncrementalDecoder()
+        assert d.feed(self.substrate) == self.values
+        d.close()
+
+    def testOctetByOctet(self):
+        d = decoder.IncrementalDecoder()
+        values = []
+        for idx in range(len(self.substrate)):
+            values.extend(d.feed(self.substrate[idx:idx+1]))
+        assert values == self.values
+        d.close()
+
+    def testSplit(self):
+        d = decoder.IncrementalDecoder()
+        assert d.feed(self.substrate[:5]) == [12]
+        assert d.feed(self.substrate[5:17]) == []
+        assert d.feed(self.substrate[17:]) == self.values[1:]
+
+    def testSpec(self):
+        d = decoder.IncrementalDecoder(asn1Spec=univ.Integer())
+        assert d.feed(ints2octs((2, 1))) == []
+        assert d.feed(ints2octs((12, 2, 1, 13))) == [12, 13]
+
+    def testIncomplete(self):
+        d = decoder.IncrementalDecoder()
+        d.feed(self.substrate[:-1])
+        try:
+            d.close()
+        except SubstrateUnderrunError:
+            pass
+        else:
+            assert 0, 'incomplete value tolerated'
+
+    def testPrimitiveIndefMode(self):
+        d = decoder.IncrementalDecoder()
+        try:
+            d.feed(ints2octs((4, 128, 0, 0)))
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'indefinite length primitive tolerated'
+
 if __name__ == '__main__': unittest.main()
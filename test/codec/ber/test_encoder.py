@@ -1,6 +1,6 @@
-from pyasn1.type import tag, namedtype, univ
+from pyasn1.type import tag, namedtype, univ, constraint
 from pyasn1.codec.ber import encoder
-from pyasn1.compat.octets import ints2octs
+from pyasn1.compat.octets import ints2octs, str2octs
 from pyasn1.error import PyAsn1Error
 from sys import version_info
 if version_info[0:2] < (2, 7) or \
@@ -49,6 +49,27 @@ class IntegerEncoderTestCase(unittest.TestCase):
             univ.Integer(-0xffffffffffffffff)
             ) == ints2octs((2, 9, 255, 0, 0, 0, 0, 0, 0, 0, 1))
 
+    def testBigInt(self):
+        assert encoder.encode(
+            univ.Integer(1 << 4096)
+            ) == ints2octs((2, 130, 2, 1, 1) + (0,) * 512)
+
+    def testBigNegInt(self):
+        assert encoder.encode(
+            univ.Integer(-(1 << 4095))
+            ) == ints2octs((2, 130, 2, 0, 128) + (0,) * 511)
+
+    def testBoundaries(self):
+        assert encoder.encode(univ.Integer(127)) == ints2octs((2, 1, 127))
+        assert encoder.encode(univ.Integer(128)) == ints2octs((2, 2, 0, 128))
+        assert encoder.encode(univ.Integer(-128)) == ints2octs((2, 1, 128))
+        assert encoder.encode(univ.Integer(-129)) == ints2octs((2, 2, 255, 127))
+
+    def testEnumerated(self):
+        assert encoder.encode(
+            univ.Enumerated(-129)
+            ) == ints2octs((10, 2, 255, 127))
+
 class BooleanEncoderTestCase(unittest.TestCase):
     def testTrue(self):
         assert encoder.encode(univ.Boolean(1)) == ints2octs((1, 1, 1))
@@ -80,6 +101,11 @@ class BitStringEncoderTestCase(unittest.TestCase):
         
     def testEmptyValue(self):
         assert encoder.encode(univ.BitString(())) == ints2octs((3, 1, 0))
+
+    def testLong(self):
+        assert encoder.encode(
+            univ.BitString((0, 1) * 1024)
+            ) == ints2octs((3, 130, 1, 1, 0) + (85,) * 256)
         
 class OctetStringEncoderTestCase(unittest.TestCase):
     def setUp(self):
@@ -467,4 +493,276 @@ class AnyEncoderTestCase(unittest.TestCase):
             )
         assert encoder.encode(s) == ints2octs((132, 5, 4, 3, 102, 111, 120))
                     
+class ChunksEncoderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.s = univ.SequenceOf(componentType=univ.OctetString())
+        self.s.setComponentByPosition(0, 'quick brown')
+        self.s.setComponentByPosition(1, 'fox')
+
+    def testChunks(self):
+        chunks = []
+        length = encoder.encode.encodeChunks(self.s, 1, 0, chunks)
+        assert len(chunks) > 1
+        assert length == len(ints2octs(()).join(chunks))
+        assert ints2octs(()).join(chunks) == encoder.encode(self.s)
+
+    def testNested(self):
+        s = univ.SequenceOf(componentType=univ.SequenceOf())
+        s.setComponentByPosition(0, self.s)
+        s.setComponentByPosition(1, self.s)
+        assert encoder.encode(s) == ints2octs((48, 40, 48, 18, 4, 11, 113, 117, 105, 99, 107, 32, 98, 114, 111, 119, 110, 4, 3, 102, 111, 120, 48, 18, 4, 11, 113, 117, 105, 99, 107, 32, 98, 114, 111, 119, 110, 4, 3, 102, 111, 120))
+
+class CompiledEncoderTestCase(unittest.TestCase):
+    def setUp(self):
+        c = univ.Choice(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('number', univ.Integer()),
+            namedtype.NamedType('string', univ.OctetString())
+            ))
+        self.s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('place-holder', univ.Null('')),
+            namedtype.OptionalNamedType('first-name', univ.OctetString('')),
+            namedtype.DefaultedNamedType('age', univ.Integer(33)),
+            namedtype.NamedType('choice', c.subtype(
+                explicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 0)
+                )),
+            namedtype.OptionalNamedType('list', univ.SequenceOf(
+                componentType=univ.Integer().subtype(
+                    explicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 1)
+                    )
+                ))
+            ))
+        self.s.setComponentByPosition(0)
+        self.s.setComponentByPosition(2, 33)
+        self.s.setComponentByPosition(3)
+        self.s.getComponentByPosition(3).setComponentByPosition(1, 'fox')
+        self.s.setComponentByPosition(4)
+        self.s.getComponentByPosition(4).setComponentByPosition(0, 1)
+        self.s.getComponentByPosition(4).setComponentByPosition(1, 300)
+
+    def testCached(self):
+        assert encoder.encode.compile(self.s) is encoder.encode.compile(self.s)
+        assert encoder.encode.compile(self.s) is not \
+               encoder.encode.compile(self.s, defMode=0)
+
+    def testPlanCacheBounded(self):
+        plans = encoder.encode.getPlanCache()
+        for _ in range(plans.maxSize + 10):
+            encoder.encode.encodeNative(12, univ.Integer())
+        assert len(plans) <= plans.maxSize
+
+    def testDefMode(self):
+        assert encoder.encode.compile(self.s)(self.s) == ints2octs((48, 22, 5, 0, 160, 5, 4, 3, 102, 111, 120, 48, 11, 161, 3, 2, 1, 1, 161, 4, 2, 2, 1, 44))
+        assert encoder.encode.compile(self.s)(self.s) == encoder.encode(self.s)
+
+    def testIndefMode(self):
+        assert encoder.encode.compile(self.s, defMode=0)(self.s) == \
+               encoder.encode(self.s, defMode=0)
+
+    def testChunkedMode(self):
+        self.s.setComponentByPosition(1, 'quick brown')
+        assert encoder.encode.compile(self.s, defMode=0, maxChunkSize=4)(self.s) == \
+               encoder.encode(self.s, defMode=0, maxChunkSize=4)
+
+    def testOtherType(self):
+        assert encoder.encode.compile(self.s)(univ.Integer(12)) == \
+               ints2octs((2, 1, 12))
+
+    def testChunkedExplicitTag(self):
+        s = univ.OctetString('abcdefgh').subtype(
+            explicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 1)
+            )
+        assert encoder.encode.compile(s, maxChunkSize=4)(s) == \
+               ints2octs((161, 14, 36, 12, 4, 4, 97, 98, 99, 100, 4, 4, 101, 102, 103, 104))
+        assert encoder.encode.compile(s, maxChunkSize=4)(s) == \
+               encoder.encode(s, maxChunkSize=4)
+
+    def testChunkedExplicitTagComponents(self):
+        explicitTag = tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 2)
+        o = univ.OctetString().subtype(explicitTag=explicitTag)
+        b = univ.BitString().subtype(explicitTag=explicitTag)
+        s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('octets', o),
+            namedtype.NamedType('list', univ.SequenceOf(componentType=o)),
+            namedtype.NamedType('choice', univ.Choice(
+                componentType=namedtype.NamedTypes(
+                    namedtype.NamedType('bits', b)
+                    )
+                ))
+            ))
+        s.setComponentByPosition(0, 'quick brown')
+        s.setComponentByPosition(1)
+        s.getComponentByPosition(1).setComponentByPosition(0, 'fox')
+        s.getComponentByPosition(1).setComponentByPosition(1, 'jumps over')
+        s.setComponentByPosition(2)
+        s.getComponentByPosition(2).setComponentByPosition(0, (1, 0)*20)
+        for defMode in 1, 0:
+            assert encoder.encode.compile(s, defMode, 4)(s) == \
+                   encoder.encode(s, defMode, 4)
+
+class NativeEncoderTestCase(unittest.TestCase):
+    def setUp(self):
+        c = univ.Choice(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('number', univ.Integer()),
+            namedtype.NamedType('string', univ.OctetString())
+            ))
+        self.s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('place-holder', univ.Null('')),
+            namedtype.OptionalNamedType('first-name', univ.OctetString('')),
+            namedtype.DefaultedNamedType('age', univ.Integer(33)),
+            namedtype.NamedType('choice', c.subtype(
+                explicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 0)
+                )),
+            namedtype.OptionalNamedType('list', univ.SequenceOf(
+                componentType=univ.Integer().subtype(
+                    subtypeSpec=constraint.ValueRangeConstraint(0, 1000),
+                    explicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 1)
+                    )
+                ))
+            ))
+        self.value = {
+            'place-holder': None, 'age': 33, 'choice': ('string', str2octs('fox')),
+            'list': [1, 300]
+            }
+
+    def testDefMode(self):
+        assert encoder.encodeNative(self.value, self.s) == ints2octs((48, 22, 5, 0, 160, 5, 4, 3, 102, 111, 120, 48, 11, 161, 3, 2, 1, 1, 161, 4, 2, 2, 1, 44))
+
+    def testChunkedMode(self):
+        self.value['first-name'] = str2octs('quick brown')
+        assert encoder.encodeNative(
+            self.value, self.s, defMode=0, maxChunkSize=4
+            ) == ints2octs((48, 128, 5, 0, 36, 128, 4, 4, 113, 117, 105, 99, 4, 4, 107, 32, 98, 114, 4, 3, 111, 119, 110, 0, 0, 160, 128, 4, 3, 102, 111, 120, 0, 0, 48, 128, 161, 128, 2, 1, 1, 0, 0, 161, 128, 2, 2, 1, 44, 0, 0, 0, 0, 0, 0))
+
+    def testMissingComponent(self):
+        del self.value['place-holder']
+        try:
+            encoder.encodeNative(self.value, self.s)
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'missing component tolerated'
+
+    def testUnknownComponent(self):
+        self.value['last-name'] = str2octs('fox')
+        try:
+            encoder.encodeNative(self.value, self.s)
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'unknown component tolerated'
+
+    def testConstraint(self):
+        self.value['list'].append(1001)
+        try:
+            encoder.encodeNative(self.value, self.s)
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'constraint violation tolerated'
+
+class TrustedEncoderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.s = univ.SequenceOf(
+            componentType=univ.Integer().subtype(
+                subtypeSpec=constraint.ValueRangeConstraint(0, 1000)
+                ),
+            sizeSpec=constraint.ValueSizeConstraint(1, 1)
+            )
+        self.s.setComponentByPosition(0, 1)
+        self.s.setComponentByPosition(1, 300)
+
+    def testValue(self):
+        assert encoder.encode(self.s, trusted=True) == ints2octs((48, 7, 2, 1, 1, 2, 2, 1, 44))
+
+    def testSizeConstraint(self):
+        try:
+            encoder.encode(self.s)
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'size constraint violation tolerated'
+
+    def testNative(self):
+        assert encoder.encodeNative(
+            [1, 1001], self.s, trusted=True
+            ) == ints2octs((48, 7, 2, 1, 1, 2, 2, 3, 233))
+
+    def testTrustedEncoder(self):
+        trustedEncoder = encoder.encode.getTrustedEncoder()
+        assert trustedEncoder.trusted
+        assert trustedEncoder.getTrustedEncoder() is trustedEncoder
+        assert not encoder.encode.trusted
+
+class EncodeIntoTestCase(unittest.TestCase):
+    def setUp(self):
+        self.s = univ.SequenceOf(componentType=univ.OctetString())
+        self.s.setComponentByPosition(0, 'quick brown')
+        self.s.setComponentByPosition(1, 'fox')
+
+    def testEncodeInto(self):
+        buffer = bytearray(32)
+        assert encoder.encodeInto(self.s, buffer, 4) == 20
+        assert bytes(buffer[4:24]) == encoder.encode(self.s)
+        assert bytes(buffer[:4]) == ints2octs((0, 0, 0, 0))
+        assert bytes(buffer[24:]) == ints2octs((0,)*8)
+
+    def testIndefMode(self):
+        buffer = bytearray(32)
+        length = encoder.encodeInto(self.s, buffer, defMode=0)
+        assert bytes(buffer[:length]) == encoder.encode(self.s, defMode=0)
+
+    def testTaggedComponents(self):
+        s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('number', univ.Integer()),
+            namedtype.NamedType('octets', univ.OctetString().subtype(
+                explicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 300)
+                )),
+            namedtype.NamedType('bits', univ.BitString().subtype(
+                implicitTag=tag.Tag(tag.tagClassApplication, tag.tagFormatSimple, 40)
+                )),
+            namedtype.NamedType('null', univ.Null())
+            ))
+        s.setComponentByPosition(0, -300)
+        s.setComponentByPosition(1, 'x'*300)
+        s.setComponentByPosition(2, (1, 0, 1))
+        s.setComponentByPosition(3, '')
+        for defMode, maxChunkSize in (1, 0), (0, 0), (1, 128), (0, 4):
+            substrate = encoder.encode(s, defMode, maxChunkSize)
+            buffer = bytearray(len(substrate))
+            assert encoder.encodeInto(
+                s, buffer, 0, defMode, maxChunkSize
+                ) == len(substrate)
+            assert bytes(buffer) == substrate
+
+    def testOverflow(self):
+        buffer = bytearray(22)
+        try:
+            encoder.encodeInto(self.s, buffer, 4)
+        except encoder.Error:
+            pass
+        else:
+            assert 0, 'buffer overflow tolerated'
+        assert len(buffer) == 22
+
+class EncodeManyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.s = univ.SequenceOf(componentType=univ.Integer())
+        self.s.setComponentByPosition(0, 1)
+        self.values = [ univ.Integer(12), self.s, univ.OctetString('fox') ]
+
+    def testEncodeMany(self):
+        assert encoder.encodeMany(self.values) == ints2octs(
+            (2, 1, 12, 48, 3, 2, 1, 1, 4, 3, 102, 111, 120)
+            )
+
+    def testStreaming(self):
+        assert list(encoder.encodeMany(self.values, streaming=True)) == [
+            encoder.encode(x) for x in self.values
+            ]
+
+    def testSpec(self):
+        assert encoder.encodeMany(
+            [self.s, self.s], asn1Spec=self.s, defMode=0
+            ) == ints2octs((48, 128, 2, 1, 1, 0, 0)) * 2
+
 if __name__ == '__main__': unittest.main()
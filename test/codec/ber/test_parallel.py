@@ -0,0 +1,115 @@
+from pyasn1.type import namedtype, univ
+from pyasn1.codec.ber import decoder, encoder, parallel
+from pyasn1.codec.cer import decoder as cer_decoder, encoder as cer_encoder
+from pyasn1.compat.octets import ints2octs, str2octs
+from pyasn1.error import PyAsn1Error, SubstrateUnderrunError
+import pickle, tempfile, unittest
+
+class RecordBoundariesTestCase(unittest.TestCase):
+    def testBoundaries(self):
+        assert parallel.recordBoundaries(ints2octs(
+            (2, 1, 12) +
+            (48, 128, 2, 1, 1, 36, 128, 4, 2, 102, 111, 0, 0, 0, 0) +
+            (127, 141, 245, 182, 253, 47, 3, 2, 1, 1) +
+            (4, 129, 3, 102, 111, 120)
+            )) == [(0, 3), (3, 15), (18, 10), (28, 6)]
+
+    def testTruncated(self):
+        try:
+            parallel.recordBoundaries(ints2octs((2, 1, 12, 4, 3, 102)))
+        except SubstrateUnderrunError:
+            pass
+        else:
+            assert 0, 'truncated substrate tolerated'
+
+    def testMissingEoo(self):
+        try:
+            parallel.recordBoundaries(ints2octs((48, 128, 2, 1, 1, 0, 0)[:-1]))
+        except SubstrateUnderrunError:
+            pass
+        else:
+            assert 0, 'missing EOO tolerated'
+
+class DecodeParallelTestCase(unittest.TestCase):
+    def setUp(self):
+        self.s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('number', univ.Integer()),
+            namedtype.NamedType('name', univ.OctetString())
+            ))
+        self.values = []
+        for idx in range(20):
+            s = self.s.clone()
+            s.setComponentByName('number', idx)
+            s.setComponentByName('name', 'record #%d' % idx)
+            self.values.append(s)
+        self.substrate = encoder.encodeMany(self.values[:10]) + \
+                         cer_encoder.encodeMany(self.values[10:])
+
+    def testBuffer(self):
+        assert parallel.decodeParallel(
+            bytearray(self.substrate), self.s, workers=2, batchSize=3
+            ) == self.values
+
+    def testFile(self):
+        f = tempfile.NamedTemporaryFile()
+        try:
+            f.write(self.substrate)
+            f.flush()
+            values = parallel.decodeParallel(f.name, workers=2)
+        finally:
+            f.close()
+        assert values == self.values
+        assert values[3][1] == str2octs('record #3')
+
+    def testDecoder(self):
+        assert parallel.decodeParallel(
+            cer_encoder.encodeMany(self.values), self.s,
+            decodeFun=cer_decoder.decode, workers=1
+            ) == self.values
+
+    def testDecoderState(self):
+        decoder.decode(self.substrate[:20], asn1Spec=self.s)
+        decoder.decode.compile(self.s)
+        assert decoder.decode.getPlanCache()
+        decodeFun = pickle.loads(pickle.dumps(decoder.decode))
+        assert decodeFun.__class__ is decoder.Decoder
+        assert not decodeFun.getPlanCache()
+        assert not decodeFun.getDispatchCache()
+        assert decodeFun(self.substrate, asn1Spec=self.s)[0] == self.values[0]
+
+    def testBrokenRecord(self):
+        try:
+            parallel.decodeParallel(
+                self.substrate + ints2octs((5, 1, 0)), workers=1
+                )
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'broken record tolerated'
+
+    def testTruncatedFile(self):
+        f = tempfile.NamedTemporaryFile()
+        try:
+            f.write(self.substrate[:-4])
+            f.flush()
+            try:
+                parallel.decodeParallel(f.name, workers=1)
+            except SubstrateUnderrunError:
+                pass
+            else:
+                assert 0, 'truncated file tolerated'
+        finally:
+            f.close()
+
+    def testTruncatedBuffer(self):
+        try:
+            parallel.decodeParallel(self.substrate[:-4], workers=1)
+        except SubstrateUnderrunError:
+            pass
+        else:
+            assert 0, 'truncated buffer tolerated'
+
+    def testEmpty(self):
+        assert parallel.decodeParallel(ints2octs(())) == []
+
+if __name__ == '__main__': unittest.main()
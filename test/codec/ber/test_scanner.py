@@ -0,0 +1,82 @@
+from pyasn1.codec.ber import scanner
+from pyasn1.compat.octets import ints2octs
+from pyasn1.error import PyAsn1Error, SubstrateUnderrunError
+from sys import version_info
+if version_info[0:2] < (2, 7) or \
+   version_info[0:2] in ( (3, 0), (3, 1) ):
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        import unittest
+else:
+    import unittest
+
+class ScannerTestCase(unittest.TestCase):
+    def testDefMode(self):
+        index = scanner.scan(
+            ints2octs((48, 10, 2, 1, 12, 160, 5, 4, 3, 102, 111, 120, 5, 0))
+            )
+        assert list(index) == [
+            (0, 0, 32, 16, 0, 2, 10),
+            (1, 0, 0, 2, 2, 4, 1),
+            (1, 128, 32, 0, 5, 7, 5),
+            (2, 0, 0, 4, 7, 9, 3),
+            (0, 0, 0, 5, 12, 14, 0)
+            ]
+
+    def testIndefMode(self):
+        index = scanner.scan(
+            ints2octs((48, 128, 2, 1, 1, 36, 128, 4, 2, 102, 111, 0, 0, 0, 0))
+            )
+        assert len(index) == 4
+        assert index[0] == (0, 0, 32, 16, 0, 2, 11)
+        assert index[2] == (1, 0, 32, 4, 5, 7, 4)
+        assert index[-1] == (2, 0, 0, 4, 7, 9, 2)
+
+    def testLongTagAndLength(self):
+        assert list(scanner.scan(
+            ints2octs((127, 141, 245, 182, 253, 47, 3, 2, 1, 1, 4, 129, 1, 0))
+            )) == [
+            (0, 64, 32, 3735928495, 0, 7, 3),
+            (1, 0, 0, 2, 7, 9, 1),
+            (0, 0, 0, 4, 10, 13, 1)
+            ]
+
+    def testHugeTag(self):
+        # tag ID does not fit into 64 bits
+        try:
+            scanner.scan(ints2octs((31,) + (255,)*10 + (127, 0)))
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'huge tag ID tolerated'
+
+    def testEmpty(self):
+        assert len(scanner.scan(ints2octs(()))) == 0
+
+    def testOverrun(self):
+        # component runs past enclosing value
+        try:
+            scanner.scan(ints2octs((48, 3, 4, 3, 102, 111, 120)))
+        except SubstrateUnderrunError:
+            pass
+        else:
+            assert 0, 'overrun tolerated'
+
+    def testMissingEoo(self):
+        try:
+            scanner.scan(ints2octs((48, 128, 2, 1, 1, 0)))
+        except SubstrateUnderrunError:
+            pass
+        else:
+            assert 0, 'missing EOO tolerated'
+
+    def testIndefPrimitive(self):
+        try:
+            scanner.scan(ints2octs((4, 128, 0, 0)))
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'indefinite length primitive tolerated'
+
+if __name__ == '__main__': unittest.main()
@@ -28,4 +28,18 @@ class OctetStringDecoderTestCase(unittest.TestCase):
             ints2octs((36, 128, 4, 130, 3, 232) + (81,)*1000 + (4, 1, 81, 0, 0))
             ) == (str2octs('Q'*1001), null)
 
+class StreamDecoderTestCase(unittest.TestCase):
+    def testLongMode(self):
+        substrate = ints2octs((36, 128, 4, 130, 3, 232) + (81,)*1000 + (4, 1, 81, 0, 0)) + ints2octs((1, 1, 255))
+        assert list(decoder.decodeStream(
+            [ substrate[x:x+100] for x in range(0, len(substrate), 100) ]
+            )) == [str2octs('Q'*1001), 1]
+    def testBooleanViolation(self):
+        try:
+            list(decoder.decodeStream([ints2octs((1, 1, 1))]))
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'CER violation tolerated'
+
 if __name__ == '__main__': unittest.main()
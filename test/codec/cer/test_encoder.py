@@ -1,6 +1,6 @@
-from pyasn1.type import namedtype, univ
+from pyasn1.type import namedtype, univ, tag
 from pyasn1.codec.cer import encoder
-from pyasn1.compat.octets import ints2octs
+from pyasn1.compat.octets import ints2octs, str2octs
 from pyasn1.error import PyAsn1Error
 from sys import version_info
 if version_info[0:2] < (2, 7) or \
@@ -88,6 +88,12 @@ class SetEncoderTestCase(unittest.TestCase):
             self.s
             ) == ints2octs((49, 128, 2, 1, 1, 4, 11, 113, 117, 105, 99, 107, 32, 98, 114, 111, 119, 110, 5, 0, 0, 0))
 
+    def testNativeIndefMode(self):
+        assert encoder.encodeNative(
+            {'place-holder': None, 'first-name': str2octs('quick brown'), 'age': 1},
+            self.s
+            ) == ints2octs((49, 128, 2, 1, 1, 4, 11, 113, 117, 105, 99, 107, 32, 98, 114, 111, 119, 110, 5, 0, 0, 0))
+
 class SetWithChoiceEncoderTestCase(unittest.TestCase):
     def setUp(self):
         c = univ.Choice(componentType=namedtype.NamedTypes(
@@ -104,4 +110,34 @@ class SetWithChoiceEncoderTestCase(unittest.TestCase):
         self.s.getComponentByName('status').setComponentByPosition(0, 1)
         assert encoder.encode(self.s) == ints2octs((49, 128, 1, 1, 255, 5, 0, 0, 0))
 
+    def testNativeIndefMode(self):
+        assert encoder.encodeNative(
+            {'place-holder': None, 'status': ('actual', True)}, self.s
+            ) == ints2octs((49, 128, 1, 1, 255, 5, 0, 0, 0))
+
+class EncodeIntoTestCase(unittest.TestCase):
+    def testEncodeInto(self):
+        s = univ.SetOf(componentType=univ.OctetString())
+        s.setComponentByPosition(0, 'x'*1500)
+        s.setComponentByPosition(1, 'fox')
+        substrate = encoder.encode(s)
+        buffer = bytearray(len(substrate))
+        assert encoder.encodeInto(s, buffer) == len(substrate)
+        assert bytes(buffer) == substrate
+
+class CompiledEncoderTestCase(unittest.TestCase):
+    def testChunkedExplicitTag(self):
+        explicitTag = tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 0)
+        s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('octets', univ.OctetString().subtype(
+                explicitTag=explicitTag
+                )),
+            namedtype.NamedType('bits', univ.BitString().subtype(
+                explicitTag=explicitTag
+                ).subtype(implicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 1)))
+            ))
+        s.setComponentByPosition(0, 'x'*2500)
+        s.setComponentByPosition(1, (1, 0)*5000)
+        assert encoder.encode.compile(s)(s) == encoder.encode(s)
+
 if __name__ == '__main__': unittest.main()
@@ -1,5 +1,5 @@
-from pyasn1.type import namedtype, univ
-from pyasn1.codec.der import encoder
+from pyasn1.type import namedtype, univ, tag
+from pyasn1.codec.der import encoder, decoder
 from pyasn1.compat.octets import ints2octs
 from pyasn1.error import PyAsn1Error
 from sys import version_info
@@ -41,4 +41,49 @@ class SetWithChoiceEncoderTestCase(unittest.TestCase):
         self.s.getComponentByName('status').setComponentByPosition(0, 'ann')
         assert encoder.encode(self.s) == ints2octs((49, 7, 4, 3, 97, 110, 110, 5, 0))
 
+    def testCompiled(self):
+        self.s.setComponentByPosition(0)
+        self.s.setComponentByName('status')
+        self.s.getComponentByName('status').setComponentByPosition(0, 'ann')
+        assert encoder.encode.compile(self.s)(self.s) == ints2octs((49, 7, 4, 3, 97, 110, 110, 5, 0))
+
+class NativeEncoderTestCase(unittest.TestCase):
+    def setUp(self):
+        c = univ.Choice(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('number', univ.Integer()),
+            namedtype.NamedType('string', univ.OctetString())
+            )).subtype(
+                explicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 1)
+            )
+        c.setComponentByName('number', 1)
+        s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.NamedType('x', univ.Integer())
+            )).subtype(
+                explicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 2)
+            )
+        s.setComponentByName('x', 1)
+        self.s = univ.Sequence(componentType=namedtype.NamedTypes(
+            namedtype.DefaultedNamedType('null', univ.Null('').subtype(
+                explicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 0)
+                )),
+            namedtype.DefaultedNamedType('choice', c),
+            namedtype.DefaultedNamedType('sequence', s),
+            namedtype.NamedType('number', univ.Integer())
+            ))
+
+    def testDefaults(self):
+        substrate = ints2octs((48, 3, 2, 1, 1))
+        value, _ = decoder.decode(substrate, asn1Spec=self.s, native=True)
+        assert value == {
+            'null': None, 'choice': ('number', 1), 'sequence': {'x': 1},
+            'number': 1
+            }
+        assert encoder.encodeNative(value, self.s) == substrate
+
+    def testNonDefaults(self):
+        assert encoder.encodeNative(
+            {'choice': ('number', 2), 'sequence': {'x': 2}, 'number': 1},
+            self.s
+            ) == ints2octs((48, 15, 161, 3, 2, 1, 2, 162, 5, 48, 3, 2, 1, 2, 2, 1, 1))
+
 if __name__ == '__main__': unittest.main()
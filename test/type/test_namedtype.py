@@ -77,6 +77,40 @@ class NamedTypesCaseBase(unittest.TestCase):
         assert self.e.getPositionNearType(univ.Integer.tagSet, 1) == 1
         assert self.e.getPositionNearType(univ.OctetString.tagSet, 2) == 2
 
+    def testGetPositionNearTypeNotFound(self):
+        try:
+            self.e.getPositionNearType(univ.Integer.tagSet, 2)
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'unexpected type tolerated'
+
+    def testGetNearPositionOutOfRange(self):
+        try:
+            self.e.getTagMapNearPosition(3)
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'position out of range tolerated'
+
+    def testGetPositionNearTypeWithDups(self):
+        e = namedtype.NamedTypes(
+            namedtype.OptionalNamedType('first-name', univ.OctetString('')),
+            namedtype.NamedType('family-name', univ.OctetString(''))
+            )
+        try:
+            e.getPositionNearType(univ.OctetString.tagSet, 0)
+        except PyAsn1Error:
+            pass
+        else:
+            assert 0, 'Duped types not noticed'
+        assert e.getPositionNearType(univ.OctetString.tagSet, 1) == 1
+
+    def testCloneSharesNearPositions(self):
+        e = self.e.clone()
+        assert e.getTagMapNearPosition(1) is self.e.getTagMapNearPosition(1)
+        assert self.e.clone().getPositionNearType(univ.OctetString.tagSet, 1) == 2
+
 class OrderedNamedTypesCaseBase(unittest.TestCase):
     def setUp(self):
         self.e = namedtype.NamedTypes(
@@ -121,7 +121,26 @@ class BitStringTestCase(unittest.TestCase):
         assert self.b.clone("'A98A'H")[0] == 1
         assert self.b.clone("'A98A'H")[1] == 0
         assert self.b.clone("'A98A'H")[2] == 1
-        
+        assert tuple(self.b.clone("'A98A'H")) == (1,0,1,0,1,0,0,1,1,0,0,0,1,0,1,0)
+    def testNamedBits(self):
+        assert self.b.clone('Urgent')['Urgent'] == 1
+        assert self.b.clone('Urgent')['Active'] == 0
+        assert self.b.clone('Active')['Urgent'] == 0
+    def testOctets(self):
+        assert self.b.clone((1,0,1)).asOctets() == ints2octs((160,))
+        assert self.b.clone(univ.BitStringValue(ints2octs((169, 139)), 1)) == (1,0,1,0,1,0,0,1,1,0,0,0,1,0,1)
+    def testSlice(self):
+        b = self.b.clone("'A98A'H")
+        assert b[3:13] == (0,1,0,0,1,1,0,0,0,1)
+        assert b[8:] == (1,0,0,0,1,0,1,0)
+        assert b[::4] == (1,1,1,1)
+    def testAdd(self):
+        assert self.b.clone((1,0,1)) + (1,1) == (1,0,1,1,1)
+        assert (0,) + self.b.clone((1,)) == (0,1)
+        assert self.b.clone("'A9'H") + self.b.clone((1,)) == (1,0,1,0,1,0,0,1,1)
+    def testHash(self):
+        assert hash(self.b.clone((1,0,1))) == hash((1,0,1))
+
 class OctetStringTestCase(unittest.TestCase):
     def testInit(self):
         assert univ.OctetString(str2octs('abcd')) == str2octs('abcd'), '__init__() fails'
@@ -481,6 +500,19 @@ class Sequence(unittest.TestCase):
     def testSetComponents(self):
         assert self.s1.clone().setComponents(name='a', nick='b', age=1) == \
             self.s1.setComponentByPosition(0, 'a').setComponentByPosition(1, 'b').setComponentByPosition(2, 1)
+    def testLen(self):
+        s = self.s1.clone()
+        assert len(s) == 0 and not s
+        s.setComponentByPosition(1, 'abc')
+        assert len(s) == 2 and s
+        s.clear()
+        assert len(s) == 0 and not s
+    def testAppend(self):
+        s = univ.SequenceOf(componentType=univ.Integer())
+        for idx in range(100):
+            s.setComponentByPosition(idx, idx)
+        assert len(s) == 100
+        assert list(s) == list(range(100))
 
 class SetOf(unittest.TestCase):
     def setUp(self):